@@ -0,0 +1,160 @@
+"""
+Aggregate Queries
+Single-statement metric rollups for dashboards, computed entirely in SQL
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import select, func, case, cast, true, DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Contact, BlogPost, Payment, ChatMessage, MetricsRollup
+
+# Bucket start as text on SQLite, parsed back with datetime.fromisoformat
+SQLITE_BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+    "month": "%Y-%m-01 00:00:00",
+}
+
+
+def count_where(condition):
+    """COUNT(CASE WHEN condition THEN 1 END) - portable conditional count"""
+    return func.count(case((condition, 1)))
+
+
+def sum_where(column, condition):
+    """SUM over rows matching condition, 0 instead of NULL when nothing matches"""
+    return func.coalesce(func.sum(case((condition, column))), 0)
+
+
+def business_metrics_query(since: datetime):
+    """
+    Build one SELECT returning every dashboard metric as a single row.
+    Each table is scanned once by its own aggregate subquery; the one-row
+    subqueries are cross joined so the database returns one row total.
+    """
+    completed = Payment.status == "completed"
+
+    contacts = select(
+        func.count().label("contacts_total"),
+        count_where(Contact.created_at >= since).label("contacts_recent"),
+    ).subquery("contacts_agg")
+
+    blogs = select(
+        func.count().label("blogs_total"),
+        count_where(BlogPost.featured == True).label("blogs_featured"),
+    ).subquery("blogs_agg")
+
+    payments = select(
+        func.count().label("payments_total"),
+        count_where(completed).label("payments_completed"),
+        count_where(Payment.status == "pending").label("payments_pending"),
+        count_where(completed & (Payment.created_at >= since)).label("payments_completed_recent"),
+        sum_where(Payment.amount, completed).label("revenue_total"),
+    ).subquery("payments_agg")
+
+    chats = select(
+        func.count().label("chats_total"),
+        count_where(ChatMessage.created_at >= since).label("chats_recent"),
+    ).subquery("chats_agg")
+
+    return select(contacts, blogs, payments, chats).select_from(
+        contacts.join(blogs, true()).join(payments, true()).join(chats, true())
+    )
+
+
+async def business_metrics(db: AsyncSession, days: int = 30) -> dict:
+    """Fetch all dashboard counters in one round-trip"""
+    since = datetime.utcnow() - timedelta(days=days)
+    row = (await db.execute(business_metrics_query(since))).mappings().one()
+    return dict(row)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the hour/day/month bucket containing `moment`"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "hour":
+        return moment
+    moment = moment.replace(hour=0)
+    return moment.replace(day=1) if granularity == "month" else moment
+
+
+def next_bucket(start: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return start + timedelta(hours=1)
+    if granularity == "day":
+        return start + timedelta(days=1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def bucket_expr(db: AsyncSession, column, granularity: str):
+    """SQL truncating a timestamp or date column to its bucket start"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return func.date_trunc(granularity, cast(column, DateTime), type_=DateTime)
+    if dialect == "sqlite":
+        return func.strftime(SQLITE_BUCKET_FORMATS[granularity], column)
+    raise RuntimeError(f"time buckets are not supported on '{dialect}'")
+
+
+def revenue_series_query(db: AsyncSession, granularity: str, start: datetime, stop: datetime):
+    """
+    One GROUP BY over [start, stop), both bucket boundaries. Days and months
+    come from metrics_rollup (a row per day, method and status); hours are
+    finer than the rollup and come from payments through idx_payment_created_seek.
+    """
+    if granularity == "hour":
+        completed = Payment.status == "completed"
+        bucket = bucket_expr(db, Payment.created_at, granularity)
+        return select(
+            bucket.label("bucket"),
+            func.count().label("transactions"),
+            count_where(completed).label("completed"),
+            sum_where(Payment.amount, completed).label("revenue"),
+        ).where(Payment.created_at >= start, Payment.created_at < stop).group_by(bucket)
+
+    completed = MetricsRollup.status == "completed"
+    bucket = bucket_expr(db, MetricsRollup.day, granularity)
+    return select(
+        bucket.label("bucket"),
+        func.sum(MetricsRollup.count).label("transactions"),
+        sum_where(MetricsRollup.count, completed).label("completed"),
+        sum_where(MetricsRollup.amount, completed).label("revenue"),
+    ).where(
+        MetricsRollup.metric == "payments",
+        MetricsRollup.day >= start.date(),
+        MetricsRollup.day < stop.date(),
+    ).group_by(bucket)
+
+
+async def revenue_series(db: AsyncSession, granularity: str, start: datetime, end: datetime,
+                         max_buckets: int = 1000) -> list[dict]:
+    """
+    Transactions, completed payments and revenue per bucket for every
+    hour/day/month bucket overlapping [start, end), oldest first, empty
+    buckets included. Raises ValueError for ranges over max_buckets buckets.
+    """
+    buckets = []
+    moment = bucket_start(start, granularity)
+    while moment < end:
+        if len(buckets) == max_buckets:
+            raise ValueError(f"Range spans more than {max_buckets} {granularity} buckets")
+        buckets.append(moment)
+        moment = next_bucket(moment, granularity)
+    if not buckets:
+        return []
+
+    rows = {}
+    for row in await db.execute(revenue_series_query(db, granularity, buckets[0], moment)):
+        rows[datetime.fromisoformat(row.bucket) if isinstance(row.bucket, str) else row.bucket] = row
+
+    series = []
+    for bucket in buckets:
+        row = rows.get(bucket)
+        series.append({
+            "start": bucket.isoformat(),
+            "transactions": row.transactions if row else 0,
+            "completed": row.completed if row else 0,
+            "revenue": row.revenue if row else 0,
+        })
+    return series
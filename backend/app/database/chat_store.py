@@ -0,0 +1,116 @@
+"""
+Chat Storage
+Reads and writes chat history in chat_conversations / chat_messages.
+
+A batch of exchanges costs one multi-row upsert on chat_conversations (which
+keeps message_count and last_message_at current and returns the surrogate
+ids) plus one bulk INSERT into chat_messages, whether it comes from a single
+request or from the write-behind flusher.
+"""
+
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import case, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .dialect import upsert_for
+from .models import ChatConversation, ChatMessage
+from .rollup import bump
+
+
+async def upsert_conversations(db: AsyncSession,
+                               activity: dict[str, tuple[int, datetime, datetime]]) -> dict[str, int]:
+    """
+    Create or advance conversations from {session_key: (new messages, first, last message time)},
+    returns {session_key: conversation id}. Conversations receiving their first
+    messages are counted in the "chat_sessions" rollup.
+    """
+    upsert = upsert_for(db)(ChatConversation).values([
+        {"session_key": key, "message_count": count, "created_at": first, "last_message_at": last}
+        for key, (count, first, last) in activity.items()
+    ])
+    upsert = upsert.on_conflict_do_update(
+        index_elements=["session_key"],
+        set_={
+            "message_count": ChatConversation.message_count + upsert.excluded.message_count,
+            "last_message_at": upsert.excluded.last_message_at,
+            # A row created early by save_summary takes its first message's time
+            "created_at": case(
+                (ChatConversation.message_count == 0, upsert.excluded.created_at),
+                else_=ChatConversation.created_at,
+            ),
+        },
+    ).returning(ChatConversation.id, ChatConversation.session_key, ChatConversation.message_count)
+    conversation_ids = {}
+    new_per_day = Counter()
+    for conversation_id, key, message_count in (await db.execute(upsert)).all():
+        conversation_ids[key] = conversation_id
+        # The count only equals this batch's messages when the conversation had none before
+        count, first, _ = activity[key]
+        if message_count == count:
+            new_per_day[first.date()] += 1
+    for day, count in new_per_day.items():
+        await bump(db, "chat_sessions", day=day, count=count)
+    return conversation_ids
+
+
+async def save_exchanges(db: AsyncSession, records: list[dict]) -> None:
+    """
+    Persist chat records (id, session_id, user_message, ai_reply, created_at)
+    and their "chats" rollup counts. The caller commits.
+    """
+    activity: dict[str, tuple[int, datetime, datetime]] = {}
+    for record in records:
+        created_at = record["created_at"]
+        count, first, last = activity.get(record["session_id"], (0, created_at, created_at))
+        activity[record["session_id"]] = (count + 1, min(first, created_at), max(last, created_at))
+    conversation_ids = await upsert_conversations(db, activity)
+
+    await db.execute(insert(ChatMessage), [
+        {
+            "id": record["id"],
+            "conversation_id": conversation_ids[record["session_id"]],
+            "user_message": record["user_message"],
+            "ai_reply": record["ai_reply"],
+            "created_at": record["created_at"],
+        }
+        for record in records
+    ])
+    for day, count in Counter(record["created_at"].date() for record in records).items():
+        await bump(db, "chats", day=day, count=count)
+
+
+async def get_conversation(db: AsyncSession, session_key: str) -> ChatConversation | None:
+    return await db.scalar(select(ChatConversation).where(ChatConversation.session_key == session_key))
+
+
+async def recent_messages(db: AsyncSession, conversation_id: int, limit: int,
+                          after: datetime | None = None) -> list:
+    """Newest `limit` messages of a conversation (newest first), optionally only those after `after`"""
+    query = select(ChatMessage.user_message, ChatMessage.ai_reply, ChatMessage.created_at).where(
+        ChatMessage.conversation_id == conversation_id
+    )
+    if after is not None:
+        query = query.where(ChatMessage.created_at > after)
+    result = await db.execute(query.order_by(ChatMessage.created_at.desc()).limit(limit))
+    return result.all()
+
+
+async def save_summary(db: AsyncSession, session_key: str, summary: str, turns: int,
+                       summarized_through: datetime) -> None:
+    """Store a conversation's rolling summary, creating the row if its messages are still queued"""
+    upsert = upsert_for(db)(ChatConversation).values(
+        session_key=session_key,
+        summary=summary,
+        summarized_turns=turns,
+        summarized_through=summarized_through,
+    )
+    upsert = upsert.on_conflict_do_update(
+        index_elements=["session_key"],
+        set_={
+            "summary": upsert.excluded.summary,
+            "summarized_turns": upsert.excluded.summarized_turns,
+            "summarized_through": upsert.excluded.summarized_through,
+        },
+    )
+    await db.execute(upsert)
@@ -0,0 +1,55 @@
+"""
+Job Checkpoints
+Durable resume positions for background jobs, one row per job in
+job_checkpoints. A worker leases the row before running a step of the job,
+so only one process runs a given job at a time without holding a
+transaction open for the whole step; a lease left by a crashed worker
+simply runs out.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .dialect import upsert_for
+from .models import JobCheckpoint
+
+
+async def claim(db: AsyncSession, name: str, lease: timedelta):
+    """
+    Lease the job for `lease` and return its row (with .position), or None
+    while another worker holds an unexpired lease. The caller commits.
+    """
+    now = datetime.utcnow()
+    await db.execute(upsert_for(db)(JobCheckpoint).values(name=name).on_conflict_do_nothing())
+    return (await db.execute(
+        update(JobCheckpoint)
+        .where(JobCheckpoint.name == name,
+               or_(JobCheckpoint.leased_until.is_(None), JobCheckpoint.leased_until < now))
+        .values(leased_until=now + lease)
+        .returning(JobCheckpoint.position)
+        .execution_options(synchronize_session=False)
+    )).first()
+
+
+async def save(db: AsyncSession, name: str, position: str | None) -> None:
+    """
+    Record where the job got to and end the lease; None starts the next pass
+    from the beginning. The caller commits.
+    """
+    await db.execute(
+        update(JobCheckpoint)
+        .where(JobCheckpoint.name == name)
+        .values(position=position, leased_until=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def release(db: AsyncSession, name: str) -> None:
+    """End the lease without moving the position. The caller commits."""
+    await db.execute(
+        update(JobCheckpoint)
+        .where(JobCheckpoint.name == name)
+        .values(leased_until=None)
+        .execution_options(synchronize_session=False)
+    )
@@ -1,20 +1,61 @@
-
 """
 Database Connection Configuration
 Uses SQLAlchemy ORM for PostgreSQL database management
 """
 
 from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from sqlalchemy.pool import StaticPool
 
+from .replicas import ReplicaSet, pinned_to_primary
+
 # Get database URL from environment or use SQLite for development
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "sqlite:///./test.db"  # SQLite for local development
 )
 
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+
+# Async drivers used by the request path (psycopg 3 for PostgreSQL, aiosqlite for SQLite)
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+psycopg",
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Translate a sync database URL into its async driver equivalent"""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# Optional comma-separated read replicas for read-only routes (see replicas.py)
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+
+def make_async_engine(url: str):
+    """Async engine with the pool settings for the URL's database type"""
+    if "postgresql" in url:
+        return create_async_engine(
+            url,
+            pool_size=10,
+            max_overflow=20,
+            pool_pre_ping=True,  # Test connections before using
+            echo=SQL_ECHO
+        )
+    return create_async_engine(url, echo=SQL_ECHO)
+
+
 # Connection settings based on database type
 if "postgresql" in DATABASE_URL:
     # PostgreSQL production settings
@@ -23,7 +64,7 @@ if "postgresql" in DATABASE_URL:
         pool_size=10,
         max_overflow=20,
         pool_pre_ping=True,  # Test connections before using
-        echo=os.getenv("SQL_ECHO", "false").lower() == "true"
+        echo=SQL_ECHO
     )
 else:
     # SQLite development settings
@@ -31,19 +72,59 @@ else:
         DATABASE_URL,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
-        echo=os.getenv("SQL_ECHO", "false").lower() == "true"
+        echo=SQL_ECHO
     )
 
-# Session factory
+async_engine = make_async_engine(ASYNC_DATABASE_URL)
+replicas = ReplicaSet([make_async_engine(to_async_url(url)) for url in DATABASE_REPLICA_URLS])
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False  # Attribute access after commit must not trigger implicit IO
+)
 
 # Base class for all models
 Base = declarative_base()
 
 def get_db():
-    """Dependency for getting database session in routes"""
+    """Dependency for getting database session in scripts and sync code"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for getting an async database session in routes"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def ReadSessionLocal() -> AsyncSession:
+    """Session on the next healthy replica, or on the primary when there is none or the client just wrote"""
+    engine = None if pinned_to_primary() else replicas.pick()
+    if engine is None:
+        return AsyncSessionLocal()
+    return AsyncSessionLocal(bind=engine)
+
+
+def reads_from_replica(db: AsyncSession) -> bool:
+    """True when the session was routed to a replica rather than the primary"""
+    return db.bind is not async_engine
+
+
+async def get_read_db():
+    """Dependency for read-only routes, which may be served by a replica"""
+    async with ReadSessionLocal() as db:
+        try:
+            yield db
+        except OperationalError:
+            # Lost connection or replica gone: route around it until it passes a health check
+            if reads_from_replica(db):
+                replicas.eject(db.bind)
+            raise
@@ -0,0 +1,17 @@
+"""
+Dialect Helpers
+Statements that differ between PostgreSQL and SQLite, the two supported backends
+"""
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def upsert_for(db: AsyncSession):
+    """Dialect-specific INSERT supporting ON CONFLICT DO NOTHING / DO UPDATE"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise RuntimeError(f"ON CONFLICT upserts are not supported on '{dialect}'")
@@ -0,0 +1,48 @@
+"""
+Primary Key Generation
+Time-ordered UUIDv7 ids (RFC 9562) for application-generated primary keys.
+
+The first 48 bits are the Unix time in milliseconds, so new keys sort after
+existing ones and inserts append to the right edge of the primary key B-tree
+instead of splitting pages at random positions like uuid4 does. Stored in
+the native 16-byte UUID type on PostgreSQL (CHAR(32) hex on SQLite).
+"""
+
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    New UUIDv7: 48-bit millisecond timestamp, 12-bit counter (method 1 of
+    RFC 9562 section 6.2) and 62 random bits. The counter keeps ids generated
+    within the same millisecond monotonic in this process.
+    """
+    global _last_ms, _counter
+    random_bits = int.from_bytes(os.urandom(10), "big")
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            _counter = random_bits >> 69  # random 11-bit start leaves room to count up
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                # Counter exhausted: borrow the next millisecond
+                _last_ms += 1
+                _counter = 0
+            ms = _last_ms
+        counter = _counter
+
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76  # version
+    value |= counter << 64
+    value |= 0b10 << 62  # variant
+    value |= random_bits & 0x3FFF_FFFF_FFFF_FFFF
+    return uuid.UUID(int=value)
@@ -3,28 +3,56 @@ SQLAlchemy Database Models
 Defines the schema for all database tables
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Index
+from sqlalchemy import Column, BigInteger, Integer, SmallInteger, String, Text, Date, DateTime, Boolean, ForeignKey, Index, Numeric, UniqueConstraint, Uuid
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 from .connection import Base
+from .ids import uuid7
+
+
+class SQLiteTimestamp(sqlite.DATETIME):
+    """
+    SQLite DATETIME that binds whole-second values as 'YYYY-MM-DD HH:MM:SS',
+    the format CURRENT_TIMESTAMP writes, so equality and range comparisons
+    against server-defaulted rows work (needed by keyset pagination)
+    """
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None:
+                return None
+            if value.microsecond:
+                return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        return process
+
+
+# Portable timestamp column type: plain DateTime everywhere except SQLite
+Timestamp = DateTime().with_variant(SQLiteTimestamp(), "sqlite")
+
+# 64-bit surrogate keys; SQLite only auto-increments a plain INTEGER PRIMARY KEY
+BigId = BigInteger().with_variant(Integer(), "sqlite")
 
 class BlogPost(Base):
     """Blog post database model"""
     __tablename__ = "blog_posts"
 
-    id = Column(String(36), primary_key=True, index=True)
-    title = Column(String(200), nullable=False, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid7)
+    title = Column(String(200), nullable=False)
     content = Column(Text, nullable=False)
     slug = Column(String(250), unique=True, index=True, nullable=False)
-    featured = Column(Boolean, default=False, index=True)
+    featured = Column(Boolean, default=False)
     author = Column(String(100), nullable=False)
-    created_at = Column(DateTime, server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+    created_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now(), nullable=False)
 
     __table_args__ = (
-        Index('idx_blog_created', 'created_at'),
-        Index('idx_blog_featured', 'featured'),
+        # Serves the keyset-paginated listing: WHERE featured ORDER BY created_at DESC, id DESC
+        Index('idx_blog_listing', 'featured', 'created_at', 'id'),
+        # Index-only lookup of the conditional-request validator
+        Index('idx_blog_validator', 'id', 'updated_at'),
     )
 
 
@@ -32,34 +60,52 @@ class Contact(Base):
     """Contact form submission database model"""
     __tablename__ = "contacts"
 
-    id = Column(String(36), primary_key=True, index=True)
-    name = Column(String(100), nullable=False, index=True)
-    email = Column(String(255), nullable=False, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid7)
+    name = Column(String(100), nullable=False)
+    email = Column(String(255), nullable=False)
     project = Column(Text, nullable=False)
     phone = Column(String(20), nullable=True)
     budget = Column(String(100), nullable=True)
-    created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+    created_at = Column(Timestamp, server_default=func.now(), nullable=False)
 
     __table_args__ = (
-        Index('idx_contact_created', 'created_at'),
-        Index('idx_contact_email', 'email'),
+        # Keyset listing and export (ORDER BY created_at DESC, id DESC) and the recent-contacts counts
+        Index('idx_contact_listing', 'created_at', 'id'),
     )
 
 
-class ChatSession(Base):
-    """Chat session and message history database model"""
-    __tablename__ = "chat_sessions"
+class ChatConversation(Base):
+    """One row per chat session: the client-facing session id plus running aggregates"""
+    __tablename__ = "chat_conversations"
 
-    id = Column(String(36), primary_key=True, index=True)
-    session_id = Column(String(36), nullable=False, index=True)
+    id = Column(BigId, primary_key=True, autoincrement=True)
+    session_key = Column(String(64), unique=True, nullable=False)  # session_id exchanged with clients
+    message_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    last_message_at = Column(Timestamp, nullable=True)
+    # Rolling summary of the turns that fell out of the LLM context window
+    summary = Column(Text, nullable=False, default="")
+    summarized_turns = Column(Integer, nullable=False, default=0)
+    summarized_through = Column(Timestamp, nullable=True)  # created_at of the newest summarized message
+
+
+class ChatMessage(Base):
+    """One exchange (visitor message + AI reply) within a conversation"""
+    __tablename__ = "chat_messages"
+
+    # Generated by the application (uuid7), so batched inserts need no RETURNING round-trip
+    id = Column(Uuid, primary_key=True, default=uuid7)
+    conversation_id = Column(BigId, ForeignKey("chat_conversations.id", ondelete="CASCADE"), nullable=False)
     user_message = Column(Text, nullable=False)
     ai_reply = Column(Text, nullable=False)
-    user_info = Column(String(255), default="anonymous")
-    created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+    created_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    rating = Column(SmallInteger, nullable=True)  # visitor feedback, 1-5
+    rated_at = Column(Timestamp, nullable=True)
 
     __table_args__ = (
-        Index('idx_chat_session', 'session_id'),
-        Index('idx_chat_created', 'created_at'),
+        # Serves "last N messages of a conversation" without a sort
+        Index('idx_chat_message_conversation', 'conversation_id', 'created_at'),
+        Index('idx_chat_message_created', 'created_at'),
     )
 
 
@@ -67,21 +113,71 @@ class Payment(Base):
     """Payment transaction database model"""
     __tablename__ = "payments"
 
-    id = Column(String(36), primary_key=True, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid7)
     transaction_id = Column(String(100), unique=True, index=True, nullable=False)
     customer_name = Column(String(100), nullable=False)
-    customer_email = Column(String(255), nullable=False, index=True)
-    amount = Column(Float, nullable=False)
+    customer_email = Column(String(255), nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)  # exact, so revenue sums add up to the cent
     currency = Column(String(10), default="NPR")
-    status = Column(String(50), default="pending", index=True)  # pending, completed, failed
+    status = Column(String(50), default="pending")  # pending, completed, failed
     payment_method = Column(String(50), nullable=False)  # khalti, esewa
     description = Column(Text, nullable=True)
     return_url = Column(String(500), nullable=True)
-    created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+    created_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now(), nullable=False)
 
     __table_args__ = (
-        Index('idx_payment_status', 'status'),
-        Index('idx_payment_created', 'created_at'),
-        Index('idx_payment_email', 'customer_email'),
+        # Status counts and the reconciler's keyset walk over pending payments
+        # (WHERE status ORDER BY created_at, id); amount makes it covering for the revenue sums
+        Index('idx_payment_status_seek', 'status', 'created_at', 'id', 'amount'),
+        # Newest-first history (ORDER BY created_at DESC, id DESC), whole or narrowed
+        # to one method or customer; a status filter seeks idx_payment_status_seek
+        Index('idx_payment_created_seek', 'created_at', 'id'),
+        Index('idx_payment_method_seek', 'payment_method', 'created_at', 'id'),
+        Index('idx_payment_email_seek', 'customer_email', 'created_at', 'id'),
     )
+
+
+class PaymentWebhookEvent(Base):
+    """Payment provider notification, queued durably until the webhook worker applies it"""
+    __tablename__ = "payment_webhook_events"
+
+    id = Column(BigId, primary_key=True, autoincrement=True)
+    provider = Column(String(20), nullable=False)  # khalti, esewa
+    event_id = Column(String(128), nullable=False)  # provider's event id, or a hash of the payload
+    transaction_id = Column(String(100), nullable=False)
+    status = Column(String(50), nullable=True)  # payment status the event claims, NULL if none (not trusted)
+    payload = Column(Text, nullable=False)
+    received_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    processed_at = Column(Timestamp, nullable=True)
+    outcome = Column(String(20), nullable=True)  # applied, skipped, unverified
+
+    __table_args__ = (
+        # Retried deliveries of the same event are dropped at ingestion
+        UniqueConstraint('provider', 'event_id', name='uq_webhook_event'),
+        # The queue itself: only unprocessed rows, in arrival order
+        Index('idx_webhook_pending', 'id',
+              postgresql_where=processed_at.is_(None), sqlite_where=processed_at.is_(None)),
+    )
+
+
+class JobCheckpoint(Base):
+    """Resume position of a background job, so a restart continues instead of starting over"""
+    __tablename__ = "job_checkpoints"
+
+    name = Column(String(50), primary_key=True)
+    position = Column(Text, nullable=True)  # encoded keyset cursor, NULL at the start of a pass
+    leased_until = Column(Timestamp, nullable=True)  # set while a worker is running the job
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class MetricsRollup(Base):
+    """Per-day metric counters maintained incrementally alongside writes"""
+    __tablename__ = "metrics_rollup"
+
+    day = Column(Date, primary_key=True)
+    metric = Column(String(30), primary_key=True)  # contacts, chats, payments, blogs
+    status = Column(String(50), primary_key=True, default="")  # payment status, blog featured/draft
+    method = Column(String(50), primary_key=True, default="")  # payment method
+    count = Column(Integer, nullable=False, default=0)
+    amount = Column(Numeric(14, 2), nullable=False, default=0)
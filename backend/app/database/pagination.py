@@ -0,0 +1,72 @@
+"""
+Keyset Pagination Helpers
+Opaque cursors and seek predicates for stable, index-driven paging
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy import and_, or_, literal
+
+
+def encode_cursor(*values) -> str:
+    """Pack the sort-key values of the last row into an opaque URL-safe cursor"""
+    payload = [
+        v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, uuid.UUID) else v
+        for v in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Unpack a cursor produced by encode_cursor.
+    `types` gives the expected type of each value: datetime values are parsed
+    from ISO format and uuid.UUID values from their string form.
+    Raises ValueError("Invalid cursor") for a malformed or tampered cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(payload, list) or len(payload) != len(types):
+        raise ValueError("Invalid cursor")
+
+    values = []
+    for value, expected in zip(payload, types):
+        if expected is datetime or expected is uuid.UUID:
+            if not isinstance(value, str):
+                raise ValueError("Invalid cursor")
+            try:
+                value = datetime.fromisoformat(value) if expected is datetime else uuid.UUID(value)
+            except ValueError as e:
+                raise ValueError("Invalid cursor") from e
+        elif not isinstance(value, expected):
+            raise ValueError("Invalid cursor")
+        values.append(value)
+    return tuple(values)
+
+
+def seek_after(keys: list, values: tuple):
+    """
+    WHERE clause selecting rows strictly after `values` in ORDER BY `keys`.
+    `keys` is a list of (column, descending) pairs, e.g. for ORDER BY
+    created_at DESC, id DESC:
+
+        created_at < :c OR (created_at = :c AND id < :i)
+
+    The expanded OR form lets the planner drive the scan from the leading
+    column's index on every backend.
+    """
+    # Bind through the column type so booleans compare as values, not IS TRUE
+    bound = [literal(value, column.type) for (column, _), value in zip(keys, values)]
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal_prefix = [keys[j][0] == bound[j] for j in range(i)]
+        step = column < bound[i] if descending else column > bound[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
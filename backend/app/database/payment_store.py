@@ -0,0 +1,79 @@
+"""
+Payment Status Transitions
+Every status change after initiation (provider verification, webhooks,
+the reconciler) goes through apply_transitions: one guarded UPDATE per target status plus
+the matching metrics_rollup moves, so concurrent paths reporting the same
+outcome apply it once.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Payment
+from .pagination import seek_after
+from .rollup import bump
+
+# Oldest first, id breaks ties; matches idx_payment_status_seek
+PENDING_ORDER = [(Payment.created_at, False), (Payment.id, False)]
+
+# Target status -> the only status it may be entered from, in the order a batch applies them
+# (a payment completed and refunded within one batch ends up refunded)
+TRANSITIONS = {
+    "completed": "pending",
+    "failed": "pending",
+    "expired": "pending",
+    "cancelled": "pending",
+    "refunded": "completed",
+}
+
+
+async def apply_transitions(db: AsyncSession, wanted: dict[str, set[str]]) -> set[tuple[str, str]]:
+    """
+    Move payments to target statuses from {status: transaction ids}, returns
+    the (transaction_id, status) pairs that actually changed. Payments not in
+    the transition's source status are left alone. The caller commits.
+    """
+    applied = set()
+    moves = defaultdict(lambda: [0, Decimal(0)])
+    for status, source in TRANSITIONS.items():
+        if not wanted.get(status):
+            continue
+        rows = (await db.execute(
+            update(Payment)
+            .where(Payment.transaction_id.in_(wanted[status]), Payment.status == source)
+            .values(status=status)
+            .returning(Payment.transaction_id, Payment.payment_method, Payment.amount, Payment.created_at)
+            .execution_options(synchronize_session=False)
+        )).all()
+        for row in rows:
+            applied.add((row.transaction_id, status))
+            move = moves[(row.created_at.date(), row.payment_method, source, status)]
+            move[0] += 1
+            move[1] += row.amount
+
+    for (day, method, source, status), (count, amount) in moves.items():
+        await bump(db, "payments", day=day, status=source, method=method, count=-count, amount=-amount)
+        await bump(db, "payments", day=day, status=status, method=method, count=count, amount=amount)
+    return applied
+
+
+async def pending_payments(db: AsyncSession, created_from: datetime, created_before: datetime,
+                           after: tuple | None, limit: int) -> list:
+    """
+    Next page of pending payments created in [created_from, created_before),
+    oldest first, strictly after the (created_at, id) position `after`
+    """
+    query = select(
+        Payment.id, Payment.transaction_id, Payment.payment_method, Payment.amount, Payment.created_at
+    ).where(
+        Payment.status == "pending",
+        Payment.created_at >= created_from,
+        Payment.created_at < created_before,
+    )
+    if after is not None:
+        query = query.where(seek_after(PENDING_ORDER, after))
+    query = query.order_by(*(column for column, _ in PENDING_ORDER)).limit(limit)
+    return (await db.execute(query)).all()
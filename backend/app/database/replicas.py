@@ -0,0 +1,165 @@
+"""
+Read Replica Routing
+Read-only routes take their session from get_read_db, which round-robins
+over the replicas in DATABASE_REPLICA_URLS that passed their last health
+check and falls back to the primary when none did.
+
+A background task probes every replica each REPLICA_HEALTH_INTERVAL
+seconds (SELECT 1, plus replay lag on PostgreSQL standbys); a replica that
+drops a connection mid-request is ejected immediately and rejoins on the
+next passing probe.
+
+Read-your-writes: ReadYourWritesMiddleware sets a short-lived cookie on
+every successful write, and reads that carry it go to the primary until it
+expires, so a client sees its own writes despite replication lag. Reads
+inside a handler that wrote always share the write session on the primary.
+"""
+
+import asyncio
+import itertools
+import os
+from contextvars import ContextVar
+from http.cookies import CookieError, SimpleCookie
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))
+REPLICA_HEALTH_TIMEOUT = float(os.getenv("REPLICA_HEALTH_TIMEOUT", "2"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+PRIMARY_COOKIE = "db_primary"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# A standby that has replayed everything it received is caught up, however old its last transaction
+PG_REPLICATION_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+# Set per request by ReadYourWritesMiddleware
+_pinned_to_primary: ContextVar[bool] = ContextVar("pinned_to_primary", default=False)
+
+
+def pinned_to_primary() -> bool:
+    """True when the current request must read from the primary"""
+    return _pinned_to_primary.get()
+
+
+class ReplicaSet:
+    """Round-robin over the replicas that passed their last health check"""
+
+    def __init__(self, engines: list[AsyncEngine]):
+        self.engines = list(engines)
+        # Trusted until the first probe says otherwise
+        self.healthy = list(self.engines)
+        self._turn = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def pick(self) -> AsyncEngine | None:
+        """Next healthy replica, or None to use the primary"""
+        healthy = self.healthy
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def eject(self, engine: AsyncEngine) -> None:
+        """Stop routing to a replica until its next passing health check"""
+        self.healthy = [e for e in self.healthy if e is not engine]
+
+    async def probe(self, engine: AsyncEngine) -> bool:
+        try:
+            async with asyncio.timeout(REPLICA_HEALTH_TIMEOUT):
+                async with engine.connect() as conn:
+                    if engine.dialect.name != "postgresql":
+                        await conn.execute(text("SELECT 1"))
+                        return True
+                    lag = (await conn.execute(PG_REPLICATION_LAG)).scalar()
+                    return float(lag or 0) <= REPLICA_MAX_LAG_SECONDS
+        except Exception:
+            return False
+
+    async def check(self) -> None:
+        """Probe every replica and route only to those that answered in time"""
+        results = await asyncio.gather(*(self.probe(engine) for engine in self.engines))
+        self.healthy = [engine for engine, ok in zip(self.engines, results) if ok]
+
+    def status(self) -> dict:
+        return {"configured": len(self.engines), "healthy": len(self.healthy)}
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(REPLICA_HEALTH_INTERVAL)
+
+    async def start(self) -> None:
+        if self.engines and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for engine in self.engines:
+            await engine.dispose()
+
+
+def _has_primary_cookie(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            try:
+                cookie = SimpleCookie(value.decode("latin-1"))
+            except CookieError:
+                continue
+            if PRIMARY_COOKIE in cookie:
+                return True
+    return False
+
+
+def _is_https(scope) -> bool:
+    if scope.get("scheme") == "https":
+        return True
+    return any(name == b"x-forwarded-proto" and value == b"https" for name, value in scope["headers"])
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pins a client's reads to the primary for READ_YOUR_WRITES_SECONDS after
+    one of its writes succeeds. Over HTTPS the cookie is SameSite=None so a
+    frontend on another site keeps it (its fetches need credentials: "include").
+    """
+
+    def __init__(self, app, seconds: int = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _pinned_to_primary.set(_has_primary_cookie(scope))
+        try:
+            if scope["method"] in SAFE_METHODS:
+                await self.app(scope, receive, send)
+                return
+
+            attributes = "Secure; SameSite=None" if _is_https(scope) else "SameSite=Lax"
+            cookie = f"{PRIMARY_COOKIE}=1; Max-Age={self.seconds}; Path=/; HttpOnly; {attributes}".encode()
+
+            async def send_with_cookie(message):
+                if message["type"] == "http.response.start" and message["status"] < 400:
+                    message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie)]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _pinned_to_primary.reset(token)
@@ -0,0 +1,229 @@
+"""
+Metrics Rollup
+Per-day counters in `metrics_rollup`, updated in the same transaction as the
+writes they describe so dashboards read a handful of rows instead of scanning
+the raw tables.
+
+Backfill or verify from the raw tables (run from backend/):
+    python -m app.database.rollup rebuild
+    python -m app.database.rollup check
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import select, func, case, cast, delete, insert, literal, Date, Numeric, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .dialect import upsert_for
+from .models import MetricsRollup, Contact, ChatConversation, ChatMessage, Payment, BlogPost
+
+ROLLUP_KEY = ("day", "metric", "status", "method")
+
+
+async def bump(
+    db: AsyncSession,
+    metric: str,
+    *,
+    day: date | None = None,
+    status: str = "",
+    method: str = "",
+    count: int = 1,
+    amount: Decimal | int = 0,
+) -> None:
+    """Atomically add count/amount to one rollup row, creating it if needed"""
+    upsert = upsert_for(db)(MetricsRollup).values(
+        day=day or datetime.utcnow().date(),
+        metric=metric,
+        status=status,
+        method=method,
+        count=count,
+        amount=amount,
+    )
+    upsert = upsert.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={
+            "count": MetricsRollup.count + upsert.excluded.count,
+            "amount": MetricsRollup.amount + upsert.excluded.amount,
+        },
+    )
+    await db.execute(upsert)
+
+
+async def record_payment_status(db: AsyncSession, payment, old_status: str) -> None:
+    """Move a payment between status buckets after `payment.status` changed"""
+    if payment.status == old_status:
+        return
+    day = payment.created_at.date()
+    await bump(db, "payments", day=day, status=old_status, method=payment.payment_method,
+               count=-1, amount=-payment.amount)
+    await bump(db, "payments", day=day, status=payment.status, method=payment.payment_method,
+               count=1, amount=payment.amount)
+
+
+async def record_chat_rating(db: AsyncSession, message, old_rating: int | None) -> None:
+    """Move a chat message between rating buckets after `message.rating` changed"""
+    if message.rating == old_rating:
+        return
+    day = message.created_at.date()
+    if old_rating is not None:
+        await bump(db, "chat_ratings", day=day, status=str(old_rating), count=-1)
+    await bump(db, "chat_ratings", day=day, status=str(message.rating))
+
+
+def blog_status(featured: bool) -> str:
+    """Rollup bucket for a blog post"""
+    return "featured" if featured else "draft"
+
+
+async def summarize(db: AsyncSession, metrics: list[str], since: date | None = None) -> dict:
+    """
+    Sum rollup rows per (metric, status, method).
+    Returns {key: {"count", "amount", "recent_count", "recent_amount"}} where
+    the recent_* figures only include days on or after `since`.
+    """
+    since = since or date.min
+    recent = MetricsRollup.day >= since
+    result = await db.execute(
+        select(
+            MetricsRollup.metric,
+            MetricsRollup.status,
+            MetricsRollup.method,
+            func.sum(MetricsRollup.count).label("count"),
+            func.sum(MetricsRollup.amount).label("amount"),
+            func.sum(case((recent, MetricsRollup.count), else_=0)).label("recent_count"),
+            func.sum(case((recent, MetricsRollup.amount), else_=0)).label("recent_amount"),
+        )
+        .where(MetricsRollup.metric.in_(metrics))
+        .group_by(MetricsRollup.metric, MetricsRollup.status, MetricsRollup.method)
+    )
+    return {
+        (row.metric, row.status, row.method): {
+            "count": row.count or 0,
+            "amount": row.amount or 0,
+            "recent_count": row.recent_count or 0,
+            "recent_amount": row.recent_amount or 0,
+        }
+        for row in result
+    }
+
+
+def total(summary: dict, metric: str, field: str = "count", status: str | None = None,
+          method: str | None = None):
+    """Add up one field of a summarize() result, optionally narrowed by status/method"""
+    return sum(
+        values[field]
+        for (row_metric, row_status, row_method), values in summary.items()
+        if row_metric == metric
+        and (status is None or row_status == status)
+        and (method is None or row_method == method)
+    )
+
+
+# Raw-table definition of every metric:
+# (model, timestamp, status expr, method expr, amount expr[, row filter])
+SOURCES = {
+    "contacts": (Contact, Contact.created_at, None, None, None),
+    "chats": (ChatMessage, ChatMessage.created_at, None, None, None),
+    # Conversations count once they hold a message (a summary can create the row first)
+    "chat_sessions": (
+        ChatConversation, ChatConversation.created_at, None, None, None, ChatConversation.message_count > 0,
+    ),
+    "chat_ratings": (
+        ChatMessage, ChatMessage.created_at, cast(ChatMessage.rating, String), None, None,
+        ChatMessage.rating.isnot(None),
+    ),
+    "payments": (Payment, Payment.created_at, Payment.status, Payment.payment_method, Payment.amount),
+    "blogs": (
+        BlogPost,
+        BlogPost.created_at,
+        case((BlogPost.featured == True, "featured"), else_="draft"),
+        None,
+        None,
+    ),
+}
+
+
+def raw_rollup_query(metric: str):
+    """Aggregate one raw table into rollup-shaped rows"""
+    model, created_at, status, method, amount, *where = SOURCES[metric]
+    day = func.date(created_at, type_=Date)
+    group_by = [day] + [expr for expr in (status, method) if expr is not None]
+    return select(
+        day.label("day"),
+        literal(metric, String).label("metric"),
+        (status if status is not None else literal("", String)).label("status"),
+        (method if method is not None else literal("", String)).label("method"),
+        func.count().label("count"),
+        func.coalesce(func.sum(amount), 0).label("amount") if amount is not None
+        else literal(0, Numeric).label("amount"),
+    ).select_from(model).where(*where).group_by(*group_by)
+
+
+async def rebuild(db: AsyncSession) -> int:
+    """Recompute the whole rollup table from the raw tables, returns rows written"""
+    await db.execute(delete(MetricsRollup))
+    for metric in SOURCES:
+        await db.execute(
+            insert(MetricsRollup).from_select(
+                [*ROLLUP_KEY, "count", "amount"], raw_rollup_query(metric)
+            )
+        )
+    await db.commit()
+    return await db.scalar(select(func.count()).select_from(MetricsRollup))
+
+
+async def check(db: AsyncSession, tolerance: float = 0.01) -> list[dict]:
+    """Compare rollup rows against the raw tables, returns the mismatching keys"""
+    expected = {}
+    for metric in SOURCES:
+        for row in (await db.execute(raw_rollup_query(metric))).mappings():
+            expected[tuple(row[k] for k in ROLLUP_KEY)] = (row["count"], float(row["amount"]))
+
+    actual = {}
+    for row in (await db.execute(select(MetricsRollup))).scalars():
+        if row.count or abs(row.amount) > tolerance:
+            actual[(row.day, row.metric, row.status, row.method)] = (row.count, float(row.amount))
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        want = expected.get(key, (0, 0.0))
+        got = actual.get(key, (0, 0.0))
+        if want[0] != got[0] or abs(want[1] - got[1]) > tolerance:
+            mismatches.append({
+                **dict(zip(ROLLUP_KEY, key)),
+                "expected_count": want[0],
+                "rollup_count": got[0],
+                "expected_amount": want[1],
+                "rollup_amount": got[1],
+            })
+    return mismatches
+
+
+async def main() -> int:
+    from .connection import AsyncSessionLocal, async_engine
+
+    parser = argparse.ArgumentParser(description="Maintain the metrics_rollup table")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            if args.command == "rebuild":
+                rows = await rebuild(db)
+                print(f"✓ metrics_rollup rebuilt ({rows} rows)")
+                return 0
+
+            mismatches = await check(db)
+            for m in mismatches:
+                print(f"  [MISMATCH] {m}")
+            print(f"{'✓' if not mismatches else '✗'} {len(mismatches)} mismatching rollup rows")
+            return 1 if mismatches else 0
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
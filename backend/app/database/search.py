@@ -0,0 +1,160 @@
+"""
+Blog Full-Text Search
+PostgreSQL: weighted tsvector expression index (GIN), queried with websearch_to_tsquery
+SQLite: external-content FTS5 table with an integer key per post, kept in sync by triggers
+
+Both indexes follow every insert/update/delete on blog_posts inside the
+database itself, so create_blog/update_blog/delete_blog need no extra code.
+"""
+
+import re
+from sqlalchemy import Uuid, inspect, select, text, func, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import BlogPost, Timestamp
+
+SEARCH_LANGUAGE = "english"
+SNIPPET_WORDS = 24
+
+# Must stay textually identical to the indexed expression so the planner uses the GIN index
+PG_SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(blog_posts.title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(blog_posts.content, '')), 'B')"
+)
+
+PG_DDL = [
+    f"CREATE INDEX IF NOT EXISTS idx_blog_search ON blog_posts USING gin (({PG_SEARCH_VECTOR}))",
+]
+
+# blog_posts has a UUID primary key, so its implicit rowid is no stable join key: VACUUM and
+# table rebuilds may renumber it. blog_posts_fts_keys gives every post an INTEGER PRIMARY KEY
+# (a rowid alias, never renumbered) that serves as the FTS rowid. The FTS table is external
+# content: it reads title/content back through blog_posts_fts_source instead of storing a
+# second copy, and the triggers address its entries by that rowid.
+SQLITE_DDL = [
+    """CREATE TABLE IF NOT EXISTS blog_posts_fts_keys (
+        doc_id INTEGER PRIMARY KEY, post_id CHAR(32) NOT NULL UNIQUE
+    )""",
+    """CREATE VIEW IF NOT EXISTS blog_posts_fts_source AS
+        SELECT k.doc_id, b.title, b.content
+        FROM blog_posts_fts_keys k JOIN blog_posts b ON b.id = k.post_id""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS blog_posts_fts USING fts5(
+        title, content, content='blog_posts_fts_source', content_rowid='doc_id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS blog_posts_fts_insert AFTER INSERT ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts_keys(post_id) VALUES (new.id);
+        INSERT INTO blog_posts_fts(rowid, title, content)
+        VALUES ((SELECT doc_id FROM blog_posts_fts_keys WHERE post_id = new.id), new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_posts_fts_delete AFTER DELETE ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, content)
+        VALUES ('delete', (SELECT doc_id FROM blog_posts_fts_keys WHERE post_id = old.id), old.title, old.content);
+        DELETE FROM blog_posts_fts_keys WHERE post_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_posts_fts_update AFTER UPDATE OF id, title, content ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, content)
+        VALUES ('delete', (SELECT doc_id FROM blog_posts_fts_keys WHERE post_id = old.id), old.title, old.content);
+        UPDATE blog_posts_fts_keys SET post_id = new.id WHERE post_id = old.id;
+        INSERT INTO blog_posts_fts(rowid, title, content)
+        VALUES ((SELECT doc_id FROM blog_posts_fts_keys WHERE post_id = new.id), new.title, new.content);
+    END""",
+]
+
+# Fills a freshly created blog_posts_fts from the posts already stored
+SQLITE_BACKFILL = [
+    "INSERT INTO blog_posts_fts_keys(post_id) SELECT id FROM blog_posts ORDER BY created_at, id",
+    "INSERT INTO blog_posts_fts(blog_posts_fts) VALUES ('rebuild')",
+]
+
+
+def install_search_index(connection) -> None:
+    """
+    Create the dialect's full-text index if missing (sync connection, use with run_sync).
+    A freshly created FTS5 table is backfilled from existing posts.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for statement in PG_DDL:
+            connection.execute(text(statement))
+    elif dialect == "sqlite":
+        existed = inspect(connection).has_table("blog_posts_fts")
+        for statement in SQLITE_DDL:
+            connection.execute(text(statement))
+        if not existed:
+            for statement in SQLITE_BACKFILL:
+                connection.execute(text(statement))
+
+
+def fts5_query(q: str) -> str:
+    """Turn free text into an FTS5 query of quoted terms (implicit AND, last term as prefix)"""
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+async def search_posts(db: AsyncSession, q: str, limit: int = 10, offset: int = 0) -> list[dict]:
+    """Published posts matching `q`, best match first, each with a highlighted snippet"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return await _search_postgresql(db, q, limit, offset)
+    if dialect == "sqlite":
+        return await _search_sqlite(db, q, limit, offset)
+    raise RuntimeError(f"Full-text search is not supported on '{dialect}'")
+
+
+async def _search_postgresql(db: AsyncSession, q: str, limit: int, offset: int) -> list[dict]:
+    vector = literal_column(PG_SEARCH_VECTOR)
+    query = func.websearch_to_tsquery(SEARCH_LANGUAGE, q)
+    rank = func.ts_rank_cd(vector, query).label("rank")
+
+    # Rank and page first; ts_headline is costly so it only runs on the page's rows
+    ranked = (
+        select(BlogPost.id, rank)
+        .where(vector.op("@@")(query), BlogPost.featured == True)
+        .order_by(rank.desc(), BlogPost.id)
+        .limit(limit)
+        .offset(offset)
+        .subquery()
+    )
+    snippet = func.ts_headline(
+        SEARCH_LANGUAGE,
+        BlogPost.content,
+        query,
+        f"StartSel=<mark>, StopSel=</mark>, MaxWords={SNIPPET_WORDS}, MinWords=8, MaxFragments=2",
+    ).label("snippet")
+    result = await db.execute(
+        select(
+            BlogPost.id, BlogPost.title, BlogPost.slug, BlogPost.author,
+            BlogPost.created_at, BlogPost.updated_at, snippet, ranked.c.rank,
+        )
+        .join(ranked, ranked.c.id == BlogPost.id)
+        .order_by(ranked.c.rank.desc(), BlogPost.id)
+    )
+    return [dict(row) for row in result.mappings()]
+
+
+async def _search_sqlite(db: AsyncSession, q: str, limit: int, offset: int) -> list[dict]:
+    match = fts5_query(q)
+    if not match:
+        return []
+    # bm25() is lower-is-better; title matches weigh 10x body matches
+    result = await db.execute(
+        text(
+            f"""
+            SELECT b.id, b.title, b.slug, b.author, b.created_at, b.updated_at,
+                   snippet(blog_posts_fts, 1, '<mark>', '</mark>', '…', {SNIPPET_WORDS}) AS snippet,
+                   -bm25(blog_posts_fts, 10.0, 1.0) AS rank
+            FROM blog_posts_fts
+            JOIN blog_posts_fts_keys k ON k.doc_id = blog_posts_fts.rowid
+            JOIN blog_posts b ON b.id = k.post_id
+            WHERE blog_posts_fts MATCH :match AND b.featured = 1
+            ORDER BY bm25(blog_posts_fts, 10.0, 1.0), b.id
+            LIMIT :limit OFFSET :offset
+            """
+        ).columns(id=Uuid, created_at=Timestamp, updated_at=Timestamp),
+        {"match": match, "limit": limit, "offset": offset},
+    )
+    return [dict(row) for row in result.mappings()]
@@ -0,0 +1,132 @@
+"""
+Payment Webhook Queue
+Provider notifications land in payment_webhook_events and are applied to
+payments later, in batches, by services/webhook_worker.py.
+
+Webhooks are unauthenticated, so an event is only a trigger: the worker
+asks the provider about the payment and applies the status the provider
+confirms, never the one the notification claims.
+
+Each transition happens exactly once:
+- a redelivered event (same provider + event id) is dropped on insert;
+- a batch is claimed with FOR UPDATE SKIP LOCKED, so concurrent workers
+  never apply the same events;
+- payments move through payment_store.apply_transitions, which only
+  matches rows still in the transition's source status, so a repeated or
+  out-of-order event changes nothing;
+- payment updates, rollup counts and marking the events processed commit
+  in one transaction, so a crash leaves the whole batch queued.
+
+Processed rows are kept as the audit log and the deduplication record.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .dialect import upsert_for
+from .models import Payment, PaymentWebhookEvent
+from .payment_store import TRANSITIONS, apply_transitions
+
+
+async def enqueue(db: AsyncSession, provider: str, event_id: str, transaction_id: str,
+                  status: str | None, payload: str) -> bool:
+    """Queue one notification, returns False when the event was already received. The caller commits."""
+    insert = upsert_for(db)(PaymentWebhookEvent).values(
+        provider=provider,
+        event_id=event_id,
+        transaction_id=transaction_id,
+        status=status,
+        payload=payload,
+        received_at=datetime.utcnow(),
+    )
+    insert = insert.on_conflict_do_nothing(index_elements=["provider", "event_id"])
+    return (await db.execute(insert.returning(PaymentWebhookEvent.id))).first() is not None
+
+
+async def pending_events(db: AsyncSession, limit: int) -> list:
+    """Up to `limit` queued events, oldest first, with the amount of the payment each one is about"""
+    return (await db.execute(
+        select(PaymentWebhookEvent.id, PaymentWebhookEvent.provider, PaymentWebhookEvent.transaction_id,
+               PaymentWebhookEvent.received_at, Payment.amount)
+        .outerjoin(Payment, (Payment.transaction_id == PaymentWebhookEvent.transaction_id)
+                   & (Payment.payment_method == PaymentWebhookEvent.provider))
+        .where(PaymentWebhookEvent.processed_at.is_(None))
+        .order_by(PaymentWebhookEvent.id)
+        .limit(limit)
+    )).all()
+
+
+async def apply_verified(db: AsyncSession, events: list, verdicts: dict[str, str | None]) -> dict:
+    """
+    Claim `events` (from pending_events), apply the statuses the provider
+    confirmed and mark the events processed. The caller commits.
+    `verdicts` maps transaction ids to the provider's status, or None when
+    the provider did not confirm the payment; transactions missing from it
+    could not be asked and their events stay queued.
+    Returns counts and the queueing lag of the batch.
+    """
+    claimed = set((await db.execute(
+        select(PaymentWebhookEvent.id)
+        .where(PaymentWebhookEvent.id.in_([event.id for event in events]),
+               PaymentWebhookEvent.processed_at.is_(None))
+        .with_for_update(skip_locked=True)
+    )).scalars())
+    events = [event for event in events if event.id in claimed and event.transaction_id in verdicts]
+    if not events:
+        return {"events": 0, "applied": 0, "skipped": 0, "unverified": 0, "max_lag_seconds": 0.0}
+
+    wanted = defaultdict(set)
+    for transaction_id in {event.transaction_id for event in events}:
+        status = verdicts[transaction_id]
+        if status in TRANSITIONS:
+            wanted[status].add(transaction_id)
+        if status == "refunded":
+            # Paid and refunded before the event was processed: record both steps
+            wanted["completed"].add(transaction_id)
+    changed = {transaction_id for transaction_id, _ in await apply_transitions(db, wanted)}
+
+    # The first event behind each change gets the credit; the rest changed nothing
+    outcomes = {"applied": [], "skipped": [], "unverified": []}
+    for event in events:
+        if verdicts[event.transaction_id] is None:
+            outcomes["unverified"].append(event.id)
+        elif event.transaction_id in changed:
+            changed.discard(event.transaction_id)
+            outcomes["applied"].append(event.id)
+        else:
+            outcomes["skipped"].append(event.id)
+
+    now = datetime.utcnow()
+    for outcome, ids in outcomes.items():
+        if ids:
+            await db.execute(
+                update(PaymentWebhookEvent)
+                .where(PaymentWebhookEvent.id.in_(ids))
+                .values(processed_at=now, outcome=outcome)
+                .execution_options(synchronize_session=False)
+            )
+
+    return {
+        "events": len(events),
+        **{outcome: len(ids) for outcome, ids in outcomes.items()},
+        "max_lag_seconds": max((now - event.received_at).total_seconds() for event in events),
+    }
+
+
+async def queue_stats(db: AsyncSession) -> dict:
+    """Events waiting and the age of the oldest one"""
+    depth = await db.scalar(
+        select(func.count()).select_from(PaymentWebhookEvent).where(PaymentWebhookEvent.processed_at.is_(None))
+    )
+    oldest = await db.scalar(
+        select(PaymentWebhookEvent.received_at)
+        .where(PaymentWebhookEvent.processed_at.is_(None))
+        .order_by(PaymentWebhookEvent.id)
+        .limit(1)
+    )
+    return {
+        "depth": depth,
+        "oldest_age_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0,
+    }
@@ -9,22 +9,40 @@ import os
 from contextlib import asynccontextmanager
 
 from .routers import auth, blog, payment, ai, contact, dashboard
-from .database.connection import engine, Base
-
-# Initialize database tables
-def init_db():
-    """Create all database tables"""
-    Base.metadata.create_all(bind=engine)
+from .database.connection import async_engine, replicas
+from .database.replicas import ReadYourWritesMiddleware
+from .services.chat_writer import chat_writer, CHAT_WRITE_BEHIND
+from .services.llm import llm
+from .services.payment_gateways import payment_http
+from .services.payment_reconciler import payment_reconciler, PAYMENT_RECONCILE_ENABLED
+from .services.webhook_worker import webhook_worker
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan context manager"""
-    # Startup: Initialize database
-    init_db()
-    print("✓ Database initialized")
+    # Startup: the schema is managed by Alembic (`alembic upgrade head` runs as a deploy step),
+    # so workers neither create nor reflect tables here
+    if CHAT_WRITE_BEHIND:
+        await chat_writer.start()
+        print("✓ Chat write-behind enabled")
+    await webhook_worker.start()
+    if PAYMENT_RECONCILE_ENABLED:
+        await payment_reconciler.start()
+        print("✓ Pending payment reconciliation enabled")
+    if replicas:
+        await replicas.start()
+        print(f"✓ Routing reads to {len(replicas.engines)} replica(s)")
     yield
-    # Shutdown: Cleanup if needed
+    # Shutdown: Flush queued chat records, stop the webhook worker and reconciler (both resume from the database),
+    # then release pooled database, LLM and payment provider connections
+    await chat_writer.stop()
+    await webhook_worker.stop()
+    await payment_reconciler.stop()
+    await llm.aclose()
+    await payment_http.aclose()
+    await replicas.stop()
+    await async_engine.dispose()
     print("✓ Application shutdown")
 
 
@@ -47,6 +65,10 @@ app.add_middleware(
     allow_origin_regex="http?://.*:.*"
 )
 
+# Pin a client's reads to the primary briefly after it writes (only matters with replicas)
+if replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(blog.router)
@@ -70,8 +92,11 @@ def home():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {
+    health = {
         "status": "healthy",
         "service": "himalayan-ai-backend",
         "environment": os.getenv("ENVIRONMENT", "development")
     }
+    if replicas:
+        health["database_replicas"] = replicas.status()
+    return health
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import Optional
+from uuid import UUID
 
 # Auth Models
 class AdminLogin(BaseModel):
@@ -25,7 +26,7 @@ class BlogUpdate(BaseModel):
     featured: Optional[bool] = None
 
 class Blog(BaseModel):
-    id: str
+    id: UUID
     title: str
     content: str
     slug: str
@@ -34,6 +35,36 @@ class Blog(BaseModel):
     updated_at: datetime
     author: str
 
+class BlogSummary(BaseModel):
+    id: UUID
+    title: str
+    excerpt: str
+    slug: str
+    featured: bool
+    created_at: datetime
+    updated_at: datetime
+    author: str
+
+class BlogPage(BaseModel):
+    blogs: list[Blog | BlogSummary]
+    next_cursor: Optional[str] = None
+
+class BlogSearchResult(BaseModel):
+    id: UUID
+    title: str
+    slug: str
+    author: str
+    snippet: str
+    rank: float
+    created_at: datetime
+    updated_at: datetime
+
+class BlogSearchPage(BaseModel):
+    query: str
+    results: list[BlogSearchResult]
+    limit: int
+    offset: int
+
 # Contact Models (enhanced)
 class ContactRequest(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
@@ -45,7 +76,7 @@ class ContactRequest(BaseModel):
 class ContactResponse(BaseModel):
     status: str
     message: str
-    id: str
+    id: UUID
     created_at: datetime
 
 # Payment Models
@@ -65,7 +96,7 @@ class PaymentResponse(BaseModel):
 # AI Chat Models
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, max_length=1000)
-    session_id: Optional[str] = None
+    session_id: Optional[str] = Field(None, max_length=64)
 
 class ChatResponse(BaseModel):
     reply: str
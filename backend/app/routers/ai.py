@@ -4,115 +4,231 @@ Handles AI chatbot interactions with conversation history persistence
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import AsyncIterator
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import json
+import logging
+import re
 import uuid
 import os
 
+from .auth import verify_token
 from ..models import ChatRequest, ChatResponse
-from ..database.connection import get_db
-from ..database.models import ChatSession as ChatSessionModel
+from ..database.connection import AsyncSessionLocal, get_async_db, get_read_db
+from ..database.chat_store import save_exchanges
+from ..database.ids import uuid7
+from ..database.models import ChatConversation, ChatMessage
+from ..database.rollup import record_chat_rating, summarize, total
+from ..services.chat_context import SessionContext, chat_contexts
+from ..services.chat_writer import chat_writer
+from ..services.intents import INTENT_MIN_CONFIDENCE, intent_matcher
+from ..services.llm import LLMError, llm
+from ..services.reply_cache import ReplyCache
 
 router = APIRouter(prefix="/ai")
 
-# LLM Configuration
-LLM_API_KEY = os.getenv("OPENAI_API_KEY", "")
-LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+# Provider settings live in services/llm.py
+SYSTEM_PROMPT = os.getenv(
+    "LLM_SYSTEM_PROMPT",
+    "You are the Himalayan AI Tech Pro assistant. Answer questions about our custom AI "
+    "applications, automation services, pricing and delivery concisely and helpfully.",
+)
 
+# Replies to common questions are served from memory instead of the LLM
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "true").lower() == "true"
+reply_cache = ReplyCache(
+    max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "2048")),
+    max_bytes=int(os.getenv("CHAT_CACHE_MAX_BYTES", str(4 * 1024 * 1024))),
+    ttl=float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600")),
+    similarity=float(os.getenv("CHAT_CACHE_SIMILARITY", "0.9")),
+)
 
-def get_ai_response(message: str) -> str:
+logger = logging.getLogger(__name__)
+
+
+async def stream_ai_response(message: str, context: SessionContext | None = None) -> AsyncIterator[str]:
     """
-    Get AI response
-    Currently a placeholder - integrate with OpenAI/other LLM in production
+    Yield the AI reply incrementally as text chunks. Tiers, cheapest first:
+    confident intent match, reply cache, then the LLM provider with the
+    session's context window. Cached replies are context-free, so the reply
+    cache only serves and stores the first turn of a session.
     """
-    # TODO: Integrate with actual LLM API
-    # import openai
-    # openai.api_key = LLM_API_KEY
-    # response = openai.ChatCompletion.create(
-    #     model=LLM_MODEL,
-    #     messages=[{"role": "user", "content": message}]
-    # )
-    # return response.choices[0].message.content
-    
-    # Mock responses for MVP
-    message_lower = message.lower()
-    
-    if any(word in message_lower for word in ["hello", "hi", "hey"]):
-        return "Hello! 👋 I'm your Himalayan AI assistant. How can I help you today? Ask me about custom AI applications, automation, or our services!"
-    
-    if any(word in message_lower for word in ["price", "cost", "pricing"]):
-        return "We offer custom pricing based on your project requirements. For a free consultation and quote, please contact us through the form on our website!"
-    
-    if any(word in message_lower for word in ["service", "ai", "custom", "build"]):
-        return "We specialize in custom AI applications, business automation, and intelligent agents. Perfect for scaling your business! Would you like more details?"
-    
-    if any(word in message_lower for word in ["fast", "quick", "time"]):
-        return "We pride ourselves on quick turnaround - typically 4 days for MVP development. Rush projects welcome!"
-    
-    if any(word in message_lower for word in ["contact", "email", "phone"]):
-        return "You can reach us through the contact form on our website, or fill it out to get in touch. We respond within 24 hours!"
+    cacheable = CHAT_CACHE_ENABLED and not (context and context.has_history)
+    canned = None
+    match = intent_matcher.match(message)
+    if match is not None and match.confidence >= INTENT_MIN_CONFIDENCE:
+        canned = match.reply
+    elif cacheable:
+        canned = reply_cache.lookup(message)
+    if canned is not None:
+        for chunk in re.findall(r"\S+\s*", canned):
+            yield chunk
+        return
+
+    messages = chat_contexts.build_messages(SYSTEM_PROMPT, context, message)
+    parts = []
+    async for chunk in llm.stream(messages):
+        parts.append(chunk)
+        yield chunk
+    # Only complete replies are cached; an abandoned stream never reaches this point
+    if cacheable:
+        reply_cache.store(message, "".join(parts))
+
+
+async def get_ai_response(message: str, context: SessionContext | None = None) -> str:
+    """Get the complete AI reply (drains stream_ai_response)"""
+    return "".join([chunk async for chunk in stream_ai_response(message, context)])
+
+
+def validate_message(message: str) -> None:
+    if not message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
     
-    return f"That's an interesting question! Regarding '{message}' - I'd recommend contacting our team directly for the most accurate information. We'd love to discuss your specific needs!"
+    if len(message) > 5000:
+        raise HTTPException(status_code=400, detail="Message too long (max 5000 characters)")
+
+
+def chat_record(session_id: str, message: str, reply: str) -> dict:
+    # Timestamp is generated here so no refresh round-trip is needed
+    return {
+        "id": uuid7(),
+        "session_id": session_id,
+        "user_message": message,
+        "ai_reply": reply,
+        "created_at": datetime.utcnow(),
+    }
+
+
+async def save_chat(db: AsyncSession, record: dict) -> None:
+    """Persist one exchange, via the write-behind queue when it is running"""
+    if chat_writer.running:
+        # Write-behind: persisted by the background flusher in bulk
+        await chat_writer.submit(record)
+    else:
+        await save_exchanges(db, [record])
+        await db.commit()
+
+
+def sse_event(data: dict, event: str | None = None) -> str:
+    """Format one Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return f"{frame}data: {json.dumps(data)}\n\n"
 
 
 @router.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat(request: ChatRequest, db: AsyncSession = Depends(get_async_db)):
     """
     AI Chat endpoint
     Accepts user messages and returns AI responses with persistent history
     """
     try:
-        if not request.message.strip():
-            raise HTTPException(status_code=400, detail="Message cannot be empty")
-        
-        if len(request.message) > 5000:
-            raise HTTPException(status_code=400, detail="Message too long (max 5000 characters)")
-        
-        # Get AI response
-        reply = get_ai_response(request.message)
+        validate_message(request.message)
         
         # Create session ID if not provided
         session_id = request.session_id or str(uuid.uuid4())
+        context = await chat_contexts.get(db, session_id, new=request.session_id is None)
         
-        # Store chat record in database
-        chat_record = ChatSessionModel(
-            id=str(uuid.uuid4()),
-            session_id=session_id,
-            user_message=request.message,
-            ai_reply=reply,
-            user_info="user"
-        )
+        # Get AI response
+        reply = await get_ai_response(request.message, context)
         
-        db.add(chat_record)
-        db.commit()
-        db.refresh(chat_record)
+        record = chat_record(session_id, request.message, reply)
+        await save_chat(db, record)
+        await chat_contexts.record(db, context, request.message, reply, record["created_at"])
         
         return ChatResponse(
             reply=reply,
             session_id=session_id,
-            timestamp=chat_record.created_at
+            timestamp=record["created_at"]
         )
     
     except HTTPException:
         raise
+    except LLMError as e:
+        raise HTTPException(status_code=503, detail=f"AI service unavailable: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Streaming AI Chat endpoint (Server-Sent Events)
+    Emits a `session` event, one `data` frame per token and a final `done` event.
+    The exchange is stored once the reply is complete; if the client disconnects
+    mid-stream the generation is cancelled and the partial reply is discarded.
+    """
+    validate_message(request.message)
+    session_id = request.session_id or str(uuid.uuid4())
+    # History is read while the request-scoped session is still open
+    context = await chat_contexts.get(db, session_id, new=request.session_id is None)
+
+    async def events() -> AsyncIterator[str]:
+        yield sse_event({"session_id": session_id}, event="session")
+        parts = []
+        try:
+            async for chunk in stream_ai_response(request.message, context):
+                parts.append(chunk)
+                yield sse_event({"token": chunk})
+        except asyncio.CancelledError:
+            # Starlette cancels the body when the client goes away
+            logger.info("Chat stream %s cancelled by client after %d chunks", session_id, len(parts))
+            raise
+        except LLMError as e:
+            logger.warning("Chat stream %s failed: %s", session_id, e)
+            yield sse_event({"detail": "AI service unavailable"}, event="error")
+            return
+        except Exception:
+            logger.exception("Chat stream %s failed", session_id)
+            yield sse_event({"detail": "Chat error"}, event="error")
+            return
+
+        record = chat_record(session_id, request.message, "".join(parts))
+        try:
+            # Request-scoped sessions are closed before the body runs, so open our own
+            async with AsyncSessionLocal() as session:
+                await save_chat(session, record)
+                await chat_contexts.record(session, context, request.message, record["ai_reply"],
+                                           record["created_at"])
+        except Exception:
+            logger.exception("Failed to store chat stream %s", session_id)
+            yield sse_event({"detail": "Failed to store chat"}, event="error")
+            return
+        yield sse_event(
+            {"id": str(record["id"]), "session_id": session_id, "timestamp": record["created_at"].isoformat()},
+            event="done",
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the client as they are produced
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/chat/history/{session_id}")
-def get_chat_history(session_id: str, limit: int = 50, db: Session = Depends(get_db)):
+async def get_chat_history(session_id: str, limit: int = 50, db: AsyncSession = Depends(get_read_db)):
     """Get chat history for a session"""
-    history = db.query(ChatSessionModel).filter(
-        ChatSessionModel.session_id == session_id
-    ).order_by(ChatSessionModel.created_at).limit(limit).all()
+    result = await db.execute(
+        select(ChatMessage.id, ChatMessage.user_message, ChatMessage.ai_reply, ChatMessage.created_at)
+        .join(ChatConversation, ChatConversation.id == ChatMessage.conversation_id)
+        .where(ChatConversation.session_key == session_id)
+        .order_by(ChatMessage.created_at)
+        .limit(limit)
+    )
+    history = result.all()
     
     return {
         "session_id": session_id,
         "total_messages": len(history),
         "messages": [
             {
-                "id": h.id,
+                "id": str(h.id),
                 "user_message": h.user_message,
                 "ai_reply": h.ai_reply,
                 "created_at": h.created_at.isoformat(),
@@ -122,31 +238,70 @@ def get_chat_history(session_id: str, limit: int = 50, db: Session = Depends(get
     }
 
 @router.get("/stats")
-def ai_stats():
-    """Get AI chat statistics"""
-    unique_sessions = len(set(c.get("session_id") for c in chat_sessions))
+async def ai_stats(db: AsyncSession = Depends(get_read_db)):
+    """Get AI chat statistics (read from the metrics rollup, cost independent of chat volume)"""
+    summary = await summarize(db, ["chats", "chat_sessions", "chat_ratings"])
+    total_messages = total(summary, "chats")
+    unique_sessions = total(summary, "chat_sessions")
+    distribution = {str(r): total(summary, "chat_ratings", status=str(r)) for r in range(1, 6)}
+    rated = sum(distribution.values())
     return {
-        "total_messages": len(chat_sessions),
+        "total_messages": total_messages,
         "unique_sessions": unique_sessions,
-        "average_messages_per_session": len(chat_sessions) / max(unique_sessions, 1)
+        "average_messages_per_session": round(total_messages / max(unique_sessions, 1), 2),
+        "rated_messages": rated,
+        "average_rating": round(sum(int(r) * n for r, n in distribution.items()) / rated, 2) if rated else None,
+        "rating_distribution": distribution,
     }
 
 @router.post("/chat/feedback")
-def chat_feedback(session_id: str, message_id: str, rating: int):
+async def chat_feedback(session_id: str, message_id: str, rating: int, db: AsyncSession = Depends(get_async_db)):
     """Record user feedback on AI response"""
+    if rating not in [1, 2, 3, 4, 5]:
+        raise HTTPException(status_code=400, detail="Rating must be 1-5")
     try:
-        if rating not in [1, 2, 3, 4, 5]:
-            raise HTTPException(status_code=400, detail="Rating must be 1-5")
-        
-        chat = next((c for c in chat_sessions if c.get("id") == message_id), None)
+        message_uuid = uuid.UUID(message_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Message not found")
+    
+    try:
+        # Row lock so concurrent ratings of one message move the counters once each
+        chat = (await db.execute(
+            select(ChatMessage)
+            .join(ChatConversation, ChatConversation.id == ChatMessage.conversation_id)
+            .where(ChatMessage.id == message_uuid, ChatConversation.session_key == session_id)
+            .with_for_update(of=ChatMessage)
+        )).scalar_one_or_none()
         if not chat:
             raise HTTPException(status_code=404, detail="Message not found")
         
-        chat["user_rating"] = rating
-        chat["feedback_at"] = datetime.utcnow().isoformat()
+        old_rating = chat.rating
+        chat.rating = rating
+        chat.rated_at = datetime.utcnow()
+        await record_chat_rating(db, chat, old_rating)
+        await db.commit()
         
         return {"status": "success", "message": "Feedback recorded"}
     except HTTPException:
         raise
     except Exception as e:
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/cache/stats")
+async def reply_cache_stats(username: str = Depends(verify_token)):
+    """Hit/miss counters for the chat reply cache (admin only)"""
+    return reply_cache.stats()
+
+
+@router.get("/writer/stats")
+async def chat_writer_stats(username: str = Depends(verify_token)):
+    """Queue depth and flush/drop counters for the chat write-behind queue (admin only)"""
+    return chat_writer.stats()
+
+
+@router.get("/context/stats")
+async def chat_context_stats(username: str = Depends(verify_token)):
+    """Context window cache counters and history reloads from the database (admin only)"""
+    return chat_contexts.stats()
@@ -3,16 +3,29 @@ Blog Router
 Manages blog posts with database persistence
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from datetime import datetime
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+import json
 import uuid
+import os
 import re
+import time
 
-from ..models import Blog, BlogCreate, BlogUpdate
-from ..database.connection import get_db
+from .auth import verify_token
+from ..models import Blog, BlogCreate, BlogUpdate, BlogSummary, BlogPage, BlogSearchPage
+from ..database.connection import get_async_db, get_read_db, reads_from_replica
 from ..database.models import BlogPost as BlogPostModel
+from ..database.pagination import encode_cursor, decode_cursor, seek_after
+from ..database.replicas import REPLICA_MAX_LAG_SECONDS
+from ..database.rollup import bump, blog_status, summarize, total
+from ..database.search import search_posts
+from ..services.cache import TTLCache
+from ..services.conditional import (
+    make_etag, has_conditions, is_not_modified, not_modified, validator_headers
+)
 
 def slugify(text: str) -> str:
     """Convert text to URL-friendly slug"""
@@ -24,33 +37,211 @@ def slugify(text: str) -> str:
 
 router = APIRouter(prefix="/blog")
 
+# Cache for public reads; entries are tagged so writes drop exactly what they affect
+blog_cache = TTLCache(
+    max_entries=int(os.getenv("BLOG_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("BLOG_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+    ttl=float(os.getenv("BLOG_CACHE_TTL_SECONDS", "60")),
+)
+LIST_TAG = "blog:list"
+STATS_TAG = "blog:stats"
 
-@router.get("/", response_model=list[Blog])
-def get_all_blogs(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    """Get all published blogs"""
-    posts = db.query(BlogPostModel).filter(BlogPostModel.featured == True).offset(skip).limit(limit).all()
-    return [
-        Blog(
-            id=p.id,
-            title=p.title,
-            content=p.content,
-            slug=p.slug,
-            featured=p.featured,
-            created_at=p.created_at,
-            updated_at=p.updated_at,
-            author=p.author
-        )
-        for p in posts
-    ]
+
+# When each tag was last invalidated; a replica may not have replayed that write yet
+_invalidated_at: dict[str, float] = {}
+
+
+def blog_tag(blog_id: uuid.UUID) -> str:
+    """Cache tag for everything rendered from a single post"""
+    return f"blog:{blog_id}"
+
+
+def invalidate(*tags: str) -> None:
+    """Drop cached reads for the tags after a committed write"""
+    now = time.monotonic()
+    for tag, at in list(_invalidated_at.items()):
+        if now - at >= REPLICA_MAX_LAG_SECONDS:
+            del _invalidated_at[tag]
+    _invalidated_at.update(dict.fromkeys(tags, now))
+    blog_cache.invalidate(*tags)
+
+
+def cache_store(db: AsyncSession, key: str, value, tag: str, size: Optional[int] = None) -> None:
+    """
+    Cache a freshly rendered read. A replica read within REPLICA_MAX_LAG_SECONDS
+    of the tag's last invalidation may predate that write, so it is served but
+    not cached; the next read from the primary or after the window refills it.
+    """
+    invalidated_at = _invalidated_at.get(tag)
+    if invalidated_at is not None and reads_from_replica(db) \
+            and time.monotonic() - invalidated_at < REPLICA_MAX_LAG_SECONDS:
+        return
+    blog_cache.set(key, value, tags=(tag,), size=size)
+
+
+def json_response(body: bytes, headers: Optional[dict] = None) -> Response:
+    """Wrap an already-serialized JSON body"""
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Listing order, matching idx_blog_listing; id breaks created_at ties
+BLOG_ORDER = [
+    (BlogPostModel.featured, True),
+    (BlogPostModel.created_at, True),
+    (BlogPostModel.id, True),
+]
+EXCERPT_LENGTH = 280
+
+# Summary projection: every column except the article body
+SUMMARY_COLUMNS = (
+    BlogPostModel.id,
+    BlogPostModel.title,
+    func.substr(BlogPostModel.content, 1, EXCERPT_LENGTH).label("excerpt"),
+    BlogPostModel.slug,
+    BlogPostModel.featured,
+    BlogPostModel.created_at,
+    BlogPostModel.updated_at,
+    BlogPostModel.author,
+)
+
+
+def listing_query(columns, after: Optional[tuple], limit: int):
+    """Published posts after the cursor position, one extra row to detect more pages"""
+    query = select(*columns).where(BlogPostModel.featured == True)
+    if after:
+        query = query.where(seek_after(BLOG_ORDER, after))
+    return query.order_by(*(column.desc() for column, _ in BLOG_ORDER)).limit(limit + 1)
+
+
+def listing_etag(view: str, limit: int, cursor: Optional[str], rows) -> str:
+    """
+    Page validator from the (id, updated_at) of every post on the page.
+    Lists carry no Last-Modified: a deleted post changes the page without
+    bumping any remaining updated_at, which only the ETag notices.
+    """
+    has_more = len(rows) > limit
+    versions = (f"{r.id}@{r.updated_at.isoformat()}" for r in rows[:limit])
+    return make_etag("blog:list", view, limit, cursor, has_more, *versions)
+
+
+@router.get("/", response_model=BlogPage)
+async def get_all_blogs(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    view: Literal["summary", "full"] = "summary",
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get published blogs newest first
+    `view=summary` returns an excerpt instead of the full content; pass the
+    returned next_cursor back as `cursor` to fetch the following page.
+    Honours If-None-Match with a 304.
+    """
+    cache_key = TTLCache.make_key("blog:list", cursor=cursor, limit=limit, view=view)
+    cached = blog_cache.get(cache_key)
+    if cached is not None:
+        body, etag, _ = cached
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        return json_response(body, validator_headers(etag))
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, bool, datetime, uuid.UUID)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Revalidation only needs (id, updated_at) per row, never the article bodies
+    if has_conditions(request):
+        validators = (await db.execute(
+            listing_query((BlogPostModel.id, BlogPostModel.updated_at), after, limit)
+        )).all()
+        etag = listing_etag(view, limit, cursor, validators)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+    
+    columns = SUMMARY_COLUMNS if view == "summary" else (BlogPostModel,)
+    result = await db.execute(listing_query(columns, after, limit))
+    rows = result.all() if view == "summary" else result.scalars().all()
+    etag = listing_etag(view, limit, cursor, rows)
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if rows else None
+    
+    if view == "summary":
+        blogs = [BlogSummary(**row._mapping) for row in rows]
+    else:
+        blogs = [
+            Blog(
+                id=p.id,
+                title=p.title,
+                content=p.content,
+                slug=p.slug,
+                featured=p.featured,
+                created_at=p.created_at,
+                updated_at=p.updated_at,
+                author=p.author
+            )
+            for p in rows
+        ]
+    
+    page = BlogPage(
+        blogs=blogs,
+        next_cursor=encode_cursor(last.featured, last.created_at, last.id) if has_more else None
+    )
+    body = page.model_dump_json().encode()
+    cache_store(db, cache_key, (body, etag, None), LIST_TAG, size=len(body))
+    return json_response(body, validator_headers(etag))
+
+
+@router.get("/search", response_model=BlogSearchPage)
+async def search_blogs(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Full-text search over published posts, ranked with highlighted snippets"""
+    results = await search_posts(db, q, limit=limit, offset=offset)
+    return BlogSearchPage(query=q, results=results, limit=limit, offset=offset)
+
+
+def blog_etag(blog_id: uuid.UUID, updated_at: datetime) -> str:
+    """Strong validator for a single post"""
+    return make_etag(blog_id, updated_at.isoformat())
 
 
 @router.get("/{blog_id}", response_model=Blog)
-def get_blog(blog_id: str, db: Session = Depends(get_db)):
-    """Get single blog by ID"""
-    blog = db.query(BlogPostModel).filter(BlogPostModel.id == blog_id).first()
+async def get_blog(request: Request, blog_id: uuid.UUID, db: AsyncSession = Depends(get_read_db)):
+    """
+    Get single blog by ID
+    Honours If-None-Match / If-Modified-Since with a 304
+    """
+    cache_key = TTLCache.make_key("blog:get", id=blog_id)
+    cached = blog_cache.get(cache_key)
+    if cached is not None:
+        body, etag, updated_at = cached
+        if is_not_modified(request, etag, updated_at):
+            return not_modified(etag, updated_at)
+        return json_response(body, validator_headers(etag, updated_at))
+    
+    # Revalidate from (id, updated_at) alone, served by idx_blog_validator
+    if has_conditions(request):
+        updated_at = await db.scalar(
+            select(BlogPostModel.updated_at).where(BlogPostModel.id == blog_id)
+        )
+        if updated_at is None:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        etag = blog_etag(blog_id, updated_at)
+        if is_not_modified(request, etag, updated_at):
+            return not_modified(etag, updated_at)
+    
+    blog = await db.get(BlogPostModel, blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
-    return Blog(
+    body = Blog(
         id=blog.id,
         title=blog.title,
         content=blog.content,
@@ -59,23 +250,24 @@ def get_blog(blog_id: str, db: Session = Depends(get_db)):
         created_at=blog.created_at,
         updated_at=blog.updated_at,
         author=blog.author
-    )
+    ).model_dump_json().encode()
+    etag = blog_etag(blog.id, blog.updated_at)
+    cache_store(db, cache_key, (body, etag, blog.updated_at), blog_tag(blog_id), size=len(body))
+    return json_response(body, validator_headers(etag, blog.updated_at))
 
 
 @router.post("/", response_model=Blog)
-def create_blog(blog_data: BlogCreate, db: Session = Depends(get_db)):
+async def create_blog(blog_data: BlogCreate, db: AsyncSession = Depends(get_async_db)):
     """Create new blog post"""
     try:
-        blog_id = str(uuid.uuid4())
         slug = blog_data.slug or slugify(blog_data.title)
         
         # Check if slug already exists
-        existing = db.query(BlogPostModel).filter(BlogPostModel.slug == slug).first()
+        existing = await db.scalar(select(BlogPostModel.id).where(BlogPostModel.slug == slug))
         if existing:
             raise HTTPException(status_code=400, detail="Slug already exists")
         
         db_blog = BlogPostModel(
-            id=blog_id,
             title=blog_data.title,
             slug=slug,
             content=blog_data.content,
@@ -84,8 +276,12 @@ def create_blog(blog_data: BlogCreate, db: Session = Depends(get_db)):
         )
         
         db.add(db_blog)
-        db.commit()
-        db.refresh(db_blog)
+        await bump(db, "blogs", status=blog_status(blog_data.featured))
+        await db.commit()
+        await db.refresh(db_blog)
+        
+        # A new draft only changes the counts; a featured post also joins the listing
+        invalidate(STATS_TAG, *((LIST_TAG,) if db_blog.featured else ()))
         
         return Blog(
             id=db_blog.id,
@@ -100,27 +296,40 @@ def create_blog(blog_data: BlogCreate, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=f"Failed to create blog: {str(e)}")
 
 
 @router.put("/{blog_id}", response_model=Blog)
-def update_blog(blog_id: str, blog_data: BlogUpdate, db: Session = Depends(get_db)):
+async def update_blog(blog_id: uuid.UUID, blog_data: BlogUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update blog post"""
-    blog = db.query(BlogPostModel).filter(BlogPostModel.id == blog_id).first()
+    blog = await db.get(BlogPostModel, blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
     
+    was_featured = blog.featured
     try:
         if blog_data.title is not None:
             blog.title = blog_data.title
         if blog_data.content is not None:
             blog.content = blog_data.content
-        if blog_data.featured is not None:
+        if blog_data.featured is not None and blog_data.featured != blog.featured:
+            day = blog.created_at.date()
+            await bump(db, "blogs", day=day, status=blog_status(blog.featured), count=-1)
+            await bump(db, "blogs", day=day, status=blog_status(blog_data.featured))
             blog.featured = blog_data.featured
         
-        db.commit()
-        db.refresh(blog)
+        # Sub-second precision on every backend so each edit gets a fresh ETag
+        blog.updated_at = datetime.utcnow()
+        await db.commit()
+        await db.refresh(blog)
+        
+        tags = [blog_tag(blog_id)]
+        if was_featured or blog.featured:
+            tags.append(LIST_TAG)
+        if was_featured != blog.featured:
+            tags.append(STATS_TAG)
+        invalidate(*tags)
         
         return Blog(
             id=blog.id,
@@ -133,33 +342,47 @@ def update_blog(blog_id: str, blog_data: BlogUpdate, db: Session = Depends(get_d
             author=blog.author
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=f"Failed to update blog: {str(e)}")
 
 
 @router.delete("/{blog_id}")
-def delete_blog(blog_id: str, db: Session = Depends(get_db)):
+async def delete_blog(blog_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
     """Delete blog post"""
-    blog = db.query(BlogPostModel).filter(BlogPostModel.id == blog_id).first()
+    blog = await db.get(BlogPostModel, blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
     
     try:
-        db.delete(blog)
-        db.commit()
+        await db.delete(blog)
+        await bump(db, "blogs", day=blog.created_at.date(), status=blog_status(blog.featured), count=-1)
+        await db.commit()
+        invalidate(blog_tag(blog_id), STATS_TAG, *((LIST_TAG,) if blog.featured else ()))
         return {"status": "success", "message": "Blog deleted"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=f"Failed to delete blog: {str(e)}")
 
 
 @router.get("/stats/all")
-def blog_stats(db: Session = Depends(get_db)):
-    """Get blog statistics"""
-    total = db.query(BlogPostModel).count()
-    featured = db.query(BlogPostModel).filter(BlogPostModel.featured == True).count()
-    return {
-        "total_blogs": total,
-        "featured": featured,
-        "draft": total - featured
-    }
+async def blog_stats(db: AsyncSession = Depends(get_read_db)):
+    """Get blog statistics from the metrics rollup"""
+    cache_key = TTLCache.make_key("blog:stats")
+    cached = blog_cache.get(cache_key)
+    if cached is not None:
+        return json_response(cached)
+    
+    summary = await summarize(db, ["blogs"])
+    body = json.dumps({
+        "total_blogs": total(summary, "blogs"),
+        "featured": total(summary, "blogs", status="featured"),
+        "draft": total(summary, "blogs", status="draft")
+    }).encode()
+    cache_store(db, cache_key, body, STATS_TAG)
+    return json_response(body)
+
+
+@router.get("/cache/stats")
+async def blog_cache_stats(username: str = Depends(verify_token)):
+    """Hit/miss/eviction counters for the blog read cache (admin only)"""
+    return blog_cache.stats()
@@ -3,27 +3,51 @@ Contact Form Router
 Handles contact form submissions with database persistence
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+import csv
+import io
+import json
 import uuid
 
+from .auth import verify_token
 from ..models import ContactRequest, ContactResponse
-from ..database.connection import get_db
+from ..database.connection import get_async_db, get_read_db, ReadSessionLocal
 from ..database.models import Contact as ContactModel
+from ..database.pagination import encode_cursor, decode_cursor, seek_after
+from ..database.rollup import bump, summarize, total
 
 router = APIRouter(prefix="/contact")
 
+# Newest first; id breaks created_at ties so every row has a unique position
+CONTACT_ORDER = [(ContactModel.created_at, True), (ContactModel.id, True)]
+EXPORT_FIELDS = ["id", "name", "email", "project", "phone", "budget", "created_at"]
+EXPORT_BATCH_SIZE = 500
+
+
+def contact_to_dict(c: ContactModel) -> dict:
+    """Serialize a contact row for API responses and exports"""
+    return {
+        "id": str(c.id),
+        "name": c.name,
+        "email": c.email,
+        "project": c.project,
+        "phone": c.phone,
+        "budget": c.budget,
+        "created_at": c.created_at.isoformat(),
+    }
+
 
 @router.post("/", response_model=ContactResponse)
-def save_contact(data: ContactRequest, db: Session = Depends(get_db)):
+async def save_contact(data: ContactRequest, db: AsyncSession = Depends(get_async_db)):
     """Save contact form submission to database"""
-    contact_id = str(uuid.uuid4())
-    
     # Create database record
     db_contact = ContactModel(
-        id=contact_id,
         name=data.name,
         email=data.email,
         project=data.project,
@@ -33,36 +57,94 @@ def save_contact(data: ContactRequest, db: Session = Depends(get_db)):
     
     try:
         db.add(db_contact)
-        db.commit()
-        db.refresh(db_contact)
+        await bump(db, "contacts")
+        await db.commit()
+        await db.refresh(db_contact)
         
         return ContactResponse(
             status="success",
             message=f"Thank you {data.name}! We'll review your project and connect within 24 hours.",
-            id=contact_id,
+            id=db_contact.id,
             created_at=db_contact.created_at
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to save contact: {str(e)}")
 
 
 @router.get("/")
-def get_contacts(db: Session = Depends(get_db)):
-    """Get all contacts (admin endpoint - implement auth if needed)"""
-    contacts = db.query(ContactModel).all()
+async def get_contacts(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get contacts newest first (admin endpoint - implement auth if needed)
+    Pass the returned next_cursor back as `cursor` to fetch the following page
+    """
+    query = select(ContactModel)
+    if cursor:
+        try:
+            after = decode_cursor(cursor, datetime, uuid.UUID)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(seek_after(CONTACT_ORDER, after))
+    
+    query = query.order_by(*(column.desc() for column, _ in CONTACT_ORDER)).limit(limit + 1)
+    contacts = (await db.execute(query)).scalars().all()
+    
+    has_more = len(contacts) > limit
+    contacts = contacts[:limit]
+    last = contacts[-1] if contacts else None
+    
     return {
-        "total": len(contacts),
-        "messages": [
-            {
-                "id": c.id,
-                "name": c.name,
-                "email": c.email,
-                "project": c.project,
-                "phone": c.phone,
-                "budget": c.budget,
-                "created_at": c.created_at.isoformat(),
-            }
-            for c in contacts
-        ]
+        "total": total(await summarize(db, ["contacts"]), "contacts"),
+        "messages": [contact_to_dict(c) for c in contacts],
+        "next_cursor": encode_cursor(last.created_at, last.id) if has_more else None
     }
+
+
+async def stream_contacts(export_format: str):
+    """
+    Yield the contacts table as NDJSON or CSV in constant memory.
+    Owns its session: request-scoped dependencies are closed before a
+    StreamingResponse body is iterated.
+    """
+    query = select(ContactModel).order_by(
+        *(column.desc() for column, _ in CONTACT_ORDER)
+    ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    if export_format == "csv":
+        writer.writeheader()
+    
+    async with ReadSessionLocal() as db:
+        result = await db.stream(query)
+        async for partition in result.scalars().partitions():
+            for c in partition:
+                if export_format == "csv":
+                    writer.writerow(contact_to_dict(c))
+                else:
+                    buffer.write(json.dumps(contact_to_dict(c)) + "\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get("/export")
+async def export_contacts(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    username: str = Depends(verify_token)
+):
+    """Stream every contact as NDJSON or CSV (admin only)"""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"contacts-{datetime.utcnow():%Y%m%d}.{format}"
+    return StreamingResponse(
+        stream_contacts(format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
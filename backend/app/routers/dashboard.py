@@ -4,43 +4,38 @@ Provides aggregated statistics and analytics for admin dashboard
 """
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 
 from .auth import verify_token
-from ..database.connection import get_db
-from ..database.models import Contact, BlogPost, Payment, ChatSession
+from ..database.connection import get_read_db
+from ..database.models import Contact, Payment, ChatMessage
+from ..database.aggregates import business_metrics
+from ..database.rollup import summarize, total
 
 router = APIRouter(prefix="/dashboard")
 
 
 @router.get("/stats")
-def get_dashboard_stats(username: str = Depends(verify_token), db: Session = Depends(get_db)):
+async def get_dashboard_stats(username: str = Depends(verify_token), db: AsyncSession = Depends(get_read_db)):
     """Get dashboard statistics (admin only)"""
     
-    # Count contacts
-    total_contacts = db.query(Contact).count()
-    
-    # Count blogs
-    total_blogs = db.query(BlogPost).count()
-    featured_blogs = db.query(BlogPost).filter(BlogPost.featured == True).count()
-    
-    # Get payment stats
-    completed_payments = db.query(Payment).filter(Payment.status == "completed").all()
-    completed_count = len(completed_payments)
-    total_revenue = sum(p.amount for p in completed_payments)
+    # All counters in one aggregate query
+    metrics = await business_metrics(db)
     
     # Get recent contacts
-    recent_contacts = db.query(Contact).order_by(Contact.created_at.desc()).limit(5).all()
+    recent_contacts = (await db.execute(
+        select(Contact).order_by(Contact.created_at.desc()).limit(5)
+    )).scalars().all()
     
     return {
-        "total_contacts": total_contacts,
-        "total_blogs": total_blogs,
-        "featured_blogs": featured_blogs,
-        "total_payments": completed_count,
-        "total_revenue": total_revenue,
-        "pending_payments": db.query(Payment).filter(Payment.status == "pending").count(),
+        "total_contacts": metrics["contacts_total"],
+        "total_blogs": metrics["blogs_total"],
+        "featured_blogs": metrics["blogs_featured"],
+        "total_payments": metrics["payments_completed"],
+        "total_revenue": metrics["revenue_total"],
+        "pending_payments": metrics["payments_pending"],
         "recent_messages": [
             {
                 "id": c.id,
@@ -54,62 +49,48 @@ def get_dashboard_stats(username: str = Depends(verify_token), db: Session = Dep
 
 
 @router.get("/overview")
-def get_overview(username: str = Depends(verify_token), db: Session = Depends(get_db)):
-    """Get quick overview of all business metrics"""
-    
-    # Contact stats
-    total_contacts = db.query(Contact).count()
-    contacts_this_month = db.query(Contact).filter(
-        Contact.created_at >= datetime.utcnow() - timedelta(days=30)
-    ).count()
-    
-    # Blog stats
-    published_blogs = db.query(BlogPost).filter(BlogPost.featured == True).count()
-    
-    # Payment stats
-    completed_payments = db.query(Payment).filter(Payment.status == "completed").all()
-    total_revenue = sum(p.amount for p in completed_payments)
-    payments_this_month = db.query(Payment).filter(
-        Payment.status == "completed",
-        Payment.created_at >= datetime.utcnow() - timedelta(days=30)
-    ).count()
+async def get_overview(username: str = Depends(verify_token), db: AsyncSession = Depends(get_read_db)):
+    """Get quick overview of all business metrics from the metrics rollup"""
     
-    # Chat stats
-    total_chats = db.query(ChatSession).count()
-    chats_this_month = db.query(ChatSession).filter(
-        ChatSession.created_at >= datetime.utcnow() - timedelta(days=30)
-    ).count()
+    since = (datetime.utcnow() - timedelta(days=30)).date()
+    summary = await summarize(db, ["contacts", "blogs", "payments", "chats"], since=since)
     
     return {
         "status": "success",
         "contacts": {
-            "total": total_contacts,
-            "this_month": contacts_this_month
+            "total": total(summary, "contacts"),
+            "this_month": total(summary, "contacts", "recent_count")
         },
         "content": {
-            "published_blogs": published_blogs,
-            "total_blogs": db.query(BlogPost).count()
+            "published_blogs": total(summary, "blogs", status="featured"),
+            "total_blogs": total(summary, "blogs")
         },
         "payments": {
-            "total_revenue": total_revenue,
-            "transactions": len(completed_payments),
-            "this_month": payments_this_month
+            "total_revenue": total(summary, "payments", "amount", status="completed"),
+            "transactions": total(summary, "payments", status="completed"),
+            "this_month": total(summary, "payments", "recent_count", status="completed")
         },
         "engagement": {
-            "total_chats": total_chats,
-            "chats_this_month": chats_this_month
+            "total_chats": total(summary, "chats"),
+            "chats_this_month": total(summary, "chats", "recent_count")
         },
         "last_updated": datetime.utcnow().isoformat()
     }
 
 
 @router.get("/recent")
-def get_recent_activity(username: str = Depends(verify_token), db: Session = Depends(get_db)):
+async def get_recent_activity(username: str = Depends(verify_token), db: AsyncSession = Depends(get_read_db)):
     """Get recent activity across all modules"""
     
-    recent_contacts = db.query(Contact).order_by(Contact.created_at.desc()).limit(5).all()
-    recent_payments = db.query(Payment).order_by(Payment.created_at.desc()).limit(5).all()
-    recent_chats = db.query(ChatSession).order_by(ChatSession.created_at.desc()).limit(5).all()
+    recent_contacts = (await db.execute(
+        select(Contact).order_by(Contact.created_at.desc()).limit(5)
+    )).scalars().all()
+    recent_payments = (await db.execute(
+        select(Payment).order_by(Payment.created_at.desc()).limit(5)
+    )).scalars().all()
+    recent_chats = (await db.execute(
+        select(ChatMessage.user_message, ChatMessage.created_at).order_by(ChatMessage.created_at.desc()).limit(5)
+    )).all()
     
     return {
         "contacts": [
@@ -3,45 +3,115 @@ Payment Router
 Handles payment processing with Khalti and eSewa integration
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from datetime import datetime
-from sqlalchemy.orm import Session
-import uuid
+from fastapi import APIRouter, HTTPException, Depends, Query
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import hashlib
+import json
 import os
-import httpx
+import uuid
 
+from .auth import verify_token
 from ..models import KhaltiPayment, PaymentResponse
-from ..database.connection import get_db
+from ..database.aggregates import revenue_series
+from ..database.connection import get_async_db, get_read_db
+from ..database.ids import uuid7
 from ..database.models import Payment as PaymentModel
+from ..database.pagination import encode_cursor, decode_cursor, seek_after
+from ..database.payment_store import apply_transitions
+from ..database.rollup import bump, summarize, total
+from ..database.webhook_store import enqueue
+from ..services.payment_gateways import KHALTI_STATUSES, GatewayError, gateways
+from ..services.payment_reconciler import payment_reconciler
+from ..services.webhook_worker import webhook_worker
 
 router = APIRouter(prefix="/payment")
 
-# Khalti Configuration
-KHALTI_SECRET_KEY = os.getenv("KHALTI_SECRET_KEY", "")
+# Khalti Configuration (verification settings live in services/payment_gateways.py)
 KHALTI_PUBLIC_KEY = os.getenv("KHALTI_PUBLIC_KEY", "")
-KHALTI_VERIFY_URL = os.getenv("KHALTI_VERIFY_URL", "https://khalti.com/api/v2/payment/verify/")
 
 # eSewa Configuration
 ESEWA_MERCHANT_CODE = os.getenv("ESEWA_MERCHANT_CODE", "EPAYTEST")
 ESEWA_MERCHANT_PASSWORD = os.getenv("ESEWA_MERCHANT_PASSWORD", "")
 ESEWA_SUCCESS_URL = os.getenv("ESEWA_SUCCESS_URL", "http://localhost:3000/payment/success")
 ESEWA_FAILURE_URL = os.getenv("ESEWA_FAILURE_URL", "http://localhost:3000/payment/failure")
-ESEWA_VERIFY_URL = os.getenv("ESEWA_VERIFY_URL", "https://uat.esewa.com.np/api/epay/transaction/status/")
+
+# Newest first; id breaks created_at ties so every row has a unique position
+HISTORY_ORDER = [(PaymentModel.created_at, True), (PaymentModel.id, True)]
+# Columns /history can return (?fields=...), and the ones it returns by default
+HISTORY_FIELDS = {
+    column: getattr(PaymentModel, column)
+    for column in (
+        "id", "transaction_id", "customer_name", "customer_email", "amount", "currency", "status",
+        "payment_method", "description", "created_at", "updated_at",
+    )
+}
+DEFAULT_HISTORY_FIELDS = "id,transaction_id,customer_name,amount,status,payment_method,created_at"
+
+# Range served by /stats/timeseries when no start is given
+DEFAULT_SERIES_SPANS = {"hour": timedelta(hours=48), "day": timedelta(days=30), "month": timedelta(days=365)}
+
+
+def as_utc(moment: datetime | None) -> datetime | None:
+    """Naive UTC, the form timestamps are stored in"""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def confirm_payment(db: AsyncSession, method: str, transaction_id: str, amount: int | None = None) -> None:
+    """
+    Ask the provider about a pending payment and mark it completed if it
+    really went through. `amount` is the amount the client claims to have
+    paid (checked against ours when given).
+    """
+    payment = (await db.execute(select(PaymentModel.amount).where(
+        PaymentModel.transaction_id == transaction_id,
+        PaymentModel.payment_method == method
+    ))).first()
+    
+    if not payment:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    
+    if amount is not None and payment.amount != amount:
+        raise HTTPException(status_code=400, detail="Amount mismatch")
+    
+    # Give the connection back to the pool while waiting on the provider
+    await db.rollback()
+    try:
+        verification = await gateways[method].verify(transaction_id, amount if amount is not None else payment.amount)
+    except GatewayError as e:
+        raise HTTPException(status_code=503, detail=f"Payment provider unavailable: {e}")
+    
+    if verification.status != "completed":
+        raise HTTPException(status_code=400, detail=f"Payment not completed (provider status: {verification.status})")
+    if verification.amount is not None and verification.amount != payment.amount:
+        raise HTTPException(status_code=400, detail="Amount mismatch")
+    
+    # Guarded on status: a webhook or a second verify confirming the same payment is a no-op
+    applied = await apply_transitions(db, {"completed": {transaction_id}})
+    await db.commit()
+    if not applied:
+        status = await db.scalar(select(PaymentModel.status).where(PaymentModel.transaction_id == transaction_id))
+        if status != "completed":
+            raise HTTPException(status_code=409, detail=f"Payment is {status}")
 
 
 @router.post("/khalti/initiate", response_model=PaymentResponse)
-def khalti_initiate(payment: KhaltiPayment, db: Session = Depends(get_db)):
+async def khalti_initiate(payment: KhaltiPayment, db: AsyncSession = Depends(get_async_db)):
     """
     Initiate Khalti payment
     Returns token_url for client to redirect to
     """
     try:
-        payment_id = str(uuid.uuid4())
+        payment_id = uuid7()
         
         # Store payment record in database
         db_payment = PaymentModel(
             id=payment_id,
-            transaction_id=payment_id,
+            transaction_id=str(payment_id),
             customer_name=payment.customer_name,
             customer_email=payment.customer_email,
             amount=payment.amount,
@@ -53,41 +123,29 @@ def khalti_initiate(payment: KhaltiPayment, db: Session = Depends(get_db)):
         )
         
         db.add(db_payment)
-        db.commit()
-        db.refresh(db_payment)
+        await bump(db, "payments", status="pending", method="khalti", amount=payment.amount)
+        await db.commit()
+        await db.refresh(db_payment)
         
         return PaymentResponse(
             status="initiated",
-            transaction_id=payment_id,
+            transaction_id=str(payment_id),
             message="Payment initiated successfully",
             payment_url=f"https://khalti.com/checkout/?token={payment_id}"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/khalti/verify", response_model=PaymentResponse)
-def khalti_verify(token: str, amount: int, db: Session = Depends(get_db)):
+async def khalti_verify(token: str, amount: int, db: AsyncSession = Depends(get_async_db)):
     """
     Verify Khalti payment
-    In production, call Khalti API with token
+    Confirmed with Khalti before the payment is marked completed
     """
     try:
-        payment = db.query(PaymentModel).filter(
-            PaymentModel.transaction_id == token,
-            PaymentModel.payment_method == "khalti"
-        ).first()
-        
-        if not payment:
-            raise HTTPException(status_code=404, detail="Payment not found")
-        
-        if payment.amount != amount:
-            raise HTTPException(status_code=400, detail="Amount mismatch")
-        
-        payment.status = "completed"
-        db.commit()
-        db.refresh(payment)
+        await confirm_payment(db, "khalti", token, amount)
         
         return PaymentResponse(
             status="verified",
@@ -97,47 +155,72 @@ def khalti_verify(token: str, amount: int, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/khalti/webhook")
-def khalti_webhook(data: dict, db: Session = Depends(get_db)):
+async def khalti_webhook(data: dict, db: AsyncSession = Depends(get_async_db)):
     """
     Webhook endpoint for Khalti payment notifications
-    Khalti will POST to this endpoint after payment completion
+    Khalti will POST to this endpoint after payment completion. The event is
+    queued and acknowledged; the webhook worker asks Khalti about the payment
+    in the background and applies only the status Khalti confirms.
     """
+    token = data.get("token")
+    if not token:
+        return {"status": "error", "message": "Missing token"}
+    
+    payload = json.dumps(data, sort_keys=True, default=str)
+    # Khalti's own event id when present, otherwise identical redeliveries share a hash
+    event_id = str(data.get("idx") or hashlib.sha256(payload.encode()).hexdigest())
+    # Notifications without a status claim a completion (recorded, not trusted)
+    status = KHALTI_STATUSES.get(str(data.get("status", "completed")).lower())
+    
     try:
-        token = data.get("token")
-        
-        payment = db.query(PaymentModel).filter(
-            PaymentModel.transaction_id == token
-        ).first()
-        
-        if payment:
-            payment.status = "completed"
-            db.commit()
-            return {"status": "success", "message": "Webhook processed"}
-        
-        return {"status": "error", "message": "Payment not found"}
+        queued = await enqueue(db, "khalti", event_id, token, status, payload)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return {"status": "error", "message": str(e)}
+    
+    webhook_worker.notify()
+    if not queued:
+        return {"status": "success", "message": "Webhook already received"}
+    return {"status": "success", "message": "Webhook queued"}
+
+
+@router.get("/webhooks/stats")
+async def webhook_stats(username: str = Depends(verify_token)):
+    """Webhook queue depth, processing lag and outcome counters (admin only)"""
+    return await webhook_worker.stats()
+
+
+@router.get("/gateways/stats")
+async def gateway_stats(username: str = Depends(verify_token)):
+    """Verification call counters and circuit breaker state per provider (admin only)"""
+    return {name: gateway.stats() for name, gateway in gateways.items()}
+
+
+@router.get("/reconciler/stats")
+async def reconciler_stats(username: str = Depends(verify_token)):
+    """Pending payment reconciliation progress and outcomes (admin only)"""
+    return payment_reconciler.stats()
 
 
 @router.post("/esewa/initiate", response_model=PaymentResponse)
-def esewa_initiate(payment: KhaltiPayment, db: Session = Depends(get_db)):
+async def esewa_initiate(payment: KhaltiPayment, db: AsyncSession = Depends(get_async_db)):
     """
     Initiate eSewa payment
     Returns redirect_url for client to redirect to
     """
     try:
-        payment_id = str(uuid.uuid4())
+        payment_id = uuid7()
         
         # Store payment record in database
         db_payment = PaymentModel(
             id=payment_id,
-            transaction_id=payment_id,
+            transaction_id=str(payment_id),
             customer_name=payment.customer_name,
             customer_email=payment.customer_email,
             amount=payment.amount,
@@ -148,8 +231,9 @@ def esewa_initiate(payment: KhaltiPayment, db: Session = Depends(get_db)):
         )
         
         db.add(db_payment)
-        db.commit()
-        db.refresh(db_payment)
+        await bump(db, "payments", status="pending", method="esewa", amount=payment.amount)
+        await db.commit()
+        await db.refresh(db_payment)
         
         # Build eSewa payment URL
         esewa_url = (
@@ -161,33 +245,24 @@ def esewa_initiate(payment: KhaltiPayment, db: Session = Depends(get_db)):
         
         return PaymentResponse(
             status="initiated",
-            transaction_id=payment_id,
+            transaction_id=str(payment_id),
             message="Payment initiated successfully",
             payment_url=esewa_url
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/esewa/verify", response_model=PaymentResponse)
-def esewa_verify(ref_id: str, db: Session = Depends(get_db)):
+async def esewa_verify(ref_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Verify eSewa payment
-    ref_id is provided by eSewa after successful payment
+    ref_id is provided by eSewa after successful payment; the payment is
+    confirmed with eSewa's transaction status API before it is completed
     """
     try:
-        payment = db.query(PaymentModel).filter(
-            PaymentModel.transaction_id == ref_id,
-            PaymentModel.payment_method == "esewa"
-        ).first()
-        
-        if not payment:
-            raise HTTPException(status_code=404, detail="Payment not found")
-        
-        payment.status = "completed"
-        db.commit()
-        db.refresh(payment)
+        await confirm_payment(db, "esewa", ref_id)
         
         return PaymentResponse(
             status="verified",
@@ -197,41 +272,121 @@ def esewa_verify(ref_id: str, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/history")
-def payment_history_list(limit: int = 50, db: Session = Depends(get_db)):
-    """Get recent payment history"""
-    payments = db.query(PaymentModel).order_by(PaymentModel.created_at.desc()).limit(limit).all()
+async def payment_history_list(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    status: Optional[str] = None,
+    method: Optional[str] = None,
+    email: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: str = DEFAULT_HISTORY_FIELDS,
+    db: AsyncSession = Depends(get_read_db),
+    username: str = Depends(verify_token),
+):
+    """
+    Get payment history newest first (admin only)
+    Filter by status, method, customer email and a created_at range; `fields`
+    picks the returned columns. Pass the returned next_cursor back as
+    `cursor` to fetch the following page.
+    """
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in HISTORY_FIELDS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {unknown}; choose from {', '.join(HISTORY_FIELDS)}" if unknown
+            else "No fields requested",
+        )
+    
+    # Only the requested columns, plus the sort keys the cursor is built from
+    columns = [HISTORY_FIELDS[name] for name in dict.fromkeys([*names, "created_at", "id"])]
+    query = select(*columns)
+    if status:
+        query = query.where(PaymentModel.status == status)
+    if method:
+        query = query.where(PaymentModel.payment_method == method)
+    if email:
+        query = query.where(PaymentModel.customer_email == email)
+    if created_from:
+        query = query.where(PaymentModel.created_at >= as_utc(created_from))
+    if created_before:
+        query = query.where(PaymentModel.created_at < as_utc(created_before))
+    if cursor:
+        try:
+            after = decode_cursor(cursor, datetime, uuid.UUID)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(seek_after(HISTORY_ORDER, after))
+    
+    query = query.order_by(*(column.desc() for column, _ in HISTORY_ORDER)).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if rows else None
+    
     return {
-        "total": len(payments),
-        "payments": [
-            {
-                "id": p.id,
-                "transaction_id": p.transaction_id,
-                "customer_name": p.customer_name,
-                "amount": p.amount,
-                "status": p.status,
-                "payment_method": p.payment_method,
-                "created_at": p.created_at.isoformat(),
-            }
-            for p in payments
-        ]
+        "total": len(rows),
+        "payments": [{name: row._mapping[name] for name in names} for row in rows],
+        "next_cursor": encode_cursor(last.created_at, last.id) if has_more else None
     }
 
 
 @router.get("/stats")
-def payment_stats(db: Session = Depends(get_db)):
-    """Get payment statistics"""
-    all_payments = db.query(PaymentModel).all()
-    completed = [p for p in all_payments if p.status == "completed"]
-    total_revenue = sum(p.amount for p in completed)
+async def payment_stats(db: AsyncSession = Depends(get_read_db)):
+    """Get payment statistics from the metrics rollup (grouped by status and method in SQL)"""
+    summary = await summarize(db, ["payments"])
+    methods = sorted({method for _, _, method in summary})
+    
+    return {
+        "total_transactions": total(summary, "payments"),
+        "completed_transactions": total(summary, "payments", status="completed"),
+        "total_revenue": total(summary, "payments", "amount", status="completed"),
+        "pending_transactions": total(summary, "payments", status="pending"),
+        "by_method": {
+            method: {
+                "transactions": total(summary, "payments", method=method),
+                "completed": total(summary, "payments", status="completed", method=method),
+                "revenue": total(summary, "payments", "amount", status="completed", method=method),
+            }
+            for method in methods
+        },
+    }
+
+
+@router.get("/stats/timeseries")
+async def payment_stats_timeseries(
+    granularity: Literal["hour", "day", "month"] = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Transactions, completed payments and revenue per hour, day or month
+    (UTC) for [start, end); defaults to the last 48 hours, 30 days or 12 months.
+    Every bucket overlapping the range is returned, empty ones as zeros.
+    A payment counts in the bucket of its creation time, not of the time it
+    was completed, so revenue for a past bucket can still grow while its
+    payments are pending.
+    """
+    end = as_utc(end) or datetime.utcnow()
+    start = as_utc(start) or end - DEFAULT_SERIES_SPANS[granularity]
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    try:
+        buckets = await revenue_series(db, granularity, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
-        "total_transactions": len(all_payments),
-        "completed_transactions": len(completed),
-        "total_revenue": total_revenue,
-        "pending_transactions": len([p for p in all_payments if p.status == "pending"])
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "buckets": buckets,
     }
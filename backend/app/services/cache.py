@@ -0,0 +1,139 @@
+"""
+In-Process Response Cache
+LRU cache with per-entry TTL, a byte-size cap and tag-based invalidation
+
+Entries live in the worker process that created them, so with several
+workers a write only invalidates the local copy; the TTL bounds how long
+other workers may serve a stale entry.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+    tags: frozenset = field(default_factory=frozenset)
+
+
+class TTLCache:
+    """Bounded LRU + TTL cache for serialized responses"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 8 * 1024 * 1024, ttl: float = 60.0,
+                 on_remove: Callable[[str], None] | None = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Called with the key whenever an entry leaves the cache (eviction, expiry, invalidation)
+        self.on_remove = on_remove
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(route: str, **params) -> str:
+        """Stable cache key from a route name and its query parameters"""
+        query = "&".join(f"{k}={params[k]}" for k in sorted(params) if params[k] is not None)
+        return f"{route}?{query}"
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Any | None:
+        """Return a live entry and mark it most recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: str, value: Any, tags: tuple = (), ttl: float | None = None,
+            size: int | None = None) -> None:
+        """
+        Store value under key, evicting least recently used entries to fit the caps.
+        `size` defaults to len(value); pass it explicitly for non-bytes values.
+        """
+        size = len(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        entry = CacheEntry(
+            value=value,
+            size=size,
+            expires_at=time.monotonic() + (self.ttl if ttl is None else ttl),
+            tags=frozenset(tags),
+        )
+        self._entries[key] = entry
+        self.bytes += size
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every entry carrying any of the given tags, returns entries removed"""
+        removed = 0
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                removed += 1
+        self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        if self.on_remove is not None:
+            for key in self._entries:
+                self.on_remove(key)
+        self._entries.clear()
+        self._tags.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        if self.on_remove is not None:
+            self.on_remove(key)
@@ -0,0 +1,171 @@
+"""
+Chat Context Window
+Multi-turn prompts for AI chat: the session's recent turns are kept within a
+token budget, and turns that fall out of the window are folded into a rolling
+summary on the conversation row when CHAT_SUMMARY_ENABLED is set, so a
+long session sends a bounded prompt instead of its whole history.
+
+Contexts are cached per session in-process, so history is read from the
+database only on the first turn a worker sees for a session (or after the
+entry expires). With several workers a cached window may miss turns served
+by another worker until CHAT_CONTEXT_CACHE_TTL_SECONDS elapses.
+"""
+
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import TTLCache
+from ..database.chat_store import get_conversation, recent_messages, save_summary
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """Local BPE-style estimate: about 4 characters per token inside words, 1 per symbol"""
+    return sum((len(piece) + 3) // 4 for piece in TOKEN_RE.findall(text))
+
+
+def keep_last_tokens(text: str, budget: int) -> str:
+    """Longest suffix of text that fits in `budget` tokens, cut at a token boundary"""
+    used = 0
+    start = len(text)
+    for match in reversed(list(TOKEN_RE.finditer(text))):
+        used += (len(match.group()) + 3) // 4
+        if used > budget:
+            break
+        start = match.start()
+    return text[start:]
+
+
+@dataclass
+class Turn:
+    user: str
+    reply: str
+    created_at: datetime
+    tokens: int
+
+
+@dataclass
+class SessionContext:
+    session_id: str
+    turns: deque = field(default_factory=deque)
+    summary: str = ""
+    summarized_turns: int = 0
+    summarized_through: datetime | None = None
+
+    @property
+    def has_history(self) -> bool:
+        return bool(self.turns or self.summary)
+
+    @property
+    def size(self) -> int:
+        return len(self.summary) + sum(len(t.user) + len(t.reply) for t in self.turns) + 256
+
+
+class ContextStore:
+    """Loads, trims, summarizes and caches per-session context windows"""
+
+    def __init__(self, max_turns: int = 20, token_budget: int = 2000, summary_enabled: bool = True,
+                 summary_tokens: int = 300, cache: TTLCache | None = None):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_enabled = summary_enabled
+        self.summary_tokens = summary_tokens
+        self.cache = cache or TTLCache()
+        self.loads = 0
+
+    async def get(self, db: AsyncSession, session_id: str, new: bool = False) -> SessionContext:
+        """Cached context for the session, loaded from the database on a miss (skipped for new sessions)"""
+        context = self.cache.get(session_id)
+        if context is not None:
+            return context
+        context = SessionContext(session_id) if new else await self._load(db, session_id)
+        self.cache.set(session_id, context, size=context.size)
+        return context
+
+    def build_messages(self, system_prompt: str, context: SessionContext | None, message: str) -> list[dict]:
+        """Provider messages: system prompt, rolling summary, recent turns, then the new message"""
+        messages = [{"role": "system", "content": system_prompt}]
+        if context is not None:
+            if context.summary:
+                messages.append({
+                    "role": "system",
+                    "content": f"Summary of earlier conversation (visitor questions): {context.summary}",
+                })
+            for turn in context.turns:
+                messages.append({"role": "user", "content": turn.user})
+                messages.append({"role": "assistant", "content": turn.reply})
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    async def record(self, db: AsyncSession, context: SessionContext, message: str, reply: str,
+                     created_at: datetime) -> None:
+        """Append a completed turn, then fold whatever no longer fits the window into the summary"""
+        turn = Turn(message, reply, created_at, count_tokens(message) + count_tokens(reply))
+        context.turns.append(turn)
+        overflow = []
+        while context.turns and (len(context.turns) > self.max_turns
+                                 or sum(t.tokens for t in context.turns) > self.token_budget):
+            overflow.append(context.turns.popleft())
+        if overflow and self.summary_enabled:
+            await self._fold(db, context, overflow)
+        self.cache.set(context.session_id, context, size=context.size)
+
+    async def _load(self, db: AsyncSession, session_id: str) -> SessionContext:
+        self.loads += 1
+        context = SessionContext(session_id)
+        conversation = await get_conversation(db, session_id)
+        if conversation is None:
+            return context
+        if self.summary_enabled and conversation.summary:
+            context.summary = conversation.summary
+            context.summarized_turns = conversation.summarized_turns
+            context.summarized_through = conversation.summarized_through
+
+        # Newest turns first through idx_chat_message_conversation, then restore order
+        rows = await recent_messages(db, conversation.id, self.max_turns, after=context.summarized_through)
+        budget = self.token_budget
+        for user, reply, created_at in rows:
+            turn = Turn(user, reply, created_at, count_tokens(user) + count_tokens(reply))
+            if turn.tokens > budget:
+                break
+            budget -= turn.tokens
+            context.turns.appendleft(turn)
+        return context
+
+    async def _fold(self, db: AsyncSession, context: SessionContext, turns: list[Turn]) -> None:
+        """Extractive rolling summary: the visitor's questions, oldest dropped when over budget"""
+        questions = context.summary.split("; ") if context.summary else []
+        questions += [" ".join(turn.user.split()) for turn in turns]
+        kept, used = [], 0
+        for question in reversed(questions):
+            used += count_tokens(question)
+            if used > self.summary_tokens:
+                break
+            kept.append(question)
+        context.summary = "; ".join(reversed(kept)) or keep_last_tokens(questions[-1], self.summary_tokens)
+        context.summarized_turns += len(turns)
+        context.summarized_through = turns[-1].created_at
+        await save_summary(db, context.session_id, context.summary, context.summarized_turns,
+                           context.summarized_through)
+        await db.commit()
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "history_loads": self.loads}
+
+
+chat_contexts = ContextStore(
+    max_turns=int(os.getenv("CHAT_CONTEXT_TURNS", "20")),
+    token_budget=int(os.getenv("CHAT_CONTEXT_TOKENS", "2000")),
+    summary_enabled=os.getenv("CHAT_SUMMARY_ENABLED", "true").lower() == "true",
+    summary_tokens=int(os.getenv("CHAT_SUMMARY_TOKENS", "300")),
+    cache=TTLCache(
+        max_entries=int(os.getenv("CHAT_CONTEXT_CACHE_SESSIONS", "5000")),
+        max_bytes=int(os.getenv("CHAT_CONTEXT_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+        ttl=float(os.getenv("CHAT_CONTEXT_CACHE_TTL_SECONDS", "1800")),
+    ),
+)
@@ -0,0 +1,121 @@
+"""
+Chat Write-Behind
+Queues chat records in-process and persists them with bulk INSERTs from a
+background task, flushing when a batch fills up or the time window elapses.
+
+Enabled with CHAT_WRITE_BEHIND=true. Records still queued when the process
+dies uncleanly are lost, so the lifespan hook drains the queue on shutdown.
+"""
+
+import asyncio
+import logging
+import os
+
+from ..database.chat_store import save_exchanges
+from ..database.connection import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class ChatWriteBehind:
+    """Bounded queue + batching flusher for chat records"""
+
+    def __init__(self, max_batch: int = 200, flush_interval: float = 0.5, max_pending: int = 10_000,
+                 max_retries: int = 3):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.flushed = 0
+        self.batches = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Spawn the flusher on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run(), name="chat-write-behind")
+
+    async def submit(self, record: dict) -> None:
+        """
+        Queue one chat row (column name -> value, including id and created_at).
+        Waits for space when the queue is full, applying backpressure instead of
+        growing memory without bound.
+        """
+        await self._queue.put(record)
+
+    async def stop(self) -> None:
+        """Persist everything still queued, then stop the flusher"""
+        if not self.running:
+            return
+        # The sentinel queues behind every pending record, so FIFO order drains them first
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.running,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "dropped": self.dropped,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            record = await self._queue.get()
+            if record is None:
+                break
+            batch = [record]
+            deadline = loop.time() + self.flush_interval
+            # Keep collecting until the batch is full or the window closes
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[dict]) -> None:
+        """One conversation upsert + bulk message INSERT + rollup increments, retried with backoff"""
+        if not batch:
+            return
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with AsyncSessionLocal() as db:
+                    await save_exchanges(db, batch)
+                    await db.commit()
+                self.flushed += len(batch)
+                self.batches += 1
+                return
+            except Exception:
+                logger.exception("Chat flush failed (attempt %d/%d, %d records)",
+                                 attempt, self.max_retries, len(batch))
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        self.dropped += len(batch)
+
+
+CHAT_WRITE_BEHIND = os.getenv("CHAT_WRITE_BEHIND", "false").lower() == "true"
+
+chat_writer = ChatWriteBehind(
+    max_batch=int(os.getenv("CHAT_FLUSH_MAX_BATCH", "200")),
+    flush_interval=int(os.getenv("CHAT_FLUSH_INTERVAL_MS", "500")) / 1000,
+    max_pending=int(os.getenv("CHAT_QUEUE_MAX", "10000")),
+)
@@ -0,0 +1,66 @@
+"""
+HTTP Conditional Requests
+ETag / Last-Modified validators and If-None-Match / If-Modified-Since evaluation
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """Strong entity tag derived from the given version-identifying parts"""
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def http_date(value: datetime) -> str:
+    """IMF-fixdate for a naive-UTC or aware datetime"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def has_conditions(request: Request) -> bool:
+    """True when the client sent any validator worth checking"""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    """
+    Evaluate conditional GET headers (RFC 9110 13.2.2): If-None-Match wins
+    when present, otherwise If-Modified-Since is compared at 1s resolution.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison: W/"x" matches "x" for GET revalidation
+        return "*" in candidates or etag in (c.removeprefix("W/") for c in candidates)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    modified = last_modified.replace(microsecond=0)
+    if modified.tzinfo is None:
+        modified = modified.replace(tzinfo=timezone.utc)
+    return modified <= since
+
+
+def validator_headers(etag: str, last_modified: datetime | None = None) -> dict:
+    """Response headers advertising the current validators"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(etag: str, last_modified: datetime | None = None) -> Response:
+    """Bodyless 304 carrying the validators"""
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
@@ -0,0 +1,141 @@
+"""
+Intent Matcher
+Rule-based first tier of the chat responder. A message is split into words
+once; keywords are then found with set and prefix lookups on whole words,
+so "hi" no longer matches inside "this" and no per-keyword scan of the text
+is needed.
+
+Intents, keywords and replies are loaded from app/data/intents.json
+(override with INTENTS_FILE). A trailing "*" makes a keyword a word prefix
+("price*" matches "prices"); multi-word keywords match consecutive words.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+INTENTS_FILE = os.getenv("INTENTS_FILE", str(Path(__file__).resolve().parent.parent / "data" / "intents.json"))
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "0.6"))
+
+WORD_RE = re.compile(r"\w+")
+
+# Filler words are ignored when measuring how much of a message an intent explains
+STOPWORDS = frozenset(
+    "a an the is are am was be been do does did can could would will should shall may i me my "
+    "we us our you your it its to of for in on at by and or but with about what how when where "
+    "which who whom this that these those there please tell know want need like just so some any "
+    "s t d ll m re ve".split()
+)
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    priority: int
+    keywords: tuple
+    reply: str
+
+
+@dataclass
+class IntentMatch:
+    intent: str
+    reply: str
+    confidence: float
+    priority: int
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(WORD_RE.findall(keyword.casefold()))
+
+
+class IntentMatcher:
+    """Whole-word keyword lookup scoring intents by priority and message coverage"""
+
+    def __init__(self, intents: list[Intent], fallback: str = ""):
+        self.intents = list(intents)
+        self.fallback = fallback
+        # keyword -> (intent index, words in the keyword); the first intent listing a keyword owns it
+        self._words: dict[str, tuple[int, int]] = {}
+        self._stems: dict[str, tuple[int, int]] = {}
+        # (" phrase " or " phrase" for a prefix, owner) for multi-word keywords
+        self._phrases: list[tuple[str, tuple[int, int]]] = []
+        self._phrase_starts: set[str] = set()
+        for index, intent in enumerate(self.intents):
+            for keyword in intent.keywords:
+                prefix = keyword.endswith("*")
+                text = normalize_keyword(keyword.rstrip("*"))
+                size = len(text.split())
+                if size > 1:
+                    needle = f" {text}" if prefix else f" {text} "
+                    if all(existing != needle for existing, _ in self._phrases):
+                        self._phrases.append((needle, (index, size)))
+                    self._phrase_starts.add(text.split()[0])
+                elif text:
+                    (self._stems if prefix else self._words).setdefault(text, (index, 1))
+        # Longest stems are tried first when attributing a prefix match
+        self._stem_lengths = sorted({len(stem) for stem in self._stems}, reverse=True)
+
+    def _owner(self, word: str) -> tuple[int, int] | None:
+        owner = self._words.get(word)
+        if owner is not None:
+            return owner
+        for length in self._stem_lengths:
+            owner = self._stems.get(word[:length])
+            if owner is not None:
+                return owner
+        return None
+
+    @classmethod
+    def from_file(cls, path: str) -> "IntentMatcher":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        intents = [
+            Intent(
+                name=item["name"],
+                priority=int(item.get("priority", 0)),
+                keywords=tuple(item["keywords"]),
+                reply=item["reply"],
+            )
+            for item in data["intents"]
+        ]
+        return cls(intents, fallback=data.get("fallback", ""))
+
+    def match(self, message: str) -> IntentMatch | None:
+        """
+        Best intent for the message, or None when no keyword occurs.
+        Confidence is the share of the message's content words covered by the
+        winning intent's keywords; ties go to the higher priority.
+        """
+        words = WORD_RE.findall(message.casefold())
+        distinct = set(words)
+        # Each distinct keyword counts once, weighted by its number of words
+        hits = [owner for owner in map(self._owner, distinct) if owner is not None]
+        if self._phrases and not self._phrase_starts.isdisjoint(distinct):
+            padded = f" {' '.join(words)} "
+            hits += [owner for needle, owner in self._phrases if needle in padded]
+        if not hits:
+            return None
+
+        covered = {}
+        for index, size in hits:
+            covered[index] = covered.get(index, 0) + size
+        best = max(covered, key=lambda i: (covered[i], self.intents[i].priority))
+        # Distinct content words set the denominator
+        content = len(distinct - STOPWORDS) or 1
+        intent = self.intents[best]
+        return IntentMatch(
+            intent=intent.name,
+            reply=intent.reply,
+            confidence=min(1.0, covered[best] / content),
+            priority=intent.priority,
+        )
+
+    def reply(self, message: str) -> str:
+        """Matched intent's reply, or the fallback reply"""
+        match = self.match(message)
+        return match.reply if match else self.fallback.format(message=message)
+
+
+intent_matcher = IntentMatcher.from_file(INTENTS_FILE)
@@ -0,0 +1,226 @@
+"""
+LLM Client
+Provider abstraction for chat completions. Network providers share one
+long-lived httpx.AsyncClient per process (keep-alive pool), cap in-flight
+calls with a semaphore, and retry transient failures with jittered backoff.
+
+Select with LLM_PROVIDER=mock|openai; any OpenAI-compatible endpoint works
+through LLM_BASE_URL (see benchmarks/llm_stub_server.py for a local stub).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+
+from .intents import intent_matcher
+
+logger = logging.getLogger(__name__)
+
+Messages = list[dict]
+
+
+class LLMError(Exception):
+    """The provider could not produce a reply (overloaded, unreachable or failing)"""
+
+
+class LLMProvider(ABC):
+    """Base provider: implement stream(); complete() drains it"""
+
+    name = "base"
+
+    @abstractmethod
+    async def stream(self, messages: Messages) -> AsyncIterator[str]:
+        raise NotImplementedError
+        yield
+
+    async def complete(self, messages: Messages) -> str:
+        return "".join([chunk async for chunk in self.stream(messages)])
+
+    async def aclose(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"provider": self.name}
+
+
+class MockProvider(LLMProvider):
+    """Offline responder, streams the matched intent's canned reply word by word"""
+
+    name = "mock"
+
+    async def stream(self, messages: Messages) -> AsyncIterator[str]:
+        message = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        for chunk in re.findall(r"\S+\s*", intent_matcher.reply(message)):
+            yield chunk
+            # Hand control back to the loop between chunks, as a network stream would
+            await asyncio.sleep(0)
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Streaming /chat/completions client for OpenAI and API-compatible servers"""
+
+    name = "openai"
+    RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+    def __init__(self, base_url: str, api_key: str, model: str, max_concurrency: int = 16,
+                 max_connections: int = 32, timeout: float = 30.0, connect_timeout: float = 5.0,
+                 queue_timeout: float = 10.0, max_retries: int = 3, backoff_base: float = 0.25,
+                 backoff_max: float = 4.0, transport: httpx.AsyncBaseTransport | None = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"} if self.api_key else {},
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=30.0,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of max_concurrency call slots; give up after queue_timeout"""
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise LLMError(f"{self.name}: too many concurrent requests")
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def _backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> float | None:
+        try:
+            return float(response.headers["retry-after"])
+        except (KeyError, ValueError):
+            return None
+
+    async def stream(self, messages: Messages) -> AsyncIterator[str]:
+        payload = {"model": self.model, "messages": messages, "stream": True}
+        self.requests += 1
+        for attempt in range(self.max_retries + 1):
+            started = False
+            retry_after = None
+            # One slot per attempt: a call backing off must not keep others waiting
+            async with self._slot():
+                try:
+                    async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+                        if response.status_code < 400:
+                            async for delta in self._deltas(response):
+                                started = True
+                                yield delta
+                            return
+                        if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                            self.failures += 1
+                            raise LLMError(f"{self.name}: HTTP {response.status_code}")
+                        retry_after = self._retry_after(response)
+                except httpx.TransportError as exc:
+                    # Once tokens have been emitted a retry would duplicate them
+                    if started or attempt == self.max_retries:
+                        self.failures += 1
+                        raise LLMError(f"{self.name}: {exc.__class__.__name__}") from exc
+            self.retries += 1
+            logger.warning("%s call failed (attempt %d/%d), retrying",
+                           self.name, attempt + 1, self.max_retries + 1)
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    async def _deltas(self, response: httpx.Response) -> AsyncIterator[str]:
+        """Content deltas from an SSE chat-completions stream"""
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            try:
+                choices = json.loads(data).get("choices") or [{}]
+                content = choices[0].get("delta", {}).get("content")
+            except (ValueError, AttributeError, TypeError, IndexError) as exc:
+                # A garbled event is not transient: the stream is abandoned, not retried
+                self.failures += 1
+                raise LLMError(f"{self.name}: malformed stream event") from exc
+            if content:
+                yield content
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.name,
+            "model": self.model,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+def create_provider() -> LLMProvider:
+    """Provider configured by LLM_* environment variables"""
+    provider = os.getenv("LLM_PROVIDER", "mock").lower()
+    if provider == "mock":
+        return MockProvider()
+    if provider == "openai":
+        return OpenAICompatibleProvider(
+            base_url=os.getenv("LLM_BASE_URL", "https://api.openai.com/v1"),
+            api_key=os.getenv("OPENAI_API_KEY", ""),
+            model=os.getenv("LLM_MODEL", "gpt-3.5-turbo"),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "32")),
+            timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+            connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT", "5")),
+            queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+        )
+    raise ValueError(f"Unknown LLM_PROVIDER '{provider}'")
+
+
+llm = create_provider()
@@ -0,0 +1,390 @@
+"""
+Payment Gateways
+Asks Khalti and eSewa whether a payment really went through. Both gateways
+share one long-lived httpx.AsyncClient per process (keep-alive pool), so a
+verification is a non-blocking request on a warm connection. Each gateway
+has its own token-bucket rate limit and circuit breaker: once a provider
+keeps failing, calls fail fast with GatewayError instead of tying up
+requests until it recovers.
+
+Select with PAYMENT_GATEWAY=mock|live. mock confirms every payment without
+a network call (local development); live calls KHALTI_VERIFY_URL and
+ESEWA_VERIFY_URL, which benchmarks/payment_stub_server.py can stand in for.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from decimal import Decimal
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Provider transaction states -> payment status
+KHALTI_STATUSES = {
+    "completed": "completed",
+    "pending": "pending",
+    "initiated": "pending",
+    "refunded": "refunded",
+    "partially refunded": "refunded",
+    "expired": "expired",
+    "user canceled": "cancelled",
+}
+ESEWA_STATUSES = {
+    "COMPLETE": "completed",
+    "PENDING": "pending",
+    "AMBIGUOUS": "pending",
+    "FULL_REFUND": "refunded",
+    "PARTIAL_REFUND": "refunded",
+    "CANCELED": "cancelled",
+    "NOT_FOUND": "failed",
+}
+
+
+class GatewayError(Exception):
+    """The provider could not be asked (rate limited, circuit open, unreachable or failing)"""
+
+
+@dataclass(frozen=True)
+class Verification:
+    """What the provider reports for one transaction"""
+
+    status: str  # payment status: completed, pending, refunded, cancelled, expired, failed
+    amount: Decimal | None = None
+    reference: str | None = None  # provider's transaction id
+
+
+class TokenBucket:
+    """Allows `rate` calls per second with bursts of `burst`; callers queue for at most max_wait"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self, max_wait: float) -> None:
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        if wait > max_wait:
+            raise GatewayError("rate limit reached")
+        # Reserve the token now (the balance may go negative), so waiters queue in order
+        self.tokens -= 1
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets one trial call through: success
+    closes it, failure opens it again.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "open" or (state == "half_open" and self.trial_running):
+            raise GatewayError("circuit open")
+        if state == "half_open":
+            self.trial_running = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial_running or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+
+class SharedClient:
+    """One pooled httpx.AsyncClient for every gateway, created on first use"""
+
+    def __init__(self, max_connections: int = 20, timeout: float = 10.0, connect_timeout: float = 3.0,
+                 transport: httpx.AsyncBaseTransport | None = None):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=30.0,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class PaymentGateway(ABC):
+    """Base gateway: rate limit, circuit breaker and retries around one provider"""
+
+    name = "base"
+
+    def __init__(self, http: SharedClient | None = None, url: str = "", rate: float = 10.0, burst: int = 10,
+                 queue_timeout: float = 2.0, max_retries: int = 2, backoff_base: float = 0.2,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.http = http
+        self.url = url
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.limiter = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+
+    async def _request(self, method: str, **kwargs) -> httpx.Response:
+        """
+        One provider call. Returns the response when it is an answer about
+        the transaction (see is_answer). 429, 5xx and transport errors are
+        retried, then raise GatewayError; any other 4xx (bad credentials,
+        malformed request) raises GatewayError right away. Both count as
+        provider failures for the circuit breaker.
+        """
+        try:
+            self.breaker.before_call()
+        except GatewayError as exc:
+            self.rejected += 1
+            raise GatewayError(f"{self.name}: {exc}") from None
+        try:
+            await self.limiter.acquire(self.queue_timeout)
+        except GatewayError as exc:
+            self.rejected += 1
+            # A trial call that never ran must not hold the half-open slot
+            self.breaker.trial_running = False
+            raise GatewayError(f"{self.name}: {exc}") from None
+
+        self.requests += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await self.http.client.request(method, self.url, **kwargs)
+                    if self.is_answer(response):
+                        self.breaker.record_success()
+                        return response
+                    error = f"HTTP {response.status_code}"
+                    if response.status_code < 500 and response.status_code != 429:
+                        # Retrying the same request gets the same refusal
+                        self.failures += 1
+                        self.breaker.record_failure()
+                        raise GatewayError(f"{self.name}: {error}")
+                except httpx.TransportError as exc:
+                    error = exc.__class__.__name__
+                if attempt == self.max_retries:
+                    self.failures += 1
+                    self.breaker.record_failure()
+                    raise GatewayError(f"{self.name}: {error}")
+                self.retries += 1
+                logger.warning("%s verification failed (%s, attempt %d/%d), retrying",
+                               self.name, error, attempt + 1, self.max_retries + 1)
+                await asyncio.sleep(random.uniform(0, self.backoff_base * 2 ** attempt))
+        except asyncio.CancelledError:
+            # The caller went away mid-call: that says nothing about the provider
+            self.breaker.trial_running = False
+            raise
+
+    def is_answer(self, response: httpx.Response) -> bool:
+        """Whether the response says something about the transaction (rather than about our request)"""
+        return response.status_code < 400
+
+    def _malformed(self, response: httpx.Response) -> GatewayError:
+        """An answer that cannot be read counts as a provider failure"""
+        self.failures += 1
+        self.breaker.record_failure()
+        return GatewayError(f"{self.name}: malformed answer (HTTP {response.status_code})")
+
+    @abstractmethod
+    async def verify(self, transaction_id: str, amount: Decimal) -> Verification:
+        """Ask the provider about one transaction"""
+
+    def stats(self) -> dict:
+        return {
+            "gateway": self.name,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+class KhaltiGateway(PaymentGateway):
+    """Khalti payment verification (POST token + amount with the secret key)"""
+
+    name = "khalti"
+
+    def __init__(self, secret_key: str = "", **kwargs):
+        super().__init__(**kwargs)
+        self.secret_key = secret_key
+
+    @staticmethod
+    def _error_key(response: httpx.Response) -> str | None:
+        """Khalti's documented error answers: 400 validation_error, or 404 for a token it does not know"""
+        try:
+            body = response.json()
+        except ValueError:
+            return None
+        if not isinstance(body, dict):
+            return None
+        if response.status_code == 400 and body.get("error_key") == "validation_error":
+            return "validation_error"
+        if response.status_code == 404 and "detail" in body:
+            return "not_found"
+        return None
+
+    def is_answer(self, response: httpx.Response) -> bool:
+        return response.status_code < 400 or self._error_key(response) is not None
+
+    async def verify(self, transaction_id: str, amount: Decimal) -> Verification:
+        response = await self._request(
+            "POST",
+            data={"token": transaction_id, "amount": amount},
+            headers={"Authorization": f"Key {self.secret_key}"},
+        )
+        if response.status_code == 404:
+            # Khalti has no payment for this token
+            return Verification(status="failed")
+        if response.status_code >= 400:
+            # validation_error also covers an amount mismatch or a token Khalti has not
+            # settled yet, so it is no verdict: the payment stays pending and is asked about again
+            return Verification(status="pending")
+        try:
+            body = response.json()
+            state = str((body.get("state") or {}).get("name", "")).lower()
+            paid = body.get("amount")
+            return Verification(
+                status=KHALTI_STATUSES.get(state, "pending"),
+                amount=Decimal(str(paid)) if paid is not None else None,
+                reference=body.get("idx"),
+            )
+        except (ValueError, TypeError, AttributeError, ArithmeticError) as exc:
+            raise self._malformed(response) from exc
+
+
+class EsewaGateway(PaymentGateway):
+    """eSewa transaction status lookup by product code, amount and our transaction id"""
+
+    name = "esewa"
+
+    def __init__(self, merchant_code: str = "", **kwargs):
+        super().__init__(**kwargs)
+        self.merchant_code = merchant_code
+
+    async def verify(self, transaction_id: str, amount: Decimal) -> Verification:
+        response = await self._request("GET", params={
+            "product_code": self.merchant_code,
+            "total_amount": amount,
+            "transaction_uuid": transaction_id,
+        })
+        # eSewa reports unknown transactions as status NOT_FOUND in a 200 body
+        try:
+            body = response.json()
+            total = body.get("total_amount")
+            return Verification(
+                status=ESEWA_STATUSES.get(str(body.get("status", "")).upper(), "pending"),
+                amount=Decimal(str(total)) if total is not None else None,
+                reference=body.get("ref_id"),
+            )
+        except (ValueError, TypeError, AttributeError, ArithmeticError) as exc:
+            raise self._malformed(response) from exc
+
+
+class MockGateway(PaymentGateway):
+    """Offline gateway for development: every payment is completed for the expected amount"""
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+
+    async def verify(self, transaction_id: str, amount: Decimal) -> Verification:
+        await asyncio.sleep(0)
+        return Verification(status="completed", amount=amount, reference=transaction_id)
+
+    def stats(self) -> dict:
+        return {"gateway": self.name, "mode": "mock"}
+
+
+def create_gateways(transport: httpx.AsyncBaseTransport | None = None) -> tuple[SharedClient, dict]:
+    """Shared client and {name: gateway} configured by PAYMENT_* / provider environment variables"""
+    http = SharedClient(
+        max_connections=int(os.getenv("PAYMENT_MAX_CONNECTIONS", "20")),
+        timeout=float(os.getenv("PAYMENT_TIMEOUT", "10")),
+        connect_timeout=float(os.getenv("PAYMENT_CONNECT_TIMEOUT", "3")),
+        transport=transport,
+    )
+    mode = os.getenv("PAYMENT_GATEWAY", "mock").lower()
+    if mode == "mock":
+        return http, {"khalti": MockGateway("khalti"), "esewa": MockGateway("esewa")}
+    if mode != "live":
+        raise ValueError(f"Unknown PAYMENT_GATEWAY '{mode}'")
+
+    def limits(provider: str) -> dict:
+        rate = float(os.getenv(f"{provider}_RATE_LIMIT", "10"))
+        return {
+            "http": http,
+            "rate": rate,
+            "burst": max(1, int(rate)),
+            "queue_timeout": float(os.getenv("PAYMENT_QUEUE_TIMEOUT", "2")),
+            "max_retries": int(os.getenv("PAYMENT_MAX_RETRIES", "2")),
+            "failure_threshold": int(os.getenv("PAYMENT_BREAKER_THRESHOLD", "5")),
+            "reset_timeout": float(os.getenv("PAYMENT_BREAKER_RESET_SECONDS", "30")),
+        }
+
+    return http, {
+        "khalti": KhaltiGateway(
+            secret_key=os.getenv("KHALTI_SECRET_KEY", ""),
+            url=os.getenv("KHALTI_VERIFY_URL", "https://khalti.com/api/v2/payment/verify/"),
+            **limits("KHALTI"),
+        ),
+        "esewa": EsewaGateway(
+            merchant_code=os.getenv("ESEWA_MERCHANT_CODE", "EPAYTEST"),
+            url=os.getenv("ESEWA_VERIFY_URL", "https://uat.esewa.com.np/api/epay/transaction/status/"),
+            **limits("ESEWA"),
+        ),
+    }
+
+
+payment_http, gateways = create_gateways()
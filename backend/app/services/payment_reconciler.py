@@ -0,0 +1,219 @@
+"""
+Payment Reconciler
+Revisits payments still pending RECONCILE_MIN_AGE_MINUTES after they were
+initiated (the customer closed the tab, the webhook never arrived) and asks
+the provider what became of them.
+
+Each step takes one page of pending payments in (created_at, id) order via
+idx_payment_status_seek, verifies them with at most RECONCILE_CONCURRENCY
+provider calls in flight, applies the outcomes with one guarded UPDATE per
+status and saves the page's last position in job_checkpoints. A restarted
+worker continues from that position; a short page ends the pass and the
+next pass starts over from the oldest payment in the lookback window.
+
+Runs in-process every RECONCILE_INTERVAL_SECONDS when
+PAYMENT_RECONCILE_ENABLED=true, or as a one-off pass (cron), from backend/:
+    python -m app.services.payment_reconciler sweep
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from ..database.checkpoints import claim, release, save
+from ..database.connection import AsyncSessionLocal
+from ..database.pagination import decode_cursor, encode_cursor
+from ..database.payment_store import TRANSITIONS, apply_transitions, pending_payments
+from .payment_gateways import GatewayError, gateways
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "payment_reconciler"
+
+
+class PaymentReconciler:
+    """Checkpointed, rate-bounded pass over pending payments"""
+
+    def __init__(self, batch_size: int = 100, concurrency: int = 8, max_per_second: float = 0,
+                 min_age: timedelta = timedelta(minutes=15), lookback: timedelta = timedelta(hours=72),
+                 interval: float = 300.0, lease: timedelta = timedelta(minutes=10)):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_per_second = max_per_second
+        self.min_age = min_age
+        self.lookback = lookback
+        self.interval = interval
+        self.lease = lease
+        self._task: asyncio.Task | None = None
+        self.passes = 0
+        self.pages = 0
+        self.checked = 0
+        self.unverified = 0
+        self.mismatched = 0
+        self.applied = Counter()
+        self.last_pass_at: datetime | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name="payment-reconciler")
+
+    async def stop(self) -> None:
+        """Stop between or during pages; an unfinished page is redone from the last checkpoint"""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _verify(self, semaphore: asyncio.Semaphore, payment):
+        async with semaphore:
+            gateway = gateways.get(payment.payment_method)
+            if gateway is None:
+                return None
+            try:
+                return await gateway.verify(payment.transaction_id, payment.amount)
+            except GatewayError as e:
+                # Left pending; the next pass asks again
+                logger.warning("Reconcile %s: %s", payment.transaction_id, e)
+                return None
+            except Exception:
+                # A malformed answer must not sink the page: the rest still commits
+                # and the checkpoint moves past it
+                logger.exception("Reconcile %s: unreadable provider answer", payment.transaction_id)
+                return None
+
+    def _outcomes(self, page: list, verifications: list) -> dict[str, set[str]]:
+        """{target status: transaction ids} from the provider answers"""
+        wanted = defaultdict(set)
+        for payment, verification in zip(page, verifications):
+            if verification is None:
+                self.unverified += 1
+                continue
+            status = verification.status
+            if status not in TRANSITIONS:
+                continue  # still pending at the provider
+            if status in ("completed", "refunded") and verification.amount is not None \
+                    and verification.amount != payment.amount:
+                self.mismatched += 1
+                logger.warning("Reconcile %s: provider amount %s, expected %s",
+                               payment.transaction_id, verification.amount, payment.amount)
+                continue
+            wanted[status].add(payment.transaction_id)
+            if status == "refunded":
+                # Paid and refunded while we were not looking: record both steps
+                wanted["completed"].add(payment.transaction_id)
+        return wanted
+
+    async def reconcile_page(self) -> int | None:
+        """
+        Verify and settle one page from the checkpoint, returns the number of
+        payments looked at, or None while another worker holds the job
+        """
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            checkpoint = await claim(db, JOB_NAME, self.lease)
+            if checkpoint is None:
+                await db.rollback()
+                return None
+            after = decode_cursor(checkpoint.position, datetime, uuid.UUID) if checkpoint.position else None
+            page = await pending_payments(db, now - self.lookback, now - self.min_age, after, self.batch_size)
+            # Commit the lease and hold no connection while the providers answer
+            await db.commit()
+
+            try:
+                semaphore = asyncio.Semaphore(self.concurrency)
+                verifications = await asyncio.gather(*(self._verify(semaphore, p) for p in page))
+                applied = await apply_transitions(db, self._outcomes(page, verifications))
+                last = page[-1] if len(page) == self.batch_size else None
+                await save(db, JOB_NAME, encode_cursor(last.created_at, last.id) if last else None)
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                await release(db, JOB_NAME)
+                await db.commit()
+                raise
+
+        self.pages += 1
+        self.checked += len(page)
+        self.applied.update(status for _, status in applied)
+        if len(page) < self.batch_size:
+            self.passes += 1
+            self.last_pass_at = datetime.utcnow()
+        return len(page)
+
+    async def sweep(self) -> None:
+        """Run pages until the pass ends (or another worker holds the job)"""
+        while True:
+            started = time.monotonic()
+            handled = await self.reconcile_page()
+            if handled is None or handled < self.batch_size:
+                return
+            if self.max_per_second > 0:
+                await asyncio.sleep(max(0.0, handled / self.max_per_second - (time.monotonic() - started)))
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "passes": self.passes,
+            "pages": self.pages,
+            "checked": self.checked,
+            "applied": dict(self.applied),
+            "unverified": self.unverified,
+            "amount_mismatches": self.mismatched,
+            "last_pass_at": self.last_pass_at.isoformat() if self.last_pass_at else None,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Payment reconciliation failed")
+            await asyncio.sleep(self.interval)
+
+
+PAYMENT_RECONCILE_ENABLED = os.getenv("PAYMENT_RECONCILE_ENABLED", "false").lower() == "true"
+
+payment_reconciler = PaymentReconciler(
+    batch_size=int(os.getenv("RECONCILE_BATCH_SIZE", "100")),
+    concurrency=int(os.getenv("RECONCILE_CONCURRENCY", "8")),
+    max_per_second=float(os.getenv("RECONCILE_MAX_PER_SECOND", "0")),
+    min_age=timedelta(minutes=float(os.getenv("RECONCILE_MIN_AGE_MINUTES", "15"))),
+    lookback=timedelta(hours=float(os.getenv("RECONCILE_LOOKBACK_HOURS", "72"))),
+    interval=float(os.getenv("RECONCILE_INTERVAL_SECONDS", "300")),
+)
+
+
+async def main() -> int:
+    from ..database.connection import async_engine
+    from .payment_gateways import payment_http
+
+    parser = argparse.ArgumentParser(description="Reconcile pending payments with the providers")
+    parser.add_argument("command", choices=["sweep"])
+    parser.parse_args()
+
+    try:
+        await payment_reconciler.sweep()
+        print(f"✓ {payment_reconciler.checked} pending payments checked: {payment_reconciler.stats()}")
+        return 0
+    finally:
+        await payment_http.aclose()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,130 @@
+"""
+Chat Reply Cache
+Answers repeated questions without calling the LLM: exact match on the
+normalized message, then optional similarity match on character trigram
+sets (cosine). Candidates come from an inverted trigram index probed with
+prefix filtering, so only keys sharing one of the query's rarest trigrams
+are scored.
+
+Storage, LRU/TTL eviction and the byte cap come from TTLCache.
+"""
+
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+from .cache import TTLCache
+
+NGRAM = 3
+# Slack for comparing float similarity bounds against exact trigram counts
+EPSILON = 1e-9
+
+
+def normalize(message: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a message"""
+    text = unicodedata.normalize("NFKC", message).casefold()
+    return " ".join(re.findall(r"\w+", text))
+
+
+def ngrams(text: str) -> frozenset:
+    """Set of character n-grams of the space-padded text"""
+    padded = f" {text} "
+    return frozenset(padded[i:i + NGRAM] for i in range(max(len(padded) - NGRAM + 1, 1)))
+
+
+class ReplyCache:
+    """Exact + similarity cache of AI replies keyed by the user's message"""
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 4 * 1024 * 1024, ttl: float = 3600.0,
+                 similarity: float = 0.9):
+        self.similarity = similarity
+        self._cache = TTLCache(max_entries, max_bytes, ttl, on_remove=self._unindex)
+        self._grams: dict[str, frozenset] = {}
+        self._index: dict[str, set[str]] = defaultdict(set)
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def lookup(self, message: str) -> str | None:
+        """Cached reply for this message or a sufficiently similar one"""
+        key = normalize(message)
+        if not key:
+            return None
+        reply = self._cache.get(key)
+        if reply is not None:
+            self.exact_hits += 1
+            return reply
+        if self.similarity > 0:
+            match = self._nearest(key)
+            if match is not None:
+                reply = self._cache.get(match)
+                if reply is not None:
+                    self.similar_hits += 1
+                    return reply
+        self.misses += 1
+        return None
+
+    def store(self, message: str, reply: str) -> None:
+        key = normalize(message)
+        if not key or not reply:
+            return
+        self._cache.set(key, reply, size=len(key) + len(reply.encode()))
+        if key in self._cache and key not in self._grams:
+            grams = ngrams(key)
+            self._grams[key] = grams
+            for gram in grams:
+                self._index[gram].add(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _nearest(self, key: str) -> str | None:
+        """Best cached key with cosine similarity >= threshold"""
+        grams = ngrams(key)
+        n = len(grams)
+        squared = self.similarity ** 2
+        # cos(A, B) = |A & B| / sqrt(|A| |B|) >= t implies |A & B| >= t^2 |A|, so a match
+        # must contain at least one of the n - ceil(t^2 n) + 1 rarest query trigrams
+        probe = n - math.ceil(squared * n - EPSILON) + 1
+        postings = sorted((self._index.get(gram, ()) for gram in grams), key=len)[:probe]
+        # The same bound on |B| (t^2 |A| <= |B| <= |A| / t^2) rejects candidates before intersecting;
+        # every bound gives EPSILON of slack so float rounding (0.8 ** 2 > 0.64) keeps exact-threshold matches
+        low, high = squared * n - EPSILON, n / squared + EPSILON
+        best, best_score = None, self.similarity - EPSILON
+        for candidate in set().union(*postings):
+            other = self._grams[candidate]
+            if not low <= len(other) <= high:
+                continue
+            score = len(grams & other) / math.sqrt(n * len(other))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _unindex(self, key: str) -> None:
+        grams = self._grams.pop(key, None)
+        if grams is None:
+            return
+        for gram in grams:
+            keys = self._index.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[gram]
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        hits = self.exact_hits + self.similar_hits
+        cache = self._cache.stats()
+        return {
+            "entries": cache["entries"],
+            "bytes": cache["bytes"],
+            "max_bytes": cache["max_bytes"],
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "similarity_threshold": self.similarity,
+            "evictions": cache["evictions"],
+            "expirations": cache["expirations"],
+        }
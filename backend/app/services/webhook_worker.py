@@ -0,0 +1,180 @@
+"""
+Payment Webhook Worker
+Applies queued payment notifications (database/webhook_store.py) in
+batches from a background task. Webhook handlers only insert the event and
+wake the worker, so a burst of notifications costs one INSERT each instead
+of a lookup-and-commit round trip per POST.
+
+Anyone can POST a webhook, so an event only triggers a verification: the
+worker asks the payment's gateway and applies the status it confirms. While
+a gateway cannot be asked (outage, open circuit) its events stay queued and
+are retried on the next poll; a payment the provider does not confirm (an
+unknown transaction, an amount mismatch) is left alone and the event is
+recorded as unverified.
+
+The queue lives in the database, so events survive restarts and a batch
+interrupted by shutdown is simply picked up again. The worker also polls,
+which catches events queued by other processes.
+"""
+
+import asyncio
+import logging
+import os
+
+from ..database.connection import AsyncSessionLocal
+from ..database.webhook_store import apply_verified, pending_events, queue_stats
+from .payment_gateways import GatewayError, gateways
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookWorker:
+    """Drains payment_webhook_events in batches"""
+
+    def __init__(self, batch_size: int = 500, poll_interval: float = 1.0, concurrency: int = 8):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.processed = 0
+        self.applied = 0
+        self.skipped = 0
+        self.unverified = 0
+        self.deferred = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def notify(self) -> None:
+        """Wake the worker after queueing an event"""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="webhook-worker")
+
+    async def stop(self) -> None:
+        """Stop between or during batches; an unfinished batch rolls back and stays queued"""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _verify(self, semaphore: asyncio.Semaphore, event) -> str | None:
+        """Status the provider confirms for the event's payment, None if it does not confirm it"""
+        gateway = gateways.get(event.provider)
+        if gateway is None or event.amount is None:
+            return None
+        async with semaphore:
+            try:
+                verification = await gateway.verify(event.transaction_id, event.amount)
+            except GatewayError:
+                raise
+            except Exception:
+                logger.exception("Webhook %s: unreadable provider answer", event.transaction_id)
+                return None
+        if verification.status in ("completed", "refunded") and verification.amount is not None \
+                and verification.amount != event.amount:
+            logger.warning("Webhook %s: provider amount %s, expected %s",
+                           event.transaction_id, verification.amount, event.amount)
+            return None
+        return verification.status
+
+    async def _verdicts(self, events: list) -> dict[str, str | None]:
+        """Ask the providers about every payment in the batch; those that could not be asked are left out"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        unique = list({event.transaction_id: event for event in events}.values())
+        answers = await asyncio.gather(*(self._verify(semaphore, e) for e in unique), return_exceptions=True)
+        verdicts = {}
+        for event, answer in zip(unique, answers):
+            if isinstance(answer, GatewayError):
+                logger.warning("Webhook %s: %s, left queued", event.transaction_id, answer)
+            elif isinstance(answer, BaseException):
+                raise answer
+            else:
+                verdicts[event.transaction_id] = answer
+        return verdicts
+
+    async def process_batch(self) -> int:
+        """
+        Verify and apply one batch, returns the number of events processed
+        (events whose gateway could not be asked stay queued and are not counted)
+        """
+        async with AsyncSessionLocal() as db:
+            events = await pending_events(db, self.batch_size)
+            # Hold no connection while the providers answer
+            await db.commit()
+            if not events:
+                return 0
+            verdicts = await self._verdicts(events)
+            result = await apply_verified(db, events, verdicts)
+            await db.commit()
+        self.deferred += sum(1 for event in events if event.transaction_id not in verdicts)
+        if result["events"]:
+            self.processed += result["events"]
+            self.applied += result["applied"]
+            self.skipped += result["skipped"]
+            self.unverified += result["unverified"]
+            self.batches += 1
+            self.last_lag_seconds = result["max_lag_seconds"]
+            self.max_lag_seconds = max(self.max_lag_seconds, result["max_lag_seconds"])
+        return result["events"]
+
+    async def drain(self) -> None:
+        """Process batches until the queue is empty"""
+        while await self.process_batch():
+            pass
+
+    async def stats(self) -> dict:
+        async with AsyncSessionLocal() as db:
+            queue = await queue_stats(db)
+        return {
+            "running": self.running,
+            "queue_depth": queue["depth"],
+            "oldest_pending_seconds": round(queue["oldest_age_seconds"], 3),
+            "processed": self.processed,
+            "applied": self.applied,
+            "skipped": self.skipped,
+            "unverified": self.unverified,
+            "deferred": self.deferred,
+            "batches": self.batches,
+            "failures": self.failures,
+            "last_batch_lag_seconds": round(self.last_lag_seconds, 3),
+            "max_batch_lag_seconds": round(self.max_lag_seconds, 3),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                taken = await self.process_batch()
+            except Exception:
+                # Lock contention, lost connection...: the batch stays queued for the next round
+                self.failures += 1
+                logger.exception("Webhook batch failed")
+                taken = 0
+            if taken == self.batch_size:
+                continue  # Backlog: go straight to the next batch
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+webhook_worker = WebhookWorker(
+    batch_size=int(os.getenv("WEBHOOK_BATCH_SIZE", "500")),
+    poll_interval=int(os.getenv("WEBHOOK_POLL_INTERVAL_MS", "1000")) / 1000,
+    concurrency=int(os.getenv("WEBHOOK_VERIFY_CONCURRENCY", "8")),
+)
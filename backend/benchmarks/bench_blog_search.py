@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Blog Full-Text Search Benchmark
+Seeds the configured database up to N published posts, then reports search latency percentiles
+
+Usage (from backend/, point DATABASE_URL at a scratch database):
+    DATABASE_URL=sqlite:///./bench_search.db python benchmarks/bench_blog_search.py --posts 100000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, insert, select
+
+from app.database.connection import AsyncSessionLocal, Base, async_engine
+from app.database.ids import uuid7
+from app.database.models import BlogPost
+from app.database.search import install_search_index, search_posts
+
+VOCABULARY = (
+    "ai automation agent workflow payment khalti esewa nepal chatbot model data pipeline "
+    "dashboard analytics startup founder pricing integration api cloud deploy security "
+    "invoice customer support language vision search index latency scale python fastapi "
+    "react nextjs database postgres cache queue worker billing report growth marketing"
+).split()
+
+QUERIES = ["automation", "payment khalti", "ai agent workflow", "postgres index latency",
+           "customer support chatbot", "pric", "nepal esewa billing", "react dashboard"]
+
+
+def fake_post(i: int) -> dict:
+    words = random.choices(VOCABULARY, k=60)
+    return {
+        "id": uuid7(),
+        "title": " ".join(random.choices(VOCABULARY, k=5)).title(),
+        "slug": f"bench-post-{i}",
+        "content": " ".join(words),
+        "featured": random.random() < 0.8,
+        "author": "bench",
+    }
+
+
+async def seed(target: int, batch: int = 2000) -> int:
+    """Insert posts until the table holds `target` rows"""
+    async with AsyncSessionLocal() as db:
+        existing = await db.scalar(select(func.count()).select_from(BlogPost))
+        for start in range(existing, target, batch):
+            rows = [fake_post(i) for i in range(start, min(start + batch, target))]
+            await db.execute(insert(BlogPost), rows)
+            await db.commit()
+        return max(existing, target)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    random.seed(42)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(install_search_index)
+
+    started = time.perf_counter()
+    total = await seed(args.posts)
+    print(f"  {total} posts ready ({time.perf_counter() - started:.1f}s seeding)")
+
+    async with AsyncSessionLocal() as db:
+        for q in QUERIES:
+            timings = []
+            for i in range(args.iterations):
+                t0 = time.perf_counter()
+                results = await search_posts(db, q, limit=args.limit, offset=(i % 5) * args.limit)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"  {q!r:28} p50={statistics.median(timings):7.2f}ms "
+                  f"p95={p95:7.2f}ms hits/page={len(results)}")
+
+    await async_engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
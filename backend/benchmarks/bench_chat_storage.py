@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Chat Storage Benchmark
+Seeds the legacy chat_sessions table, copies it the way 0002_chat_conversations
+does, then compares table/index size and chat history latency of the legacy
+and the normalized schema
+
+Usage (from backend/, point DATABASE_URL at a scratch database):
+    DATABASE_URL=sqlite:///./bench_chat.db python benchmarks/bench_chat_storage.py --messages 200000 --sessions 20000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import Column, Index, MetaData, String, Table, Text, bindparam, func, insert, select, text
+
+from app.database.connection import AsyncSessionLocal, Base, async_engine
+from app.database.models import ChatConversation, ChatMessage, Timestamp
+
+LEGACY_TABLES = ["chat_sessions"]
+NEW_TABLES = ["chat_conversations", "chat_messages"]
+
+# The pre-migration table, as 0001_baseline creates it
+legacy_metadata = MetaData()
+legacy_chat_sessions = Table(
+    "chat_sessions",
+    legacy_metadata,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("session_id", String(36), nullable=False, index=True),
+    Column("user_message", Text, nullable=False),
+    Column("ai_reply", Text, nullable=False),
+    Column("user_info", String(255)),
+    Column("created_at", Timestamp, server_default=func.now(), nullable=False, index=True),
+    Index("idx_chat_session", "session_id"),
+    Index("idx_chat_created", "created_at"),
+)
+
+# Same copy as 0002_chat_conversations, with the ids already in the Uuid storage format
+COPY_STATEMENTS = [
+    """INSERT INTO chat_conversations
+        (session_key, message_count, created_at, last_message_at, summary, summarized_turns)
+    SELECT session_id, count(*), min(created_at), max(created_at), '', 0
+    FROM chat_sessions GROUP BY session_id ORDER BY min(created_at), session_id""",
+    """INSERT INTO chat_messages (id, conversation_id, user_message, ai_reply, created_at)
+    SELECT {id}, c.id, s.user_message, s.ai_reply, s.created_at
+    FROM chat_sessions s JOIN chat_conversations c ON c.session_key = s.session_id""",
+]
+
+
+async def seed_legacy(messages: int, sessions: int, batch: int = 5000) -> list[str]:
+    session_ids = [str(uuid.uuid4()) for _ in range(sessions)]
+    started = datetime.utcnow() - timedelta(days=90)
+    async with AsyncSessionLocal() as db:
+        existing = await db.scalar(select(func.count()).select_from(legacy_chat_sessions))
+        for start in range(existing, messages, batch):
+            await db.execute(insert(legacy_chat_sessions), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "session_id": random.choice(session_ids),
+                    "user_message": "How much would a custom chatbot cost for my store?",
+                    "ai_reply": "We offer custom pricing based on your project requirements.",
+                    "user_info": "user",
+                    "created_at": started + timedelta(seconds=i * 30),
+                }
+                for i in range(start, min(start + batch, messages))
+            ])
+            await db.commit()
+        rows = await db.execute(select(legacy_chat_sessions.c.session_id).distinct())
+        return [row[0] for row in rows]
+
+
+async def migrate() -> int:
+    """Copy chat_sessions into the new tables, returns the messages copied"""
+    async with async_engine.begin() as conn:
+        new_id = "s.id::uuid" if conn.dialect.name == "postgresql" else "lower(replace(s.id, '-', ''))"
+        await conn.execute(text(COPY_STATEMENTS[0]))
+        result = await conn.execute(text(COPY_STATEMENTS[1].format(id=new_id)))
+        return result.rowcount
+
+
+async def sizes(tables: list[str]) -> dict:
+    """(table bytes, index bytes) per table"""
+    async with async_engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            result = {}
+            for table in tables:
+                row = (await conn.execute(
+                    text("SELECT pg_table_size(:t), pg_indexes_size(:t)"), {"t": table}
+                )).one()
+                result[table] = (row[0], row[1])
+            return result
+
+        # SQLite: dbstat attributes every b-tree page to its table or index
+        rows = (await conn.execute(text(
+            "SELECT m.tbl_name, m.type, SUM(s.pgsize) FROM dbstat s "
+            "JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name, m.type"
+        ))).all()
+        result = {table: [0, 0] for table in tables}
+        for table, kind, size in rows:
+            if table in result:
+                result[table][0 if kind == "table" else 1] += size
+        return {table: tuple(value) for table, value in result.items()}
+
+
+async def time_queries(statement, session_ids: list[str], iterations: int) -> list[float]:
+    """Statements are built once so the timings compare query execution, not SQL construction"""
+    timings = []
+    async with AsyncSessionLocal() as db:
+        for session_id in random.sample(session_ids, min(iterations, len(session_ids))):
+            t0 = time.perf_counter()
+            (await db.execute(statement, {"session_id": session_id})).all()
+            timings.append((time.perf_counter() - t0) * 1000)
+    return sorted(timings)
+
+
+LEGACY_HISTORY = (
+    select(legacy_chat_sessions)
+    .where(legacy_chat_sessions.c.session_id == bindparam("session_id"))
+    .order_by(legacy_chat_sessions.c.created_at)
+    .limit(50)
+)
+
+# Same statement as GET /ai/chat/history/{session_id}
+NEW_HISTORY = (
+    select(ChatMessage.id, ChatMessage.user_message, ChatMessage.ai_reply, ChatMessage.created_at)
+    .join(ChatConversation, ChatConversation.id == ChatMessage.conversation_id)
+    .where(ChatConversation.session_key == bindparam("session_id"))
+    .order_by(ChatMessage.created_at)
+    .limit(50)
+)
+
+
+def report(label: str, timings: list[float]) -> None:
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"  {label:8} history p50={statistics.median(timings):6.3f}ms p95={p95:6.3f}ms")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--sessions", type=int, default=20_000)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    random.seed(42)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(legacy_metadata.create_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    t0 = time.perf_counter()
+    session_ids = await seed_legacy(args.messages, args.sessions)
+    print(f"  seeded legacy table ({time.perf_counter() - t0:.1f}s)")
+    t0 = time.perf_counter()
+    print(f"  migrated {await migrate()} messages ({time.perf_counter() - t0:.1f}s)")
+
+    for label, tables in (("legacy", LEGACY_TABLES), ("new", NEW_TABLES)):
+        measured = await sizes(tables)
+        data = sum(size[0] for size in measured.values())
+        indexes = sum(size[1] for size in measured.values())
+        print(f"  {label:8} table={data / 1e6:8.2f}MB indexes={indexes / 1e6:8.2f}MB  {measured}")
+
+    report("legacy", await time_queries(LEGACY_HISTORY, session_ids, args.iterations))
+    report("new", await time_queries(NEW_HISTORY, session_ids, args.iterations))
+
+    await async_engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
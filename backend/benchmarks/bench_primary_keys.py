@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Primary Key Benchmark
+Insert throughput and index size of contacts, payments and chat_messages with
+String(36) uuid4 keys (the old schema), native uuid4 keys and native uuid7 keys
+
+Every variant is a scratch copy of the real table (same columns and secondary
+indexes) named bench_<table>_<variant>, dropped again afterwards. Rows go in
+committed batches; "tail" is the throughput of the last 10% of batches, where
+random keys hurt most because the primary key index no longer fits in cache.
+
+Usage (from backend/, point DATABASE_URL at a scratch database):
+    DATABASE_URL=sqlite:///./bench_keys.db python benchmarks/bench_primary_keys.py --rows 200000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import Column, Index, MetaData, String, Table, Uuid, insert, text
+
+from app.database.connection import async_engine
+from app.database.ids import uuid7
+from app.database.models import ChatMessage, Contact, Payment
+
+VARIANTS = {
+    "str_uuid4": (String(36), lambda: str(uuid.uuid4())),
+    "uuid4": (Uuid(), uuid.uuid4),
+    "uuid7": (Uuid(), uuid7),
+}
+
+
+def contact_row(i: int, created_at: datetime) -> dict:
+    return {
+        "name": f"Visitor {i}",
+        "email": f"visitor{i % 5000}@example.com",
+        "project": "We need a chatbot for our online store with Nepali language support.",
+        "phone": "9800000000",
+        "budget": "50000",
+        "created_at": created_at,
+    }
+
+
+def payment_row(i: int, created_at: datetime) -> dict:
+    return {
+        "transaction_id": str(uuid.uuid4()),
+        "customer_name": f"Customer {i}",
+        "customer_email": f"customer{i % 5000}@example.com",
+        "amount": 1000.0 + i % 100,
+        "currency": "NPR",
+        "status": random.choice(("pending", "completed", "failed")),
+        "payment_method": random.choice(("khalti", "esewa")),
+        "description": "Website package",
+        "return_url": "http://localhost:3000/payment/success",
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def chat_row(i: int, created_at: datetime) -> dict:
+    return {
+        "conversation_id": i // 10,
+        "user_message": "How much would a custom chatbot cost for my store?",
+        "ai_reply": "We offer custom pricing based on your project requirements.",
+        "created_at": created_at,
+    }
+
+
+TARGETS = [(Contact, contact_row), (Payment, payment_row), (ChatMessage, chat_row)]
+
+
+def scratch_table(metadata: MetaData, source: Table, variant: str) -> Table:
+    """Copy of `source` with the given id type; foreign keys are left out"""
+    id_type, _ = VARIANTS[variant]
+    name = f"bench_{source.name}_{variant}"
+    columns = [Column("id", id_type, primary_key=True)]
+    columns += [
+        Column(c.name, c.type, nullable=c.nullable)
+        for c in source.columns if c.name != "id"
+    ]
+    table = Table(name, metadata, *columns)
+    for index in source.indexes:
+        Index(f"{name}_{index.name}", *(table.c[c.name] for c in index.columns), unique=index.unique)
+    return table
+
+
+async def load(table: Table, make_row, new_id, rows: int, batch: int) -> tuple[float, float]:
+    """Insert `rows` rows, returns (overall rows/s, tail rows/s)"""
+    started = datetime.utcnow() - timedelta(days=90)
+    tail_from = rows - rows // 10
+    total_time = tail_time = 0.0
+    tail_rows = 0
+    for start in range(0, rows, batch):
+        values = [
+            {"id": new_id(), **make_row(i, started + timedelta(seconds=i))}
+            for i in range(start, min(start + batch, rows))
+        ]
+        t0 = time.perf_counter()
+        async with async_engine.begin() as conn:
+            await conn.execute(insert(table), values)
+        elapsed = time.perf_counter() - t0
+        total_time += elapsed
+        if start >= tail_from:
+            tail_time += elapsed
+            tail_rows += len(values)
+    return rows / total_time, tail_rows / tail_time if tail_time else 0.0
+
+
+async def sizes(table: str) -> tuple[int, int]:
+    """(table bytes, index bytes)"""
+    async with async_engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            row = (await conn.execute(
+                text("SELECT pg_table_size(:t), pg_indexes_size(:t)"), {"t": table}
+            )).one()
+            return row[0], row[1]
+        rows = (await conn.execute(text(
+            "SELECT m.type, SUM(s.pgsize) FROM dbstat s "
+            "JOIN sqlite_master m ON m.name = s.name WHERE m.tbl_name = :t GROUP BY m.type"
+        ), {"t": table})).all()
+        by_type = dict(rows)
+        return by_type.get("table", 0), by_type.get("index", 0)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    metadata = MetaData()
+    tables = [
+        (source.__table__.name, variant, scratch_table(metadata, source.__table__, variant), make_row)
+        for source, make_row in TARGETS
+        for variant in VARIANTS
+    ]
+    async with async_engine.begin() as conn:
+        await conn.run_sync(metadata.drop_all)
+        await conn.run_sync(metadata.create_all)
+
+    try:
+        for source, variant, table, make_row in tables:
+            overall, tail = await load(table, make_row, VARIANTS[variant][1], args.rows, args.batch)
+            data, indexes = await sizes(table.name)
+            print(f"  {source:14} {variant:10} {overall:9.0f} rows/s  tail={tail:9.0f} rows/s  "
+                  f"table={data / 1e6:7.2f}MB indexes={indexes / 1e6:7.2f}MB")
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(metadata.drop_all)
+        await async_engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Sync vs Async Database Path Benchmark
+Compares requests/sec of a threadpool-bound sync handler against the async session handler
+
+Usage (from backend/):
+    python benchmarks/bench_sync_vs_async.py --requests 2000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database.connection import Base, async_engine, get_async_db, get_db
+from app.database.models import Contact
+
+
+def build_app() -> FastAPI:
+    """Minimal app exposing the same query through both session types"""
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_count(db: Session = Depends(get_db)):
+        return {"total": db.scalar(select(func.count()).select_from(Contact))}
+
+    @app.get("/async")
+    async def async_count(db: AsyncSession = Depends(get_async_db)):
+        return {"total": await db.scalar(select(func.count()).select_from(Contact))}
+
+    return app
+
+
+async def run_path(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> float:
+    """Fire `total` requests at `path` with bounded concurrency, return requests/sec"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - started)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up both pools before measuring
+        await run_path(client, "/sync", 50, 10)
+        await run_path(client, "/async", 50, 10)
+
+        sync_rps = await run_path(client, "/sync", args.requests, args.concurrency)
+        async_rps = await run_path(client, "/async", args.requests, args.concurrency)
+
+    print(f"  requests={args.requests} concurrency={args.concurrency}")
+    print(f"  sync  (threadpool + Session):     {sync_rps:10.1f} req/s")
+    print(f"  async (event loop + AsyncSession): {async_rps:10.1f} req/s")
+    print(f"  speedup: {async_rps / sync_rps:.2f}x")
+
+    await async_engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
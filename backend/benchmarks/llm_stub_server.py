@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+LLM Stub Server
+Minimal OpenAI-compatible /v1/chat/completions endpoint with configurable latency and failures
+
+Point the backend at it with LLM_PROVIDER=openai LLM_BASE_URL=http://127.0.0.1:8001/v1,
+or mount create_app() in-process through httpx.ASGITransport (test_llm_client.py).
+Tests script failures with app.state.fail_next / fail_status / retry_after.
+
+Usage (from backend/):
+    python benchmarks/llm_stub_server.py --port 8001 --first-token-ms 300 --token-ms 20 --fail-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def create_app(first_token_ms: float = 0.0, token_ms: float = 0.0, fail_rate: float = 0.0,
+               reply: str = "This is a stubbed reply from the local LLM server.") -> FastAPI:
+    """Stub app; fail_rate is the share of requests answered with 503 + Retry-After"""
+    app = FastAPI(title="LLM Stub")
+    app.state.requests = 0
+    app.state.failures = 0
+    app.state.in_flight = 0
+    app.state.peak_in_flight = 0
+    # Scripted failures: the next `fail_next` requests get fail_status with this Retry-After
+    app.state.fail_next = 0
+    app.state.fail_status = 503
+    app.state.retry_after = "0"
+    app.state.request_times = []
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        app.state.requests += 1
+        app.state.request_times.append(time.monotonic())
+        if app.state.fail_next > 0:
+            app.state.fail_next -= 1
+            app.state.failures += 1
+            return JSONResponse({"error": {"message": "scripted failure"}}, status_code=app.state.fail_status,
+                                headers={"Retry-After": app.state.retry_after})
+        if random.random() < fail_rate:
+            app.state.failures += 1
+            return JSONResponse({"error": {"message": "overloaded"}}, status_code=503,
+                                headers={"Retry-After": "0"})
+
+        prompt = payload["messages"][-1]["content"]
+        tokens = f"{reply} You said: {prompt}".split(" ")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        async def tracked(body):
+            app.state.in_flight += 1
+            app.state.peak_in_flight = max(app.state.peak_in_flight, app.state.in_flight)
+            try:
+                await asyncio.sleep(first_token_ms / 1000)
+                async for part in body:
+                    yield part
+            finally:
+                app.state.in_flight -= 1
+
+        async def deltas():
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(token_ms / 1000)
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": payload.get("model"),
+                    "choices": [{"index": 0, "delta": {"content": token if i == 0 else f" {token}"}}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        if payload.get("stream"):
+            return StreamingResponse(tracked(deltas()), media_type="text/event-stream")
+
+        async for _ in tracked(deltas()):
+            pass
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(tokens)},
+                         "finish_reason": "stop"}],
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "requests": app.state.requests,
+            "failures": app.state.failures,
+            "in_flight": app.state.in_flight,
+            "peak_in_flight": app.state.peak_in_flight,
+        }
+
+    return app
+
+
+def main() -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_app(args.first_token_ms, args.token_ms, args.fail_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
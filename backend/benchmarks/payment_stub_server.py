@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Payment Provider Stub Server
+Minimal Khalti verify and eSewa transaction status endpoints with configurable latency and failures
+
+Point the backend at it with PAYMENT_GATEWAY=live
+KHALTI_VERIFY_URL=http://127.0.0.1:8002/api/v2/payment/verify/
+ESEWA_VERIFY_URL=http://127.0.0.1:8002/api/epay/transaction/status/,
+or mount create_app() in-process through httpx.ASGITransport.
+
+Every payment is reported completed for the amount asked about, except
+Khalti tokens starting with "invalid" (400) and eSewa transaction ids
+starting with "missing" (NOT_FOUND). Set app.state.reject_credentials to
+answer 401 as for a wrong secret key or merchant code.
+
+Usage (from backend/):
+    python benchmarks/payment_stub_server.py --port 8002 --latency-ms 200 --fail-rate 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(latency_ms: float = 0.0, fail_rate: float = 0.0) -> FastAPI:
+    """Stub app; fail_rate is the share of requests answered with 503"""
+    app = FastAPI(title="Payment Provider Stub")
+    app.state.requests = 0
+    app.state.failures = 0
+    app.state.in_flight = 0
+    app.state.peak_in_flight = 0
+    # Set to True to fail every request (provider outage)
+    app.state.down = False
+    # Set to True to answer 401 to every request (misconfigured credentials)
+    app.state.reject_credentials = False
+
+    async def respond(body: dict, status_code: int = 200) -> JSONResponse:
+        app.state.requests += 1
+        app.state.in_flight += 1
+        app.state.peak_in_flight = max(app.state.peak_in_flight, app.state.in_flight)
+        try:
+            await asyncio.sleep(latency_ms / 1000)
+        finally:
+            app.state.in_flight -= 1
+        if app.state.down or random.random() < fail_rate:
+            app.state.failures += 1
+            return JSONResponse({"detail": "Service unavailable"}, status_code=503)
+        if app.state.reject_credentials:
+            return JSONResponse({"detail": "Invalid authentication credentials"}, status_code=401)
+        return JSONResponse(body, status_code=status_code)
+
+    @app.post("/api/v2/payment/verify/")
+    async def khalti_verify(request: Request):
+        form = await request.form()
+        token, amount = form.get("token", ""), int(float(form.get("amount", 0)))
+        if token.startswith("invalid"):
+            return await respond({"detail": "Invalid token.", "error_key": "validation_error"}, 400)
+        return await respond({
+            "idx": uuid.uuid4().hex[:22],
+            "token": token,
+            "amount": amount,
+            "state": {"idx": uuid.uuid4().hex[:22], "name": "Completed", "template": "is complete"},
+        })
+
+    @app.get("/api/epay/transaction/status/")
+    async def esewa_status(product_code: str, total_amount: float, transaction_uuid: str):
+        status = "NOT_FOUND" if transaction_uuid.startswith("missing") else "COMPLETE"
+        return await respond({
+            "product_code": product_code,
+            "transaction_uuid": transaction_uuid,
+            "total_amount": total_amount,
+            "status": status,
+            "ref_id": uuid.uuid4().hex[:10].upper() if status == "COMPLETE" else None,
+        })
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "requests": app.state.requests,
+            "failures": app.state.failures,
+            "in_flight": app.state.in_flight,
+            "peak_in_flight": app.state.peak_in_flight,
+        }
+
+    return app
+
+
+def main() -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.fail_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Alembic environment
+Runs migrations over the app's async driver (psycopg 3 / aiosqlite) against
+ASYNC_DATABASE_URL, or the sqlalchemy.url option when one is set (tests).
+Each revision runs in its own transaction, so a revision that builds indexes
+CONCURRENTLY can leave its transaction with autocommit_block().
+"""
+
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.connection import ASYNC_DATABASE_URL, Base
+from app.database import models  # noqa: F401 - registers the tables on Base
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+database_url = config.get_main_option("sqlalchemy.url") or ASYNC_DATABASE_URL
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Leave the SQLite full-text table and its FTS5 shadow tables out of autogenerate/check"""
+    return not (type_ == "table" and reflected and name.startswith("blog_posts_fts"))
+
+
+def run_migrations_offline() -> None:
+    """Emit the SQL to stdout instead of running it (alembic upgrade head --sql)"""
+    context.configure(
+        url=database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_object=include_object,
+        dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+        render_as_batch=connection.dialect.name == "sqlite",
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    engine = create_async_engine(database_url, poolclass=pool.NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_async_migrations())
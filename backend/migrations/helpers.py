@@ -0,0 +1,40 @@
+"""
+Operations shared by revisions
+
+Index changes on existing tables go through create_index_online /
+drop_index_online. On PostgreSQL they run CONCURRENTLY, so writes to the
+table continue while the index builds. CONCURRENTLY cannot run inside a
+transaction, so both step out of the revision's transaction with
+autocommit_block(). Put them after any transactional DDL in a revision,
+because everything before them is committed first.
+
+A concurrent build that fails (deadlock, cancel, duplicate key) leaves an
+INVALID index behind. create_index_online drops it before retrying, so
+rerunning `alembic upgrade head` is enough.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+def _invalid_index(bind, name: str) -> bool:
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first() is not None
+
+
+def create_index_online(name: str, table: str, columns: list, **kw) -> None:
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS (plain CREATE INDEX IF NOT EXISTS on SQLite)"""
+    context = op.get_context()
+    with context.autocommit_block():
+        # Nothing to inspect when only emitting SQL (alembic upgrade --sql)
+        if context.dialect.name == "postgresql" and not context.as_sql and _invalid_index(op.get_bind(), name):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True, **kw)
+
+
+def drop_index_online(name: str, table: str) -> None:
+    """DROP INDEX CONCURRENTLY IF EXISTS (plain DROP INDEX IF EXISTS on SQLite)"""
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,100 @@
+"""Baseline: the schema create_all built before migrations were introduced
+
+A database created by that version already has these tables. Mark it as
+migrated instead of creating them, then upgrade as usual (run from backend/):
+    alembic stamp 0001_baseline
+    alembic upgrade head
+test_legacy_adoption.py runs this path against a database built the old way.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "blog_posts",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("title", sa.String(200), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("slug", sa.String(250), nullable=False),
+        sa.Column("featured", sa.Boolean()),
+        sa.Column("author", sa.String(100), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_blog_posts_id", "blog_posts", ["id"])
+    op.create_index("ix_blog_posts_title", "blog_posts", ["title"])
+    op.create_index("ix_blog_posts_slug", "blog_posts", ["slug"], unique=True)
+    op.create_index("ix_blog_posts_featured", "blog_posts", ["featured"])
+    op.create_index("idx_blog_created", "blog_posts", ["created_at"])
+    op.create_index("idx_blog_featured", "blog_posts", ["featured"])
+
+    op.create_table(
+        "contacts",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("project", sa.Text(), nullable=False),
+        sa.Column("phone", sa.String(20)),
+        sa.Column("budget", sa.String(100)),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_contacts_id", "contacts", ["id"])
+    op.create_index("ix_contacts_name", "contacts", ["name"])
+    op.create_index("ix_contacts_email", "contacts", ["email"])
+    op.create_index("ix_contacts_created_at", "contacts", ["created_at"])
+    op.create_index("idx_contact_created", "contacts", ["created_at"])
+    op.create_index("idx_contact_email", "contacts", ["email"])
+
+    op.create_table(
+        "chat_sessions",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("session_id", sa.String(36), nullable=False),
+        sa.Column("user_message", sa.Text(), nullable=False),
+        sa.Column("ai_reply", sa.Text(), nullable=False),
+        sa.Column("user_info", sa.String(255)),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_chat_sessions_id", "chat_sessions", ["id"])
+    op.create_index("ix_chat_sessions_session_id", "chat_sessions", ["session_id"])
+    op.create_index("ix_chat_sessions_created_at", "chat_sessions", ["created_at"])
+    op.create_index("idx_chat_session", "chat_sessions", ["session_id"])
+    op.create_index("idx_chat_created", "chat_sessions", ["created_at"])
+
+    op.create_table(
+        "payments",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("transaction_id", sa.String(100), nullable=False),
+        sa.Column("customer_name", sa.String(100), nullable=False),
+        sa.Column("customer_email", sa.String(255), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("currency", sa.String(10)),
+        sa.Column("status", sa.String(50)),
+        sa.Column("payment_method", sa.String(50), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("return_url", sa.String(500)),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_payments_id", "payments", ["id"])
+    op.create_index("ix_payments_transaction_id", "payments", ["transaction_id"], unique=True)
+    op.create_index("ix_payments_customer_email", "payments", ["customer_email"])
+    op.create_index("ix_payments_status", "payments", ["status"])
+    op.create_index("ix_payments_created_at", "payments", ["created_at"])
+    op.create_index("idx_payment_status", "payments", ["status"])
+    op.create_index("idx_payment_created", "payments", ["created_at"])
+    op.create_index("idx_payment_email", "payments", ["customer_email"])
+
+
+def downgrade() -> None:
+    for table in ("payments", "chat_sessions", "contacts", "blog_posts"):
+        op.drop_table(table)
@@ -0,0 +1,101 @@
+"""Chat history: chat_sessions splits into conversations and compact message rows
+
+chat_sessions repeated the session id on every message. Each session id
+becomes one chat_conversations row carrying the running aggregates, and its
+messages move to chat_messages keyed by the conversation. Both copies are
+single INSERT ... SELECT statements inside the revision's transaction, so
+writes to chat history wait for them; run it with the app stopped.
+
+Revision ID: 0002_chat_conversations
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.database.models import BigId, Timestamp
+
+revision = "0002_chat_conversations"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+# Numbered in order of each session's first message
+COPY_CONVERSATIONS = """
+    INSERT INTO chat_conversations
+        (session_key, message_count, created_at, last_message_at, summary, summarized_turns)
+    SELECT session_id, count(*), min(created_at), max(created_at), '', 0
+    FROM chat_sessions
+    GROUP BY session_id
+    ORDER BY min(created_at), session_id
+"""
+
+COPY_MESSAGES = """
+    INSERT INTO chat_messages (id, conversation_id, user_message, ai_reply, created_at)
+    SELECT s.id, c.id, s.user_message, s.ai_reply, s.created_at
+    FROM chat_sessions s
+    JOIN chat_conversations c ON c.session_key = s.session_id
+"""
+
+RESTORE_SESSIONS = """
+    INSERT INTO chat_sessions (id, session_id, user_message, ai_reply, created_at)
+    SELECT m.id, c.session_key, m.user_message, m.ai_reply, m.created_at
+    FROM chat_messages m
+    JOIN chat_conversations c ON c.id = m.conversation_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chat_conversations",
+        sa.Column("id", BigId, primary_key=True, autoincrement=True),
+        sa.Column("session_key", sa.String(64), nullable=False, unique=True),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", Timestamp, server_default=sa.func.now(), nullable=False),
+        sa.Column("last_message_at", Timestamp),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column("summarized_turns", sa.Integer(), nullable=False),
+        sa.Column("summarized_through", Timestamp),
+    )
+    # String ids until 0003_uuid_primary_keys converts them with the other tables
+    op.create_table(
+        "chat_messages",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column(
+            "conversation_id", BigId,
+            sa.ForeignKey("chat_conversations.id", ondelete="CASCADE"), nullable=False,
+        ),
+        sa.Column("user_message", sa.Text(), nullable=False),
+        sa.Column("ai_reply", sa.Text(), nullable=False),
+        sa.Column("created_at", Timestamp, server_default=sa.func.now(), nullable=False),
+        sa.Column("rating", sa.SmallInteger()),
+        sa.Column("rated_at", Timestamp),
+    )
+    op.create_index("idx_chat_message_conversation", "chat_messages", ["conversation_id", "created_at"])
+    op.create_index("idx_chat_message_created", "chat_messages", ["created_at"])
+
+    op.execute(COPY_CONVERSATIONS)
+    op.execute(COPY_MESSAGES)
+    op.drop_table("chat_sessions")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "chat_sessions",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("session_id", sa.String(36), nullable=False),
+        sa.Column("user_message", sa.Text(), nullable=False),
+        sa.Column("ai_reply", sa.Text(), nullable=False),
+        sa.Column("user_info", sa.String(255)),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_chat_sessions_id", "chat_sessions", ["id"])
+    op.create_index("ix_chat_sessions_session_id", "chat_sessions", ["session_id"])
+    op.create_index("ix_chat_sessions_created_at", "chat_sessions", ["created_at"])
+    op.create_index("idx_chat_session", "chat_sessions", ["session_id"])
+    op.create_index("idx_chat_created", "chat_sessions", ["created_at"])
+
+    # Summaries and ratings have no place in the old table and are lost
+    op.execute(RESTORE_SESSIONS)
+    op.drop_table("chat_messages")
+    op.drop_table("chat_conversations")
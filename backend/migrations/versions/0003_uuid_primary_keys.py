@@ -0,0 +1,83 @@
+"""Native UUID primary keys for posts, contacts, chat messages and payments
+
+The String(36) id columns become Uuid. Existing uuid4 ids keep their value,
+only their storage changes; new rows get time-ordered uuid7 ids.
+- PostgreSQL: ALTER COLUMN ... TYPE uuid (16 bytes instead of 37). This
+  rewrites each table and its indexes under an ACCESS EXCLUSIVE lock, so
+  run it in a maintenance window on large tables.
+- SQLite: Uuid is stored as 32 hex characters, so dashed ids are rewritten
+  and each table is copied to declare the new type.
+Ids that are not valid UUIDs stop the revision before anything changes.
+
+Revision ID: 0003_uuid_primary_keys
+Revises: 0002_chat_conversations
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_uuid_primary_keys"
+down_revision = "0002_chat_conversations"
+branch_labels = None
+depends_on = None
+
+TABLES = ("blog_posts", "contacts", "chat_messages", "payments")
+
+INVALID_IDS = {
+    "postgresql": "SELECT count(*) FROM {table} "
+                  "WHERE id !~ '^[0-9a-fA-F]{{8}}-?([0-9a-fA-F]{{4}}-?){{3}}[0-9a-fA-F]{{12}}$'",
+    "sqlite": "SELECT count(*) FROM {table} "
+              "WHERE length(id) NOT IN (32, 36) OR lower(replace(id, '-', '')) GLOB '*[^0-9a-f]*'",
+}
+
+# 32 hex characters back to the dashed 8-4-4-4-12 form
+SQLITE_DASHED = (
+    "substr(id, 1, 8) || '-' || substr(id, 9, 4) || '-' || substr(id, 13, 4) || '-' || "
+    "substr(id, 17, 4) || '-' || substr(id, 21)"
+)
+
+
+def check_ids() -> None:
+    context = op.get_context()
+    # Nothing to inspect when only emitting SQL (alembic upgrade --sql)
+    if context.as_sql or context.dialect.name not in INVALID_IDS:
+        return
+    bind = op.get_bind()
+    bad = {}
+    for table in TABLES:
+        count = bind.execute(sa.text(INVALID_IDS[context.dialect.name].format(table=table))).scalar()
+        if count:
+            bad[table] = count
+    if bad:
+        raise RuntimeError(f"Refusing to convert ids, rows with non-UUID ids: {bad}")
+
+
+def upgrade() -> None:
+    check_ids()
+    sqlite = op.get_context().dialect.name == "sqlite"
+    for table in TABLES:
+        if sqlite:
+            op.execute(f"UPDATE {table} SET id = lower(replace(id, '-', ''))")
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                "id",
+                existing_type=sa.String(36),
+                type_=sa.Uuid(),
+                existing_nullable=False,
+                postgresql_using="id::uuid",
+            )
+
+
+def downgrade() -> None:
+    sqlite = op.get_context().dialect.name == "sqlite"
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                "id",
+                existing_type=sa.Uuid(),
+                type_=sa.String(36),
+                existing_nullable=False,
+                postgresql_using="id::text",
+            )
+        if sqlite:
+            op.execute(f"UPDATE {table} SET id = {SQLITE_DASHED}")
@@ -0,0 +1,60 @@
+"""Metrics rollup: per-day counters for the dashboards, backfilled from the raw tables
+
+The backfill groups each raw table the way app.database.rollup.SOURCES
+defines its metric, so `python -m app.database.rollup check` reports no
+mismatches right after the upgrade. From then on the app keeps the counters
+up to date in the same transaction as each write.
+
+Revision ID: 0004_metrics_rollup
+Revises: 0003_uuid_primary_keys
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_metrics_rollup"
+down_revision = "0003_uuid_primary_keys"
+branch_labels = None
+depends_on = None
+
+# metric -> (source table, status expression, method expression, amount expression, row filter)
+# Empty strings fill status/method where a metric has none, as in the rollup key
+BACKFILL = {
+    "contacts": ("contacts", "''", "''", "0", None),
+    "chats": ("chat_messages", "''", "''", "0", None),
+    # Conversations count once they hold a message
+    "chat_sessions": ("chat_conversations", "''", "''", "0", "message_count > 0"),
+    "chat_ratings": ("chat_messages", "CAST(rating AS VARCHAR(50))", "''", "0", "rating IS NOT NULL"),
+    "payments": ("payments", "coalesce(status, '')", "payment_method", "sum(amount)", None),
+    "blogs": ("blog_posts", "CASE WHEN featured THEN 'featured' ELSE 'draft' END", "''", "0", None),
+}
+
+
+def backfill_statement(metric: str) -> str:
+    table, status, method, amount, where = BACKFILL[metric]
+    # PostgreSQL rejects constants in GROUP BY
+    group_by = ", ".join(["date(created_at)", *(expr for expr in (status, method) if expr != "''")])
+    where = f" WHERE {where}" if where else ""
+    return (
+        "INSERT INTO metrics_rollup (day, metric, status, method, count, amount) "
+        f"SELECT date(created_at), '{metric}', {status}, {method}, count(*), {amount} "
+        f"FROM {table}{where} GROUP BY {group_by}"
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "metrics_rollup",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("metric", sa.String(30), primary_key=True),
+        sa.Column("status", sa.String(50), primary_key=True),
+        sa.Column("method", sa.String(50), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+    )
+    for metric in BACKFILL:
+        op.execute(backfill_statement(metric))
+
+
+def downgrade() -> None:
+    op.drop_table("metrics_rollup")
@@ -0,0 +1,31 @@
+"""Blog reads: keyset index for the published listing and the conditional-request validator
+
+idx_blog_listing serves WHERE featured ORDER BY created_at DESC, id DESC
+without a sort; idx_blog_validator answers the ETag/Last-Modified lookup of
+one post from the index alone.
+
+Revision ID: 0005_blog_read_indexes
+Revises: 0004_metrics_rollup
+Create Date: 2026-10-18
+"""
+from migrations.helpers import create_index_online, drop_index_online
+
+revision = "0005_blog_read_indexes"
+down_revision = "0004_metrics_rollup"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "idx_blog_listing": ["featured", "created_at", "id"],
+    "idx_blog_validator": ["id", "updated_at"],
+}
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES.items():
+        create_index_online(name, "blog_posts", columns)
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        drop_index_online(name, "blog_posts")
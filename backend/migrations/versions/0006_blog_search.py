@@ -0,0 +1,65 @@
+"""Blog full-text search index
+
+PostgreSQL: a weighted tsvector expression index (GIN), built CONCURRENTLY.
+The expression must stay textually identical to PG_SEARCH_VECTOR in
+app.database.search, or the planner will not use the index.
+SQLite: an FTS5 table keyed by the post's UUID, filled from the existing
+posts and kept in sync by triggers.
+
+Revision ID: 0006_blog_search
+Revises: 0005_blog_read_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import create_index_online, drop_index_online
+
+revision = "0006_blog_search"
+down_revision = "0005_blog_read_indexes"
+branch_labels = None
+depends_on = None
+
+PG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(blog_posts.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(blog_posts.content, '')), 'B')"
+)
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE blog_posts_fts USING fts5(
+        post_id UNINDEXED, title, content, tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER blog_posts_fts_insert AFTER INSERT ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(post_id, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER blog_posts_fts_delete AFTER DELETE ON blog_posts BEGIN
+        DELETE FROM blog_posts_fts WHERE post_id = old.id;
+    END""",
+    """CREATE TRIGGER blog_posts_fts_update AFTER UPDATE OF id, title, content ON blog_posts BEGIN
+        UPDATE blog_posts_fts SET post_id = new.id, title = new.title, content = new.content
+        WHERE post_id = old.id;
+    END""",
+    "INSERT INTO blog_posts_fts(post_id, title, content) SELECT id, title, content FROM blog_posts",
+]
+
+TRIGGERS = ("blog_posts_fts_insert", "blog_posts_fts_delete", "blog_posts_fts_update")
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "postgresql":
+        create_index_online("idx_blog_search", "blog_posts", [sa.text(f"({PG_SEARCH_VECTOR})")],
+                            postgresql_using="gin")
+    elif dialect == "sqlite":
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "postgresql":
+        drop_index_online("idx_blog_search", "blog_posts")
+    elif dialect == "sqlite":
+        for trigger in TRIGGERS:
+            op.execute(f"DROP TRIGGER {trigger}")
+        op.execute("DROP TABLE blog_posts_fts")
@@ -0,0 +1,57 @@
+"""Index cleanup: one index per query shape
+
+Adds the composite indexes first and drops the duplicates afterwards, so the
+queries never run without an index. Every step runs CONCURRENTLY on
+PostgreSQL and tolerates indexes that already exist or are already gone.
+The ix_*_id indexes duplicate the primary keys.
+
+Revision ID: 0007_index_cleanup
+Revises: 0006_blog_search
+Create Date: 2026-10-18
+"""
+from migrations.helpers import create_index_online, drop_index_online
+
+revision = "0007_index_cleanup"
+down_revision = "0006_blog_search"
+branch_labels = None
+depends_on = None
+
+ADDED = [
+    ("idx_contact_listing", "contacts", ["created_at", "id"]),
+    ("idx_payment_status_created", "payments", ["status", "created_at", "amount"]),
+]
+
+RETIRED = [
+    ("ix_blog_posts_id", "blog_posts", ["id"]),
+    ("ix_blog_posts_title", "blog_posts", ["title"]),
+    ("ix_blog_posts_featured", "blog_posts", ["featured"]),
+    ("idx_blog_created", "blog_posts", ["created_at"]),
+    ("idx_blog_featured", "blog_posts", ["featured"]),
+    ("ix_contacts_id", "contacts", ["id"]),
+    ("ix_contacts_name", "contacts", ["name"]),
+    ("ix_contacts_email", "contacts", ["email"]),
+    ("ix_contacts_created_at", "contacts", ["created_at"]),
+    ("idx_contact_created", "contacts", ["created_at"]),
+    ("idx_contact_email", "contacts", ["email"]),
+    ("ix_payments_id", "payments", ["id"]),
+    ("ix_payments_customer_email", "payments", ["customer_email"]),
+    ("ix_payments_status", "payments", ["status"]),
+    ("ix_payments_created_at", "payments", ["created_at"]),
+    ("idx_payment_status", "payments", ["status"]),
+    ("idx_payment_email", "payments", ["customer_email"]),
+]
+
+
+
+def upgrade() -> None:
+    for name, table, columns in ADDED:
+        create_index_online(name, table, columns)
+    for name, table, _ in RETIRED:
+        drop_index_online(name, table)
+
+
+def downgrade() -> None:
+    for name, table, columns in RETIRED:
+        create_index_online(name, table, columns)
+    for name, table, _ in ADDED:
+        drop_index_online(name, table)
@@ -0,0 +1,38 @@
+"""Durable queue for payment provider webhooks
+
+Revision ID: 0008_payment_webhook_queue
+Revises: 0007_index_cleanup
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.database.models import BigId, Timestamp
+
+revision = "0008_payment_webhook_queue"
+down_revision = "0007_index_cleanup"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "payment_webhook_events",
+        sa.Column("id", BigId, primary_key=True, autoincrement=True),
+        sa.Column("provider", sa.String(20), nullable=False),
+        sa.Column("event_id", sa.String(128), nullable=False),
+        sa.Column("transaction_id", sa.String(100), nullable=False),
+        sa.Column("status", sa.String(50)),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("received_at", Timestamp, server_default=sa.func.now(), nullable=False),
+        sa.Column("processed_at", Timestamp),
+        sa.Column("outcome", sa.String(20)),
+        sa.UniqueConstraint("provider", "event_id", name="uq_webhook_event"),
+    )
+    pending = sa.text("processed_at IS NULL")
+    op.create_index("idx_webhook_pending", "payment_webhook_events", ["id"],
+                    postgresql_where=pending, sqlite_where=pending)
+
+
+def downgrade() -> None:
+    op.drop_table("payment_webhook_events")
@@ -0,0 +1,38 @@
+"""Payment reconciliation: job checkpoints and a keyset index over payments by status
+
+idx_payment_status_seek adds id to idx_payment_status_created, so walking
+pending payments in (created_at, id) order needs no sort. The new index is
+built before the old one is dropped.
+
+Revision ID: 0009_payment_reconciliation
+Revises: 0008_payment_webhook_queue
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.database.models import Timestamp
+from migrations.helpers import create_index_online, drop_index_online
+
+revision = "0009_payment_reconciliation"
+down_revision = "0008_payment_webhook_queue"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_checkpoints",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("position", sa.Text()),
+        sa.Column("leased_until", Timestamp),
+        sa.Column("updated_at", Timestamp, server_default=sa.func.now(), nullable=False),
+    )
+    create_index_online("idx_payment_status_seek", "payments", ["status", "created_at", "id", "amount"])
+    drop_index_online("idx_payment_status_created", "payments")
+
+
+def downgrade() -> None:
+    create_index_online("idx_payment_status_created", "payments", ["status", "created_at", "amount"])
+    drop_index_online("idx_payment_status_seek", "payments")
+    op.drop_table("job_checkpoints")
@@ -0,0 +1,45 @@
+"""Exact payment amounts: payments.amount and metrics_rollup.amount become NUMERIC
+
+Float sums drift by fractions of a rupee once enough payments add up; NUMERIC
+keeps revenue totals exact. On PostgreSQL the type change rewrites both
+tables (and idx_payment_status_seek, which covers amount) under an exclusive
+lock, so run it in a quiet window. SQLite copies each table.
+
+Revision ID: 0010_exact_payment_amounts
+Revises: 0009_payment_reconciliation
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_exact_payment_amounts"
+down_revision = "0009_payment_reconciliation"
+branch_labels = None
+depends_on = None
+
+# table -> (precision, scale)
+AMOUNTS = {"payments": (12, 2), "metrics_rollup": (14, 2)}
+
+
+def upgrade() -> None:
+    for table, (precision, scale) in AMOUNTS.items():
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                "amount",
+                existing_type=sa.Float(),
+                type_=sa.Numeric(precision, scale),
+                existing_nullable=False,
+                postgresql_using=f"round(amount::numeric, {scale})",
+            )
+
+
+def downgrade() -> None:
+    for table, (precision, scale) in AMOUNTS.items():
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                "amount",
+                existing_type=sa.Numeric(precision, scale),
+                type_=sa.Float(),
+                existing_nullable=False,
+                postgresql_using="amount::double precision",
+            )
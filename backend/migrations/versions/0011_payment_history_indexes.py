@@ -0,0 +1,35 @@
+"""Payment history: keyset indexes for the newest-first listing and its filters
+
+idx_payment_created_seek replaces idx_payment_created with (created_at, id),
+the history order including its tie-breaker. The method and customer email
+indexes serve the filtered listings the same way. The new indexes are built
+before the old one is dropped.
+
+Revision ID: 0011_payment_history_indexes
+Revises: 0010_exact_payment_amounts
+Create Date: 2026-10-18
+"""
+from migrations.helpers import create_index_online, drop_index_online
+
+revision = "0011_payment_history_indexes"
+down_revision = "0010_exact_payment_amounts"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "idx_payment_created_seek": ["created_at", "id"],
+    "idx_payment_method_seek": ["payment_method", "created_at", "id"],
+    "idx_payment_email_seek": ["customer_email", "created_at", "id"],
+}
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES.items():
+        create_index_online(name, "payments", columns)
+    drop_index_online("idx_payment_created", "payments")
+
+
+def downgrade() -> None:
+    create_index_online("idx_payment_created", "payments", ["created_at"])
+    for name in INDEXES:
+        drop_index_online(name, "payments")
@@ -0,0 +1,96 @@
+"""Blog search: external-content FTS5 table addressed by an integer key per post
+
+0006 stored a second copy of every post in the FTS5 table and found a post's
+entry by scanning its UNINDEXED post_id column on each blog write.
+blog_posts_fts_keys now maps every post to an INTEGER PRIMARY KEY, a rowid
+alias that VACUUM never renumbers, used as the FTS rowid. The FTS table reads
+the text back from blog_posts through blog_posts_fts_source, and the triggers
+address entries by rowid. SQLite only; PostgreSQL's expression index is
+unaffected.
+
+Revision ID: 0012_blog_search_doc_ids
+Revises: 0011_payment_history_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0012_blog_search_doc_ids"
+down_revision = "0011_payment_history_indexes"
+branch_labels = None
+depends_on = None
+
+TRIGGERS = ("blog_posts_fts_insert", "blog_posts_fts_delete", "blog_posts_fts_update")
+
+DOC_ID_DDL = [
+    """CREATE TABLE blog_posts_fts_keys (
+        doc_id INTEGER PRIMARY KEY, post_id CHAR(32) NOT NULL UNIQUE
+    )""",
+    """CREATE VIEW blog_posts_fts_source AS
+        SELECT k.doc_id, b.title, b.content
+        FROM blog_posts_fts_keys k JOIN blog_posts b ON b.id = k.post_id""",
+    """CREATE VIRTUAL TABLE blog_posts_fts USING fts5(
+        title, content, content='blog_posts_fts_source', content_rowid='doc_id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER blog_posts_fts_insert AFTER INSERT ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts_keys(post_id) VALUES (new.id);
+        INSERT INTO blog_posts_fts(rowid, title, content)
+        VALUES ((SELECT doc_id FROM blog_posts_fts_keys WHERE post_id = new.id), new.title, new.content);
+    END""",
+    """CREATE TRIGGER blog_posts_fts_delete AFTER DELETE ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, content)
+        VALUES ('delete', (SELECT doc_id FROM blog_posts_fts_keys WHERE post_id = old.id), old.title, old.content);
+        DELETE FROM blog_posts_fts_keys WHERE post_id = old.id;
+    END""",
+    """CREATE TRIGGER blog_posts_fts_update AFTER UPDATE OF id, title, content ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, content)
+        VALUES ('delete', (SELECT doc_id FROM blog_posts_fts_keys WHERE post_id = old.id), old.title, old.content);
+        UPDATE blog_posts_fts_keys SET post_id = new.id WHERE post_id = old.id;
+        INSERT INTO blog_posts_fts(rowid, title, content)
+        VALUES ((SELECT doc_id FROM blog_posts_fts_keys WHERE post_id = new.id), new.title, new.content);
+    END""",
+    "INSERT INTO blog_posts_fts_keys(post_id) SELECT id FROM blog_posts ORDER BY created_at, id",
+    "INSERT INTO blog_posts_fts(blog_posts_fts) VALUES ('rebuild')",
+]
+
+# The post_id-keyed table of 0006_blog_search, for downgrade
+POST_ID_DDL = [
+    """CREATE VIRTUAL TABLE blog_posts_fts USING fts5(
+        post_id UNINDEXED, title, content, tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER blog_posts_fts_insert AFTER INSERT ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(post_id, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER blog_posts_fts_delete AFTER DELETE ON blog_posts BEGIN
+        DELETE FROM blog_posts_fts WHERE post_id = old.id;
+    END""",
+    """CREATE TRIGGER blog_posts_fts_update AFTER UPDATE OF id, title, content ON blog_posts BEGIN
+        UPDATE blog_posts_fts SET post_id = new.id, title = new.title, content = new.content
+        WHERE post_id = old.id;
+    END""",
+    "INSERT INTO blog_posts_fts(post_id, title, content) SELECT id, title, content FROM blog_posts",
+]
+
+
+def drop_triggers() -> None:
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != "sqlite":
+        return
+    drop_triggers()
+    op.execute("DROP TABLE blog_posts_fts")
+    for statement in DOC_ID_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != "sqlite":
+        return
+    drop_triggers()
+    op.execute("DROP TABLE blog_posts_fts")
+    op.execute("DROP VIEW blog_posts_fts_source")
+    op.execute("DROP TABLE blog_posts_fts_keys")
+    for statement in POST_ID_DDL:
+        op.execute(statement)
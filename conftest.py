@@ -0,0 +1,31 @@
+"""
+Pytest session setup
+The suites run against a scratch SQLite database (unless DATABASE_URL is
+set) whose schema is built by the Alembic migrations, exactly as a deploy
+builds it, since the app no longer creates tables at startup.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "backend")
+
+# Must happen before app.database.connection is imported by a test module
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+
+
+def upgrade_database() -> None:
+    """alembic upgrade head against DATABASE_URL"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    upgrade_database()
@@ -61,7 +61,7 @@ if not exist .env (
 )
 
 REM Start backend in new terminal
-start cmd /k "cd backend && venv\Scripts\activate.bat && uvicorn app.main:app --reload --host 0.0.0.0 --port 10000"
+start cmd /k "cd backend && venv\Scripts\activate.bat && alembic upgrade head && uvicorn app.main:app --reload --host 0.0.0.0 --port 10000"
 
 cd ..
 
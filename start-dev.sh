@@ -61,6 +61,10 @@ DEBUG=true
 EOF
 fi
 
+# Create or upgrade the database schema
+echo "Applying database migrations..."
+alembic upgrade head
+
 # Start backend server in background
 echo "Starting Backend server..."
 uvicorn app.main:app --reload --host 0.0.0.0 --port 10000 &
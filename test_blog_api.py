@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Blog API Suite
+Drives the blog endpoints in-process and checks conditional GETs
+(If-None-Match / If-Modified-Since answering 304 or 200, with and without
+a warm read cache), that an edit hands out a new ETag, and that full-text
+search keeps finding the right posts when SQLite renumbers their rowids,
+without storing a second copy of the text.
+"""
+
+import sys
+import os
+import asyncio
+import uuid
+from datetime import timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+from sqlalchemy import text
+
+from app.main import app
+from app.database.connection import AsyncSessionLocal
+from app.routers.blog import blog_cache
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+async def create_post(client: httpx.AsyncClient, title: str, featured: bool = True) -> dict:
+    response = await client.post("/blog/", json={
+        "title": title, "slug": f"{title.lower().replace(' ', '-')}-{uuid.uuid4().hex[:8]}",
+        "content": f"{title} body for the blog API suite", "featured": featured,
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_conditional_get_single_post():
+    """ETag and Last-Modified revalidation of one post, cached and uncached"""
+    print_section("Blog Conditional GET Test")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            post = await create_post(client, "Conditional Post")
+            url = f"/blog/{post['id']}"
+
+            first = await client.get(url)
+            assert first.status_code == 200 and first.json()["title"] == "Conditional Post"
+            etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+            print(f"  [OK] 200 with ETag {etag} and Last-Modified {last_modified}")
+
+            # Once from the warm cache, once revalidated from the database
+            for cache in ("cached", "uncached"):
+                if cache == "uncached":
+                    blog_cache.clear()
+                unchanged = await client.get(url, headers={"If-None-Match": etag})
+                assert unchanged.status_code == 304 and unchanged.content == b""
+                assert unchanged.headers["etag"] == etag
+                weak = await client.get(url, headers={"If-None-Match": f'"other", W/{etag}'})
+                assert weak.status_code == 304
+                stale = await client.get(url, headers={"If-None-Match": '"other"'})
+                assert stale.status_code == 200 and stale.json()["id"] == post["id"]
+                print(f"  [OK] If-None-Match ({cache}): matching and weak tags 304, other tags 200")
+
+                if cache == "uncached":
+                    blog_cache.clear()
+                since = await client.get(url, headers={"If-Modified-Since": last_modified})
+                assert since.status_code == 304
+                earlier = format_datetime(parsedate_to_datetime(last_modified) - timedelta(seconds=1), usegmt=True)
+                assert (await client.get(url, headers={"If-Modified-Since": earlier})).status_code == 200
+                # If-None-Match wins over a satisfied If-Modified-Since
+                both = await client.get(url, headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified})
+                assert both.status_code == 200
+                print(f"  [OK] If-Modified-Since ({cache}): at Last-Modified 304, a second earlier 200")
+
+            missing = await client.get(f"/blog/{uuid.uuid4()}", headers={"If-None-Match": etag})
+            assert missing.status_code == 404
+            print("  [OK] Revalidating a missing post answers 404")
+
+    asyncio.run(run())
+
+
+def test_etag_changes_after_update():
+    """A PUT invalidates the old validators of the post and of the listing"""
+    print_section("Blog ETag Update Test")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            post = await create_post(client, "Edited Post")
+            url = f"/blog/{post['id']}"
+            old_etag = (await client.get(url)).headers["etag"]
+            old_list_etag = (await client.get("/blog/", params={"limit": 100})).headers["etag"]
+            listing = await client.get("/blog/", params={"limit": 100}, headers={"If-None-Match": old_list_etag})
+            assert listing.status_code == 304
+
+            updated = await client.put(url, json={"title": "Edited Post v2"})
+            assert updated.status_code == 200, updated.text
+
+            for cache in ("cached", "uncached"):
+                if cache == "uncached":
+                    blog_cache.clear()
+                after = await client.get(url, headers={"If-None-Match": old_etag})
+                assert after.status_code == 200 and after.json()["title"] == "Edited Post v2"
+                assert after.headers["etag"] != old_etag
+                assert (await client.get(url, headers={"If-None-Match": after.headers["etag"]})).status_code == 304
+
+                listing = await client.get("/blog/", params={"limit": 100}, headers={"If-None-Match": old_list_etag})
+                assert listing.status_code == 200 and listing.headers["etag"] != old_list_etag
+                assert any(b["title"] == "Edited Post v2" for b in listing.json()["blogs"])
+                print(f"  [OK] After PUT ({cache}) the old ETags answer 200 and the new ones 304")
+
+    asyncio.run(run())
+
+
+def test_search_survives_rowid_renumbering():
+    """Search follows posts by id through edits, deletes and a rowid renumbering"""
+    print_section("Blog Search Test")
+
+    async def run():
+        word = f"sherpa{uuid.uuid4().hex[:6]}"
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def found(q: str) -> list:
+                response = await client.get("/blog/search", params={"q": q})
+                assert response.status_code == 200, response.text
+                return [(r["id"], r["title"]) for r in response.json()["results"]]
+
+            posts = [await create_post(client, f"Trek {word} {n}") for n in range(3)]
+            assert {title for _, title in await found(word)} == {p["title"] for p in posts}
+
+            # What VACUUM or a table rebuild may do to a table without an INTEGER PRIMARY KEY
+            async with AsyncSessionLocal() as db:
+                await db.execute(text("UPDATE blog_posts SET rowid = rowid + 1000000"))
+                await db.commit()
+            assert sorted(await found(word)) == sorted((p["id"], p["title"]) for p in posts)
+            print("  [OK] Results still map to the right posts after their rowids changed")
+
+            await client.put(f"/blog/{posts[0]['id']}", json={"title": "Renamed trek"})
+            await client.delete(f"/blog/{posts[1]['id']}")
+            # The renamed post still mentions the word in its body
+            assert sorted(await found(word)) == sorted([(posts[0]["id"], "Renamed trek"),
+                                                        (posts[2]["id"], posts[2]["title"])])
+            assert (posts[0]["id"], "Renamed trek") in await found("renamed trek")
+            assert not [hit for hit in await found(f"trek {word} 0") if hit[1] != "Renamed trek"]
+            print("  [OK] Edited and deleted posts leave the index")
+
+            response = await client.get("/blog/search", params={"q": word})
+            assert all(f"<mark>{word}</mark>" in r["snippet"].lower() for r in response.json()["results"])
+            async with AsyncSessionLocal() as db:
+                tables = set((await db.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))).scalars())
+                # External content: the index keeps no copy of the text, and it matches blog_posts
+                assert "blog_posts_fts_content" not in tables
+                await db.execute(text("INSERT INTO blog_posts_fts(blog_posts_fts) VALUES ('integrity-check')"))
+            print("  [OK] Snippets come from the post body; the index stores no copy and passes integrity-check")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    try:
+        test_conditional_get_single_post()
+        test_etag_changes_after_update()
+        test_search_survives_rowid_renumbering()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
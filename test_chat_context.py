@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Chat Context Suite
+Drives ContextStore against the test database: the window never holds more
+than max_turns turns or token_budget tokens, turns pushed out of it are
+folded into a rolling summary that drops its oldest questions when over
+budget and is saved on the conversation, and a session evicted from the
+cache is reloaded from the database with the same summary and turns.
+Checks the counters through /ai/context/stats.
+"""
+
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+from sqlalchemy import select
+
+from app.main import app
+from app.database.chat_store import save_exchanges
+from app.database.connection import AsyncSessionLocal
+from app.database.ids import uuid7
+from app.database.models import ChatConversation
+from app.routers.auth import create_access_token
+from app.services.cache import TTLCache
+from app.services.chat_context import ContextStore, chat_contexts, count_tokens
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+async def chat(db, store: ContextStore, context, turns: int, start: int = 0) -> None:
+    """Persist and record `turns` exchanges, as the chat endpoint does"""
+    base = datetime.utcnow()
+    for n in range(start, start + turns):
+        record = {
+            "id": uuid7(), "session_id": context.session_id, "user_message": f"Question {n}",
+            "ai_reply": f"Answer {n}", "created_at": base + timedelta(milliseconds=n),
+        }
+        await save_exchanges(db, [record])
+        await db.commit()
+        await store.record(db, context, record["user_message"], record["ai_reply"], record["created_at"])
+
+
+def questions(context) -> list[str]:
+    return [turn.user for turn in context.turns]
+
+
+def test_window_bounds():
+    """The window keeps at most max_turns turns and token_budget tokens"""
+    print_section("Chat Context Window Test")
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            by_turns = ContextStore(max_turns=3, token_budget=1000, summary_tokens=100)
+            context = await by_turns.get(db, f"context-{uuid.uuid4().hex[:8]}", new=True)
+            await chat(db, by_turns, context, 5)
+            assert questions(context) == ["Question 2", "Question 3", "Question 4"]
+            assert context.summarized_turns == 2
+            messages = by_turns.build_messages("system", context, "Question 5")
+            assert len(messages) == 1 + 1 + 2 * 3 + 1 and messages[-1]["content"] == "Question 5"
+            print("  [OK] max_turns=3 keeps the last 3 of 5 turns; the prompt has 9 messages")
+
+            # "Question n" + "Answer n" is 6 tokens, so 20 tokens hold three turns
+            assert count_tokens("Question 1") + count_tokens("Answer 1") == 6
+            by_tokens = ContextStore(max_turns=20, token_budget=20, summary_tokens=100)
+            context = await by_tokens.get(db, f"context-{uuid.uuid4().hex[:8]}", new=True)
+            await chat(db, by_tokens, context, 5)
+            assert questions(context) == ["Question 2", "Question 3", "Question 4"]
+            assert sum(turn.tokens for turn in context.turns) <= 20
+            print("  [OK] token_budget=20 keeps the 3 newest turns that fit (18 tokens)")
+
+    asyncio.run(run())
+
+
+def test_summary_refresh():
+    """Folded turns refresh the summary, oldest questions go when it is over budget"""
+    print_section("Chat Context Summary Test")
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            # Each question is 3 tokens: the summary holds the last two
+            store = ContextStore(max_turns=2, token_budget=1000, summary_tokens=7)
+            context = await store.get(db, f"context-{uuid.uuid4().hex[:8]}", new=True)
+            await chat(db, store, context, 3)
+            assert context.summary == "Question 0"
+            await chat(db, store, context, 1, start=3)
+            assert context.summary == "Question 0; Question 1"
+            await chat(db, store, context, 1, start=4)
+            assert context.summary == "Question 1; Question 2" and context.summarized_turns == 3
+            print(f"  [OK] Summary rolls forward within its budget: {context.summary!r}")
+
+            saved = await db.scalar(
+                select(ChatConversation).where(ChatConversation.session_key == context.session_id)
+            )
+            await db.refresh(saved)
+            assert (saved.summary, saved.summarized_turns, saved.message_count) == (context.summary, 3, 5)
+            assert saved.summarized_through == context.summarized_through
+            print("  [OK] The conversation row stores the summary and how far it reaches")
+
+            unsummarized = ContextStore(max_turns=2, summary_enabled=False)
+            context = await unsummarized.get(db, f"context-{uuid.uuid4().hex[:8]}", new=True)
+            await chat(db, unsummarized, context, 4)
+            assert context.summary == "" and questions(context) == ["Question 2", "Question 3"]
+            print("  [OK] With summaries disabled old turns are simply dropped")
+
+    asyncio.run(run())
+
+
+def test_reload_after_eviction():
+    """An evicted session comes back from the database with the same window"""
+    print_section("Chat Context Reload Test")
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            store = ContextStore(max_turns=3, token_budget=1000, summary_tokens=100,
+                                 cache=TTLCache(max_entries=1))
+            session_id = f"context-{uuid.uuid4().hex[:8]}"
+            context = await store.get(db, session_id, new=True)
+            await chat(db, store, context, 5)
+            assert store.loads == 0 and await store.get(db, session_id) is context
+            before = (context.summary, context.summarized_turns, questions(context))
+
+            # A second session takes the only cache slot
+            await store.get(db, f"context-{uuid.uuid4().hex[:8]}", new=True)
+            assert session_id not in store.cache and store.stats()["evictions"] == 1
+
+            reloaded = await store.get(db, session_id)
+            assert reloaded is not context and store.loads == 1
+            assert (reloaded.summary, reloaded.summarized_turns, questions(reloaded)) == before
+            assert [turn.reply for turn in reloaded.turns] == ["Answer 2", "Answer 3", "Answer 4"]
+            print(f"  [OK] Reloaded after eviction: summary {reloaded.summary!r}, turns {questions(reloaded)}")
+
+            await chat(db, store, reloaded, 1, start=5)
+            assert questions(reloaded) == ["Question 3", "Question 4", "Question 5"]
+            assert reloaded.summary == "Question 0; Question 1; Question 2"
+            stats = store.stats()
+            assert stats["history_loads"] == 1 and stats["hits"] == 1
+            print("  [OK] The reloaded window keeps rolling; one history load in the stats")
+
+            fresh = await store.get(db, f"context-{uuid.uuid4().hex[:8]}")
+            assert not fresh.has_history and store.loads == 2
+            print("  [OK] An unknown session loads as empty")
+
+    asyncio.run(run())
+
+
+def test_stats_endpoint():
+    """/ai/context/stats reports the shared store's counters to admins only"""
+    print_section("Chat Context Stats Endpoint Test")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/ai/context/stats")).status_code in (401, 403)
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+            response = await client.get("/ai/context/stats", headers=headers)
+            assert response.status_code == 200
+            assert response.json() == chat_contexts.stats()
+            assert {"history_loads", "entries", "hits", "evictions"} <= set(response.json())
+            print(f"  [OK] Admins get the context cache counters: {response.json()}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    try:
+        test_window_bounds()
+        test_summary_refresh()
+        test_reload_after_eviction()
+        test_stats_endpoint()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
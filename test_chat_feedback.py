@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Chat Feedback Suite
+Stores chat exchanges the way the chat endpoints do, rates them through
+/ai/chat/feedback and checks that ratings persist on the message rows,
+that re-rating moves a message between buckets instead of counting it
+twice, that bad requests change nothing, and that /ai/stats reports the
+resulting counts, distribution and averages.
+"""
+
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+from sqlalchemy import select
+
+from app.main import app
+from app.database.chat_store import save_exchanges
+from app.database.connection import AsyncSessionLocal
+from app.database.ids import uuid7
+from app.database.models import ChatMessage
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+async def store_session(session_id: str, count: int) -> list[str]:
+    """Persist `count` exchanges for a session, returns the message ids"""
+    records = [
+        {"id": uuid7(), "session_id": session_id, "user_message": f"Question {n}",
+         "ai_reply": f"Answer {n}", "created_at": datetime.utcnow()}
+        for n in range(count)
+    ]
+    async with AsyncSessionLocal() as db:
+        await save_exchanges(db, records)
+        await db.commit()
+    return [str(record["id"]) for record in records]
+
+
+async def ratings(message_ids: list[str]) -> dict:
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(ChatMessage.id, ChatMessage.rating, ChatMessage.rated_at)
+            .where(ChatMessage.id.in_([uuid.UUID(m) for m in message_ids]))
+        )
+        return {str(row.id): (row.rating, row.rated_at) for row in rows}
+
+
+def test_feedback_persists_and_stats_follow():
+    """Ratings are stored on the message and /ai/stats counts each message once"""
+    print_section("Chat Feedback Test")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            before = (await client.get("/ai/stats")).json()
+            first, second = f"feedback-{uuid.uuid4().hex[:8]}", f"feedback-{uuid.uuid4().hex[:8]}"
+            first_ids = await store_session(first, 3)
+            second_ids = await store_session(second, 1)
+
+            async def rate(session_id: str, message_id: str, rating: int) -> httpx.Response:
+                return await client.post("/ai/chat/feedback", params={
+                    "session_id": session_id, "message_id": message_id, "rating": rating,
+                })
+
+            for session_id, message_id, rating in ((first, first_ids[0], 5), (first, first_ids[1], 4),
+                                                   (second, second_ids[0], 2)):
+                response = await rate(session_id, message_id, rating)
+                assert response.status_code == 200, response.text
+            stored = await ratings(first_ids + second_ids)
+            assert {m: r for m, (r, _) in stored.items()} == {
+                first_ids[0]: 5, first_ids[1]: 4, first_ids[2]: None, second_ids[0]: 2,
+            }
+            assert all(at is not None for rating, at in stored.values() if rating is not None)
+            print("  [OK] Ratings and rated_at are stored on the rated messages only")
+
+            assert (await rate(first, first_ids[1], 1)).status_code == 200
+            assert (await rate(first, first_ids[0], 5)).status_code == 200
+            assert (await ratings([first_ids[1]]))[first_ids[1]][0] == 1
+            print("  [OK] Re-rating replaces the rating; repeating it is harmless")
+
+            rejected = [
+                (await rate(first, first_ids[2], 6)).status_code,
+                (await rate(second, first_ids[2], 3)).status_code,
+                (await rate(first, "not-a-uuid", 3)).status_code,
+                (await rate(first, str(uuid.uuid4()), 3)).status_code,
+            ]
+            assert rejected == [400, 404, 404, 404], rejected
+            assert (await ratings([first_ids[2]]))[first_ids[2]][0] is None
+            print("  [OK] Out-of-range ratings, another session's message and unknown ids change nothing")
+
+            after = (await client.get("/ai/stats")).json()
+        assert after["total_messages"] - before["total_messages"] == 4
+        assert after["unique_sessions"] - before["unique_sessions"] == 2
+        added = {r: after["rating_distribution"][r] - before["rating_distribution"][r] for r in "12345"}
+        assert added == {"1": 1, "2": 1, "3": 0, "4": 0, "5": 1}, added
+        assert after["rated_messages"] - before["rated_messages"] == 3
+        distribution = after["rating_distribution"]
+        assert after["rated_messages"] == sum(distribution.values())
+        assert after["average_rating"] == round(
+            sum(int(r) * n for r, n in distribution.items()) / after["rated_messages"], 2
+        )
+        assert after["average_messages_per_session"] == round(
+            after["total_messages"] / after["unique_sessions"], 2
+        )
+        print(f"  [OK] /ai/stats: {after['rated_messages']} rated, average {after['average_rating']}, "
+              f"{after['average_messages_per_session']} messages per session")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    try:
+        test_feedback_persists_and_stats_follow()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Chat Streaming Suite
+Posts to /ai/chat/stream in-process and checks the Server-Sent Events
+sequence (session, tokens, done carrying the stored message id), that the
+exchange is persisted once the stream completes, and that a reply the
+provider abandons midway ends in an error event and is not stored.
+"""
+
+import sys
+import os
+import asyncio
+import json
+import uuid
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+
+import app.routers.ai as ai
+from app.main import app
+from app.services.llm import LLMError, LLMProvider
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+class BrokenProvider(LLMProvider):
+    """Streams two tokens, then fails as an overloaded provider would"""
+
+    name = "broken"
+
+    async def stream(self, messages):
+        yield "Partial "
+        yield "reply "
+        raise LLMError("provider went away")
+
+
+def parse_events(body: str) -> list[tuple[str, dict]]:
+    """(event name, data) per SSE frame; unnamed frames are "message" events"""
+    events = []
+    for frame in body.split("\n\n"):
+        if not frame.strip():
+            continue
+        fields = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+async def stream_chat(client: httpx.AsyncClient, message: str, session_id: str | None = None):
+    response = await client.post("/ai/chat/stream", json={"message": message, "session_id": session_id})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return parse_events(response.text)
+
+
+def test_stream_event_sequence_and_persistence():
+    """session, then tokens, then done; the finished exchange is in the history"""
+    print_section("Chat Stream Sequence Test")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            message = f"Tell me about the mountains near the office {uuid.uuid4().hex[:6]}"
+            events = await stream_chat(client, message)
+            names = [name for name, _ in events]
+            assert names[0] == "session" and names[-1] == "done", names
+            assert set(names[1:-1]) == {"message"} and len(names) > 3, names
+            session_id = events[0][1]["session_id"]
+            done = events[-1][1]
+            assert done["session_id"] == session_id and uuid.UUID(done["id"])
+            reply = "".join(data["token"] for name, data in events if name == "message")
+            print(f"  [OK] session, {len(names) - 2} token frames, done with message id {done['id']}")
+
+            history = (await client.get(f"/ai/chat/history/{session_id}")).json()
+            assert history["total_messages"] == 1
+            stored = history["messages"][0]
+            assert (stored["id"], stored["user_message"], stored["ai_reply"]) == (done["id"], message, reply)
+            print("  [OK] Stored exchange matches the streamed tokens and the done event's id")
+
+            events = await stream_chat(client, "What about pricing for a small app?", session_id)
+            assert events[0][1]["session_id"] == session_id and events[-1][0] == "done"
+            history = (await client.get(f"/ai/chat/history/{session_id}")).json()
+            assert [m["id"] for m in history["messages"]][-1] == events[-1][1]["id"]
+            assert history["total_messages"] == 2
+            print("  [OK] A second turn streams into the same session")
+
+    asyncio.run(run())
+
+
+def test_abandoned_stream_is_not_stored():
+    """A provider failure mid-reply ends the stream with an error event and stores nothing"""
+    print_section("Chat Stream Failure Test")
+
+    async def run():
+        saved = ai.llm
+        ai.llm = BrokenProvider()
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                events = await stream_chat(client, f"Describe the trekking routes {uuid.uuid4().hex[:6]}")
+                names = [name for name, _ in events]
+                assert names == ["session", "message", "message", "error"], names
+                assert events[-1][1] == {"detail": "AI service unavailable"}
+                print("  [OK] Tokens already sent are followed by an error event, no done")
+
+                session_id = events[0][1]["session_id"]
+                history = (await client.get(f"/ai/chat/history/{session_id}")).json()
+                assert history["total_messages"] == 0, history
+                print("  [OK] The partial reply was not stored")
+        finally:
+            ai.llm = saved
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    try:
+        test_stream_event_sequence_and_persistence()
+        test_abandoned_stream_is_not_stored()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Chat Write-Behind Suite
+Runs ChatWriteBehind against the test database: full batches flush at
+max_batch and partial ones when the time window closes, stop() persists
+everything still queued, a failed flush is retried and a batch that keeps
+failing is counted as dropped without stopping the flusher. Checks the
+counters through /ai/writer/stats.
+"""
+
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+from sqlalchemy import select, func
+
+from app.main import app
+from app.database.connection import AsyncSessionLocal
+from app.database.ids import uuid7
+from app.database.models import ChatConversation, ChatMessage
+from app.routers.auth import create_access_token
+from app.services import chat_writer as chat_writer_module
+from app.services.chat_writer import ChatWriteBehind
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def make_records(session_id: str, count: int) -> list[dict]:
+    return [
+        {
+            "id": uuid7(),
+            "session_id": session_id,
+            "user_message": f"Question {n}",
+            "ai_reply": f"Answer {n}",
+            "created_at": datetime.utcnow(),
+        }
+        for n in range(count)
+    ]
+
+
+async def stored(records: list[dict]) -> int:
+    """How many of the records are in chat_messages"""
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(func.count()).select_from(ChatMessage).where(ChatMessage.id.in_([r["id"] for r in records]))
+        )
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out waiting for the flusher"
+        await asyncio.sleep(0.02)
+
+
+def test_batch_flush():
+    """Full batches flush at max_batch, the remainder when the window closes"""
+    print_section("Chat Write-Behind Batch Test")
+
+    async def run():
+        writer = ChatWriteBehind(max_batch=5, flush_interval=0.2)
+        await writer.start()
+        session_id = f"writer-{uuid.uuid4().hex[:8]}"
+        records = make_records(session_id, 12)
+        for record in records:
+            await writer.submit(record)
+        await wait_for(lambda: writer.flushed == 12)
+        assert writer.batches == 3 and await stored(records) == 12
+        async with AsyncSessionLocal() as db:
+            count = await db.scalar(
+                select(ChatConversation.message_count).where(ChatConversation.session_key == session_id)
+            )
+        assert count == 12
+        print("  [OK] 12 records flushed as batches of 5, 5 and 2; the conversation counts 12")
+
+        late = make_records(session_id, 1)
+        await writer.submit(late[0])
+        await asyncio.sleep(0.1)
+        assert writer.flushed == 12 and writer.stats()["enabled"]
+        await wait_for(lambda: writer.flushed == 13)
+        assert writer.batches == 4 and await stored(late) == 1
+        print("  [OK] A lone record waits out the flush window, then flushes on its own")
+        await writer.stop()
+
+    asyncio.run(run())
+
+
+def test_drain_on_shutdown():
+    """stop() persists every queued record before the flusher exits"""
+    print_section("Chat Write-Behind Shutdown Test")
+
+    async def run():
+        # A window far longer than the test: only the shutdown can flush these
+        writer = ChatWriteBehind(max_batch=100, flush_interval=60)
+        await writer.start()
+        records = make_records(f"writer-{uuid.uuid4().hex[:8]}", 7)
+        for record in records:
+            await writer.submit(record)
+        assert writer.stats()["pending"] == 7
+        await writer.stop()
+        assert await stored(records) == 7
+        assert writer.stats() == {"enabled": False, "pending": 0, "flushed": 7, "batches": 1, "dropped": 0}
+        print("  [OK] 7 queued records were written by stop() in one batch")
+
+        await writer.stop()
+        assert not writer.running
+        print("  [OK] A second stop() is a no-op")
+
+    asyncio.run(run())
+
+
+def test_failure_and_retry():
+    """A transient failure is retried; a batch that keeps failing is dropped and counted"""
+    print_section("Chat Write-Behind Retry Test")
+
+    async def run():
+        original = chat_writer_module.save_exchanges
+        failures = []
+
+        async def flaky(db, records):
+            if not failures:
+                failures.append(len(records))
+                raise RuntimeError("database unavailable")
+            await original(db, records)
+
+        chat_writer_module.save_exchanges = flaky
+        try:
+            writer = ChatWriteBehind(max_batch=10, flush_interval=0.05, max_retries=2)
+            await writer.start()
+            records = make_records(f"writer-{uuid.uuid4().hex[:8]}", 3)
+            for record in records:
+                await writer.submit(record)
+            await wait_for(lambda: writer.flushed == 3)
+        finally:
+            chat_writer_module.save_exchanges = original
+        assert failures == [3] and await stored(records) == 3
+        assert writer.batches == 1 and writer.dropped == 0
+        print("  [OK] The batch failed once, was retried and written exactly once")
+
+        # Already stored ids violate the primary key on every attempt
+        await writer.submit(records[0])
+        await wait_for(lambda: writer.dropped == 1)
+        assert writer.flushed == 3 and writer.running
+        good = make_records(f"writer-{uuid.uuid4().hex[:8]}", 2)
+        for record in good:
+            await writer.submit(record)
+        await wait_for(lambda: writer.flushed == 5)
+        assert await stored(good) == 2
+        print("  [OK] A batch failing every retry is dropped; later batches still flush")
+        await writer.stop()
+
+    asyncio.run(run())
+
+
+def test_stats_endpoint():
+    """/ai/writer/stats reports the shared writer's counters to admins only"""
+    print_section("Chat Write-Behind Stats Endpoint Test")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/ai/writer/stats")).status_code in (401, 403)
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+            response = await client.get("/ai/writer/stats", headers=headers)
+            assert response.status_code == 200
+            assert response.json() == chat_writer_module.chat_writer.stats()
+            assert set(response.json()) == {"enabled", "pending", "flushed", "batches", "dropped"}
+            print(f"  [OK] Admins get the writer counters: {response.json()}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    try:
+        test_batch_flush()
+        test_drain_on_shutdown()
+        test_failure_and_retry()
+        test_stats_endpoint()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Dashboard Metrics Suite
+Adds contacts, posts, payments and chat messages on both sides of the
+30-day window, then checks that the single aggregate query behind
+/dashboard/stats returns the same figures as counting the rows in Python,
+and that the endpoint reports them.
+"""
+
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+from sqlalchemy import select
+
+from app.main import app
+from app.database.aggregates import business_metrics, business_metrics_query
+from app.database.chat_store import save_exchanges
+from app.database.connection import AsyncSessionLocal
+from app.database.ids import uuid7
+from app.database.models import BlogPost, ChatMessage, Contact, Payment
+from app.routers.auth import create_access_token
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+async def seed(db, now: datetime) -> None:
+    """Rows inside and outside the last 30 days"""
+    tag = uuid.uuid4().hex[:8]
+    for days in (1, 29, 31, 90):
+        db.add(Contact(name=f"Dashboard {days}", email=f"dash-{tag}@example.com", project="Dashboard check",
+                       created_at=now - timedelta(days=days)))
+    for n, featured in enumerate((True, True, False)):
+        db.add(BlogPost(title=f"Dashboard Post {n}", slug=f"dashboard-{tag}-{n}", content="Dashboard body",
+                        featured=featured, author="admin"))
+    for n, (status, amount, days) in enumerate((
+        ("completed", Decimal("1200.50"), 2),
+        ("completed", Decimal("99.99"), 45),
+        ("pending", Decimal("300.00"), 1),
+        ("failed", Decimal("75.25"), 3),
+    )):
+        db.add(Payment(transaction_id=f"dash-{tag}-{n}", customer_name="Dashboard", customer_email="d@example.com",
+                       amount=amount, status=status, payment_method="khalti",
+                       created_at=now - timedelta(days=days)))
+    await save_exchanges(db, [
+        {"id": uuid7(), "session_id": f"dash-{tag}", "user_message": "Hi", "ai_reply": "Hello",
+         "created_at": now - timedelta(days=days)}
+        for days in (0, 40)
+    ])
+    await db.commit()
+
+
+async def counted_in_python(db, since: datetime) -> dict:
+    """Every metric from the raw rows, without SQL aggregates"""
+    contacts = (await db.execute(select(Contact.created_at))).scalars().all()
+    featured = (await db.execute(select(BlogPost.featured))).scalars().all()
+    payments = (await db.execute(select(Payment.status, Payment.amount, Payment.created_at))).all()
+    chats = (await db.execute(select(ChatMessage.created_at))).scalars().all()
+    completed = [p for p in payments if p.status == "completed"]
+    return {
+        "contacts_total": len(contacts),
+        "contacts_recent": sum(1 for at in contacts if at >= since),
+        "blogs_total": len(featured),
+        "blogs_featured": sum(1 for f in featured if f),
+        "payments_total": len(payments),
+        "payments_completed": len(completed),
+        "payments_pending": sum(1 for p in payments if p.status == "pending"),
+        "payments_completed_recent": sum(1 for p in completed if p.created_at >= since),
+        "revenue_total": sum((p.amount for p in completed), Decimal(0)),
+        "chats_total": len(chats),
+        "chats_recent": sum(1 for at in chats if at >= since),
+    }
+
+
+def test_business_metrics_match_rows():
+    """The one-row aggregate equals counting every table in Python"""
+    print_section("Dashboard Metrics Test")
+
+    async def run():
+        now = datetime.utcnow()
+        since = now - timedelta(days=30)
+        async with AsyncSessionLocal() as db:
+            before = await counted_in_python(db, since)
+            await seed(db, now)
+            expected = await counted_in_python(db, since)
+            row = dict((await db.execute(business_metrics_query(since))).mappings().one())
+            assert row == expected, (row, expected)
+            print(f"  [OK] Aggregate query equals the row counts: {row}")
+
+            added = {key: expected[key] - before[key] for key in expected}
+            assert added == {
+                "contacts_total": 4, "contacts_recent": 2, "blogs_total": 3, "blogs_featured": 2,
+                "payments_total": 4, "payments_completed": 2, "payments_pending": 1,
+                "payments_completed_recent": 1, "revenue_total": Decimal("1300.49"),
+                "chats_total": 2, "chats_recent": 1,
+            }, added
+            print("  [OK] Rows just inside 30 days count as recent, 31+ days old do not")
+
+            # The default 30-day window, as the endpoint calls it
+            assert await business_metrics(db) == expected
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/dashboard/stats")).status_code in (401, 403)
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+            stats = (await client.get("/dashboard/stats", headers=headers)).json()
+        assert (stats["total_contacts"], stats["total_blogs"], stats["featured_blogs"]) == (
+            expected["contacts_total"], expected["blogs_total"], expected["blogs_featured"]
+        )
+        assert (stats["total_payments"], stats["pending_payments"]) == (
+            expected["payments_completed"], expected["payments_pending"]
+        )
+        assert Decimal(str(stats["total_revenue"])) == expected["revenue_total"]
+        assert len(stats["recent_messages"]) == min(5, expected["contacts_total"])
+        print("  [OK] /dashboard/stats reports the same figures")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    try:
+        test_business_metrics_match_rows()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
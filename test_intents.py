@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Intent Matcher Suite
+Checks that keywords only match whole words (the substring scan answered
+"this" and "white" with a greeting) and that the compiled matcher agrees with
+the legacy responder wherever the legacy keywords appear as whole words.
+"""
+
+import sys
+import os
+import random
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend', 'benchmarks'))
+
+from app.services.intents import WORD_RE, intent_matcher
+from bench_intent_matcher import KEYWORDS, LEGACY_RULES, corpus, legacy_intent
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def test_keywords_match_whole_words():
+    """Keywords inside longer words no longer trigger an intent"""
+    print_section("Intent Word Boundary Test")
+
+    for message in ("this", "white", "history", "ship it", "Is this something we think about?"):
+        assert legacy_intent(message) == "greeting", message
+        assert intent_matcher.match(message) is None, f"{message!r} matched {intent_matcher.match(message)}"
+    print("  [OK] 'hi' inside this/white/history/ship matches nothing")
+
+    assert intent_matcher.match("Hi!").intent == "greeting"
+    assert intent_matcher.match("What are your prices?").intent == "pricing"
+    assert intent_matcher.match("hi, what's the e-mail?").intent == "contact"
+    print("  [OK] Whole words, prefixes and punctuation-split phrases still match")
+
+
+def test_agrees_with_legacy_on_whole_words():
+    """Where legacy keywords appear only as whole words, both matchers pick the same intent"""
+    print_section("Intent Legacy Agreement Test")
+
+    owner = {word: name for name, words in LEGACY_RULES for word in words}
+    random.seed(7)
+    checked = 0
+    for message in corpus(20_000):
+        lower = message.lower()
+        padded = f" {' '.join(WORD_RE.findall(lower))} "
+        found = [keyword for keyword in KEYWORDS if keyword in lower]
+        # Skip keywords hidden in other words, keywords legacy never knew, and mixed intents
+        if not found or any(f" {keyword} " not in padded for keyword in found):
+            continue
+        if {owner.get(keyword) for keyword in found} != {owner.get(found[0])} or found[0] not in owner:
+            continue
+        match = intent_matcher.match(message)
+        assert match and match.intent == legacy_intent(message), f"{message!r}: {match} vs {legacy_intent(message)}"
+        checked += 1
+    assert checked > 500, checked
+    print(f"  [OK] {checked} corpus messages classified the same by both matchers")
+
+
+if __name__ == "__main__":
+    try:
+        test_keywords_match_whole_words()
+        test_agrees_with_legacy_on_whole_words()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Legacy Database Adoption Test
+Builds a database the way create_all did before migrations (legacy
+chat_sessions table, String(36) ids, no rollup or search index, no
+alembic_version) from its own copy of the old models, and runs the
+documented adoption path against it, each step as its own process:
+    alembic stamp 0001_baseline
+    alembic upgrade head
+then checks the data, the rollup (rollup check) and the search index.
+"""
+
+import sys
+import os
+import sqlite3
+import subprocess
+import tempfile
+import uuid
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, Index, MetaData, String, Table, Text, create_engine, func,
+)
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "backend")
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def run(env: dict, *args: str) -> str:
+    """Run one step from backend/, failing the test with its output"""
+    result = subprocess.run([sys.executable, "-m", *args], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, f"{' '.join(args)} failed:\n{result.stdout}\n{result.stderr}"
+    return result.stdout
+
+
+# The models as create_all built them before migrations, independent of 0001_baseline
+legacy_metadata = MetaData()
+Table(
+    "blog_posts", legacy_metadata,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("title", String(200), nullable=False, index=True),
+    Column("content", Text, nullable=False),
+    Column("slug", String(250), unique=True, index=True, nullable=False),
+    Column("featured", Boolean, index=True),
+    Column("author", String(100), nullable=False),
+    Column("created_at", DateTime, server_default=func.now(), nullable=False),
+    Column("updated_at", DateTime, server_default=func.now(), nullable=False),
+    Index("idx_blog_created", "created_at"),
+    Index("idx_blog_featured", "featured"),
+)
+Table(
+    "contacts", legacy_metadata,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("name", String(100), nullable=False, index=True),
+    Column("email", String(255), nullable=False, index=True),
+    Column("project", Text, nullable=False),
+    Column("phone", String(20)),
+    Column("budget", String(100)),
+    Column("created_at", DateTime, server_default=func.now(), nullable=False, index=True),
+    Index("idx_contact_created", "created_at"),
+    Index("idx_contact_email", "email"),
+)
+Table(
+    "chat_sessions", legacy_metadata,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("session_id", String(36), nullable=False, index=True),
+    Column("user_message", Text, nullable=False),
+    Column("ai_reply", Text, nullable=False),
+    Column("user_info", String(255)),
+    Column("created_at", DateTime, server_default=func.now(), nullable=False, index=True),
+    Index("idx_chat_session", "session_id"),
+    Index("idx_chat_created", "created_at"),
+)
+Table(
+    "payments", legacy_metadata,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("transaction_id", String(100), unique=True, index=True, nullable=False),
+    Column("customer_name", String(100), nullable=False),
+    Column("customer_email", String(255), nullable=False, index=True),
+    Column("amount", Float, nullable=False),
+    Column("currency", String(10)),
+    Column("status", String(50), index=True),
+    Column("payment_method", String(50), nullable=False),
+    Column("description", Text),
+    Column("return_url", String(500)),
+    Column("created_at", DateTime, server_default=func.now(), nullable=False, index=True),
+    Column("updated_at", DateTime, server_default=func.now(), nullable=False),
+    Index("idx_payment_status", "status"),
+    Index("idx_payment_created", "created_at"),
+    Index("idx_payment_email", "customer_email"),
+)
+
+
+def build_legacy_database(path: str) -> None:
+    """Tables as create_all made them, chat history still in chat_sessions, no alembic_version"""
+    engine = create_engine(f"sqlite:///{path}")
+    legacy_metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    with conn:
+        session_id = str(uuid.uuid4())
+        for n in range(3):
+            conn.execute(
+                "INSERT INTO chat_sessions (id, session_id, user_message, ai_reply, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (str(uuid.uuid4()), session_id, f"Question {n}", f"Answer {n}", f"2024-03-0{n + 1} 10:00:00.123456"),
+            )
+        conn.execute(
+            "INSERT INTO contacts (id, name, email, project) VALUES (?, 'Legacy', 'legacy@example.com', 'Old row')",
+            (str(uuid.uuid4()),),
+        )
+        for n, status in enumerate(("completed", "completed", "pending")):
+            conn.execute(
+                "INSERT INTO payments (id, transaction_id, customer_name, customer_email, amount, currency, "
+                "status, payment_method) VALUES (?, ?, 'Legacy', 'legacy@example.com', 250.25, 'NPR', ?, 'khalti')",
+                (str(uuid.uuid4()), f"legacy-txn-{n}", status),
+            )
+        conn.execute(
+            "INSERT INTO blog_posts (id, title, content, slug, featured, author) "
+            "VALUES (?, 'Trekking in Nepal', 'Old post about the Annapurna circuit', 'legacy-post', 1, 'admin')",
+            (str(uuid.uuid4()),),
+        )
+    conn.close()
+
+
+def test_legacy_database_adoption():
+    """The documented path brings a pre-migration database to head with its data"""
+    print_section("Legacy Database Adoption Test")
+
+    path = os.path.join(tempfile.mkdtemp(), "legacy.db")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}"}
+    build_legacy_database(path)
+    print("  [OK] Legacy database built")
+
+    run(env, "alembic", "-c", "alembic.ini", "stamp", "0001_baseline")
+    run(env, "alembic", "-c", "alembic.ini", "upgrade", "head")
+    print("  [OK] stamp and upgrade head succeeded")
+
+    # Backfilled counters agree with the raw tables (exit code 1 on any mismatch)
+    run(env, "app.database.rollup", "check")
+    print("  [OK] rollup check finds no mismatches")
+
+    from alembic.script import ScriptDirectory
+    from alembic.config import Config
+    head = ScriptDirectory.from_config(Config(os.path.join(BACKEND_DIR, "alembic.ini"))).get_current_head()
+
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("SELECT version_num FROM alembic_version").fetchall() == [(head,)]
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "chat_sessions" not in tables
+        assert conn.execute("SELECT count(*) FROM chat_messages").fetchone() == (3,)
+        assert conn.execute("SELECT message_count FROM chat_conversations").fetchall() == [(3,)]
+        for table in ("blog_posts", "contacts", "chat_messages", "payments"):
+            assert conn.execute(f"SELECT DISTINCT length(id) FROM {table}").fetchall() == [(32,)], table
+        assert conn.execute(
+            "SELECT status, count, amount FROM metrics_rollup WHERE metric = 'payments' ORDER BY status"
+        ).fetchall() == [("completed", 2, 500.5), ("pending", 1, 250.25)]
+        assert conn.execute("SELECT count(*) FROM metrics_rollup WHERE metric = 'chat_sessions'").fetchone() == (1,)
+        assert conn.execute(
+            "SELECT b.slug FROM blog_posts_fts JOIN blog_posts_fts_keys k ON k.doc_id = blog_posts_fts.rowid "
+            "JOIN blog_posts b ON b.id = k.post_id WHERE blog_posts_fts MATCH 'annapurna'"
+        ).fetchall() == [("legacy-post",)]
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_blog_listing", "idx_blog_validator", "idx_contact_listing"} <= indexes
+        assert not {"ix_blog_posts_id", "ix_payments_id", "idx_chat_session"} & indexes
+    finally:
+        conn.close()
+    print(f"  [OK] Database at {head}: ids converted, chat history, rollup, search index and indexes in place")
+
+
+if __name__ == "__main__":
+    try:
+        test_legacy_database_adoption()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - LLM Client Suite
+Runs OpenAICompatibleProvider against the local stub
+(backend/benchmarks/llm_stub_server.py) mounted in-process, and checks
+retries with backoff on 429/5xx, Retry-After, the concurrency limit's
+queue timeout, that a backing-off call frees its slot, and that a stream
+is never retried once tokens have been emitted. Malformed stream events
+raise LLMError, and the provider base class cannot be used without stream().
+"""
+
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+
+from app.services.llm import LLMError, LLMProvider, OpenAICompatibleProvider
+from benchmarks.llm_stub_server import create_app as create_stub
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def stub_provider(stub, transport: httpx.AsyncBaseTransport | None = None, **limits) -> OpenAICompatibleProvider:
+    """Provider wired to the stub app"""
+    limits.setdefault("backoff_base", 0)
+    return OpenAICompatibleProvider(
+        base_url="http://llm/v1", api_key="test", model="stub",
+        transport=transport or httpx.ASGITransport(app=stub), **limits,
+    )
+
+
+class DroppedStream(httpx.AsyncByteStream):
+    """Passes `keep` SSE events through, then fails as a connection reset mid-body would"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, keep: int):
+        self.stream = stream
+        self.keep = keep
+
+    async def __aiter__(self):
+        # ASGITransport hands over the body in one piece; split it back into events
+        body = b"".join([chunk async for chunk in self.stream])
+        for event in body.split(b"\n\n")[:self.keep]:
+            yield event + b"\n\n"
+        raise httpx.RemoteProtocolError("peer closed connection without sending complete message body")
+
+    async def aclose(self) -> None:
+        await self.stream.aclose()
+
+
+class DroppingTransport(httpx.AsyncBaseTransport):
+    """ASGI transport whose successful responses break after `keep` events"""
+
+    def __init__(self, app, keep: int):
+        self.inner = httpx.ASGITransport(app=app)
+        self.keep = keep
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        if response.status_code >= 400:
+            return response
+        return httpx.Response(response.status_code, headers=response.headers,
+                              stream=DroppedStream(response.stream, self.keep))
+
+
+def test_retries_transient_failures():
+    """429/5xx are retried with backoff, Retry-After is honored, 4xx is not retried"""
+    print_section("LLM Retry Test")
+
+    async def run():
+        stub = create_stub()
+        provider = stub_provider(stub, max_retries=3)
+        try:
+            stub.state.fail_next, stub.state.fail_status = 2, 429
+            reply = await provider.complete(MESSAGES)
+            assert reply.endswith("You said: hello"), reply
+            assert (stub.state.requests, provider.retries) == (3, 2)
+            print("  [OK] Two 429s retried, third attempt answered")
+
+            stub.state.fail_next, stub.state.fail_status, stub.state.retry_after = 1, 503, "0.3"
+            stub.state.request_times.clear()
+            await provider.complete(MESSAGES)
+            waited = stub.state.request_times[1] - stub.state.request_times[0]
+            assert waited >= 0.3, f"retried after {waited:.2f}s despite Retry-After: 0.3"
+            print(f"  [OK] 503 with Retry-After: 0.3 retried after {waited:.2f}s")
+
+            stub.state.fail_next, stub.state.fail_status = 1, 400
+            calls = stub.state.requests
+            try:
+                await provider.complete(MESSAGES)
+                raise AssertionError("400 was not reported")
+            except LLMError as e:
+                assert "HTTP 400" in str(e)
+            assert stub.state.requests == calls + 1
+            print("  [OK] 400 failed at once without a retry")
+
+            stub.state.fail_next, stub.state.fail_status, stub.state.retry_after = 10, 503, "0"
+            try:
+                await provider.complete(MESSAGES)
+                raise AssertionError("persistent 503 was not reported")
+            except LLMError:
+                pass
+            stub.state.fail_next = 0
+            print(f"  [OK] Gave up after {provider.max_retries + 1} attempts")
+        finally:
+            await provider.aclose()
+
+    asyncio.run(run())
+
+
+def test_concurrency_limit():
+    """Callers queue for a slot at most queue_timeout; a call backing off frees its slot"""
+    print_section("LLM Concurrency Limit Test")
+
+    async def run():
+        stub = create_stub(first_token_ms=300)
+        provider = stub_provider(stub, max_concurrency=1, queue_timeout=0.05)
+        try:
+            first = asyncio.create_task(provider.complete(MESSAGES))
+            await asyncio.sleep(0.05)
+            try:
+                await provider.complete(MESSAGES)
+                raise AssertionError("second call did not time out waiting for the only slot")
+            except LLMError as e:
+                assert "too many concurrent requests" in str(e)
+            assert provider.rejected == 1
+            await first
+            print("  [OK] Call beyond max_concurrency rejected after queue_timeout")
+        finally:
+            await provider.aclose()
+
+        stub = create_stub()
+        provider = stub_provider(stub, max_concurrency=1, queue_timeout=1.0)
+        try:
+            finished = []
+
+            async def call(name):
+                await provider.complete(MESSAGES)
+                finished.append(name)
+
+            stub.state.fail_next, stub.state.retry_after = 1, "0.3"
+            backing_off = asyncio.create_task(call("backing_off"))
+            await asyncio.sleep(0.05)
+            await asyncio.gather(call("waiting"), backing_off)
+            assert finished == ["waiting", "backing_off"], finished
+            print("  [OK] Another call used the slot while the first one backed off")
+        finally:
+            await provider.aclose()
+
+    asyncio.run(run())
+
+
+def test_no_retry_after_first_token():
+    """A stream that breaks after emitting tokens fails instead of being replayed"""
+    print_section("LLM Partial Stream Test")
+
+    async def run():
+        stub = create_stub()
+        provider = stub_provider(stub, transport=DroppingTransport(stub, keep=2), max_retries=3)
+        received = []
+        try:
+            async for chunk in provider.stream(MESSAGES):
+                received.append(chunk)
+            raise AssertionError("broken stream was not reported")
+        except LLMError as e:
+            assert "RemoteProtocolError" in str(e)
+        finally:
+            await provider.aclose()
+        assert len(received) == 2 and stub.state.requests == 1 and provider.retries == 0
+        print(f"  [OK] {len(received)} tokens delivered once, then LLMError without a retry")
+
+        stub = create_stub()
+        provider = stub_provider(stub, transport=DroppingTransport(stub, keep=0), max_retries=1)
+        try:
+            await provider.complete(MESSAGES)
+            raise AssertionError("broken stream was not reported")
+        except LLMError:
+            pass
+        finally:
+            await provider.aclose()
+        assert stub.state.requests == 2 and provider.retries == 1
+        print("  [OK] A stream that broke before its first token was retried")
+
+    asyncio.run(run())
+
+
+def sse_provider(*events: str) -> OpenAICompatibleProvider:
+    """Provider whose every call answers 200 with the given SSE data lines"""
+    body = "".join(f"data: {event}\n\n" for event in events)
+    transport = httpx.MockTransport(lambda request: httpx.Response(
+        200, headers={"content-type": "text/event-stream"}, content=body.encode(),
+    ))
+    return stub_provider(None, transport=transport, max_retries=2)
+
+
+def test_malformed_stream_events():
+    """Undecodable or misshapen SSE events end the stream with LLMError, not a parser exception"""
+    print_section("LLM Malformed Stream Test")
+
+    good = '{"choices": [{"delta": {"content": "Hi"}}]}'
+
+    async def run():
+        for bad in ("{not json", "[1, 2]", '"text"', '{"choices": ["x"]}', '{"choices": [{"delta": 3}]}'):
+            provider = sse_provider(good, bad, "[DONE]")
+            received = []
+            try:
+                async for chunk in provider.stream(MESSAGES):
+                    received.append(chunk)
+                raise AssertionError(f"{bad!r} was accepted")
+            except LLMError as e:
+                assert "malformed" in str(e), e
+            finally:
+                await provider.aclose()
+            assert received == ["Hi"] and provider.retries == 0 and provider.failures == 1, bad
+        print("  [OK] 5 malformed events raise LLMError after the good tokens, without a retry")
+
+        provider = sse_provider(good, '{"choices": []}', '{"id": "x"}', "[DONE]")
+        try:
+            assert await provider.complete(MESSAGES) == "Hi"
+        finally:
+            await provider.aclose()
+        print("  [OK] Events without choices or content are skipped")
+
+    asyncio.run(run())
+
+    try:
+        LLMProvider()
+        raise AssertionError("LLMProvider instantiated without stream()")
+    except TypeError:
+        pass
+    print("  [OK] LLMProvider is abstract until stream() is implemented")
+
+
+if __name__ == "__main__":
+    try:
+        test_retries_transient_failures()
+        test_concurrency_limit()
+        test_no_retry_after_first_token()
+        test_malformed_stream_events()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
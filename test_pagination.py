@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Keyset Pagination Suite
+Pages through the contact list, payment history and blog listing with
+small pages over rows sharing one created_at, checking that every row is
+returned exactly once in (created_at, id) order, and that malformed or
+tampered cursors are rejected with 400 instead of reaching the database.
+"""
+
+import sys
+import os
+import asyncio
+import base64
+import json
+import uuid
+from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+
+from app.main import app
+from app.database.connection import AsyncSessionLocal
+from app.database.models import BlogPost, Contact, Payment
+from app.database.pagination import decode_cursor, encode_cursor
+from app.routers.auth import create_access_token
+from app.routers.blog import LIST_TAG, blog_cache
+
+# Every seeded row shares this timestamp, so only the id tiebreak orders them
+SHARED_CREATED_AT = datetime(2001, 1, 1, 12, 0, 0)
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def admin_headers() -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+
+
+def raw_cursor(payload) -> str:
+    """A cursor built by hand, as a client tampering with one would"""
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+async def page_through(client: httpx.AsyncClient, url: str, key: str, **params) -> tuple[list, int]:
+    """Follow next_cursor to the end, returns (rows, pages)"""
+    rows, pages, cursor = [], 0, None
+    while True:
+        response = await client.get(url, params={**params, **({"cursor": cursor} if cursor else {})},
+                                    headers=admin_headers())
+        assert response.status_code == 200, response.text
+        body = response.json()
+        rows.extend(body[key])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return rows, pages
+
+
+def invalid_cursors() -> list[str]:
+    valid = encode_cursor(SHARED_CREATED_AT, uuid.uuid4())
+    return [
+        "not a cursor",
+        valid[:-3],
+        raw_cursor({"created_at": "2001-01-01T12:00:00"}),
+        raw_cursor(["2001-01-01T12:00:00"]),
+        raw_cursor(["yesterday", str(uuid.uuid4())]),
+        raw_cursor(["2001-01-01T12:00:00", "not-a-uuid"]),
+        raw_cursor([20010101, str(uuid.uuid4())]),
+        raw_cursor(["2001-01-01T12:00:00", str(uuid.uuid4()), "extra"]),
+    ]
+
+
+def test_cursor_helpers():
+    """encode_cursor/decode_cursor round-trip and reject anything else"""
+    print_section("Cursor Helper Test")
+
+    row_id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(True, SHARED_CREATED_AT, row_id), bool, datetime, uuid.UUID) == (
+        True, SHARED_CREATED_AT, row_id,
+    )
+    print("  [OK] Cursor round-trips bool, datetime and UUID values")
+
+    for cursor in invalid_cursors():
+        try:
+            decode_cursor(cursor, datetime, uuid.UUID)
+            raise AssertionError(f"{cursor!r} was accepted")
+        except ValueError:
+            pass
+    try:
+        decode_cursor(raw_cursor([1, "2001-01-01T12:00:00", str(row_id)]), bool, datetime, uuid.UUID)
+        raise AssertionError("integer accepted as a boolean")
+    except ValueError:
+        pass
+    print(f"  [OK] {len(invalid_cursors()) + 1} malformed or tampered cursors raise ValueError")
+
+
+def test_contact_pages_with_equal_timestamps():
+    """Contacts sharing created_at are paged without duplicates or gaps"""
+    print_section("Contact Keyset Pagination Test")
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            seeded = [
+                Contact(name=f"Tie {n}", email=f"tie{n}@example.com", project="Pagination",
+                        created_at=SHARED_CREATED_AT)
+                for n in range(7)
+            ]
+            db.add_all(seeded)
+            await db.commit()
+            seeded_ids = {str(c.id) for c in seeded}
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            rows, pages = await page_through(client, "/contact/", "messages", limit=3)
+            ids = [row["id"] for row in rows]
+            assert len(ids) == len(set(ids)), "a contact appeared on two pages"
+            assert seeded_ids <= set(ids), f"missing {seeded_ids - set(ids)}"
+            keys = [(row["created_at"], uuid.UUID(row["id"])) for row in rows]
+            assert keys == sorted(keys, reverse=True), "pages out of (created_at, id) order"
+            print(f"  [OK] {len(ids)} contacts over {pages} pages, the 7 tied rows each once")
+
+            for cursor in invalid_cursors():
+                response = await client.get("/contact/", params={"cursor": cursor})
+                assert response.status_code == 400, f"{cursor!r}: {response.status_code}"
+                assert response.json()["detail"] == "Invalid cursor"
+            print("  [OK] Malformed and tampered cursors answer 400")
+
+    asyncio.run(run())
+
+
+def test_payment_history_pages_with_equal_timestamps():
+    """Payment history pages through tied rows under a filter without duplicates or gaps"""
+    print_section("Payment History Keyset Pagination Test")
+
+    async def run():
+        email = f"pages-{uuid.uuid4().hex[:8]}@example.com"
+        async with AsyncSessionLocal() as db:
+            seeded = [
+                Payment(transaction_id=f"page-{uuid.uuid4().hex}", customer_name="Pager", customer_email=email,
+                        amount=100 + n, currency="NPR", status="completed", payment_method="khalti",
+                        created_at=SHARED_CREATED_AT)
+                for n in range(8)
+            ]
+            db.add_all(seeded)
+            await db.commit()
+            seeded_ids = sorted((p.id for p in seeded), reverse=True)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            rows, pages = await page_through(client, "/payment/history", "payments",
+                                             limit=3, email=email, fields="id,amount")
+            assert [uuid.UUID(row["id"]) for row in rows] == seeded_ids
+            assert pages == 3
+            print(f"  [OK] 8 tied payments over {pages} pages in id order, none repeated or skipped")
+
+            for cursor in invalid_cursors():
+                response = await client.get("/payment/history", params={"cursor": cursor},
+                                            headers=admin_headers())
+                assert response.status_code == 400, f"{cursor!r}: {response.status_code}"
+            print("  [OK] Malformed and tampered cursors answer 400")
+
+    asyncio.run(run())
+
+
+def test_blog_pages_with_equal_timestamps():
+    """Published posts sharing created_at are paged without duplicates, gaps or drafts"""
+    print_section("Blog Keyset Pagination Test")
+
+    async def run():
+        tag = uuid.uuid4().hex[:8]
+        async with AsyncSessionLocal() as db:
+            seeded = [
+                BlogPost(title=f"Tied post {n}", slug=f"tied-{tag}-{n}", content="Pagination body " * 3,
+                         featured=n % 4 != 0, author="admin", created_at=SHARED_CREATED_AT)
+                for n in range(10)
+            ]
+            db.add_all(seeded)
+            await db.commit()
+            published = {str(p.id) for p in seeded if p.featured}
+            drafts = {str(p.id) for p in seeded if not p.featured}
+        # Rows were written behind the router's back
+        blog_cache.invalidate(LIST_TAG)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for view in ("summary", "full"):
+                rows, pages = await page_through(client, "/blog/", "blogs", limit=3, view=view)
+                ids = [row["id"] for row in rows]
+                assert len(ids) == len(set(ids)), "a post appeared on two pages"
+                assert published <= set(ids) and not drafts & set(ids)
+                keys = [(row["created_at"], uuid.UUID(row["id"])) for row in rows]
+                assert keys == sorted(keys, reverse=True), "pages out of (created_at, id) order"
+                print(f"  [OK] {view}: {len(ids)} posts over {pages} pages, the 7 tied posts each once")
+
+            row_id = str(uuid.uuid4())
+            for cursor in [*invalid_cursors(), raw_cursor([1, "2001-01-01T12:00:00", row_id]),
+                           raw_cursor(["2001-01-01T12:00:00", row_id])]:
+                response = await client.get("/blog/", params={"cursor": cursor})
+                assert response.status_code == 400, f"{cursor!r}: {response.status_code}"
+            print("  [OK] Malformed and tampered cursors answer 400")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    try:
+        test_cursor_helpers()
+        test_contact_pages_with_equal_timestamps()
+        test_payment_history_pages_with_equal_timestamps()
+        test_blog_pages_with_equal_timestamps()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
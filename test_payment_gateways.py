@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Payment Gateway Suite
+Runs Khalti and eSewa verification against the local provider stub
+(backend/benchmarks/payment_stub_server.py) mounted in-process, and checks
+that verifications overlap instead of queueing, that the rate limit and
+circuit breaker reject calls without reaching the provider, that the
+verify endpoints only complete payments the provider confirms, and that
+the reconciler settles pending payments and resumes from its checkpoint.
+Unreadable provider answers raise GatewayError and count as failures, and
+webhooks only apply the status the provider confirms when asked.
+"""
+
+import sys
+import os
+import asyncio
+import time
+from datetime import timedelta
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+from sqlalchemy import func, select
+
+from conftest import upgrade_database
+from app.main import app
+from app.database.connection import AsyncSessionLocal
+from app.database.models import JobCheckpoint, Payment, PaymentWebhookEvent
+from app.routers.auth import create_access_token
+from app.services.payment_gateways import (
+    EsewaGateway, GatewayError, KhaltiGateway, MockGateway, PaymentGateway, SharedClient, Verification,
+    gateways,
+)
+from app.services.payment_reconciler import JOB_NAME, PaymentReconciler
+from app.services.webhook_worker import webhook_worker
+from benchmarks.payment_stub_server import create_app as create_stub
+
+KHALTI_URL = "http://provider/api/v2/payment/verify/"
+ESEWA_URL = "http://provider/api/epay/transaction/status/"
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def live_gateways(stub, **limits) -> tuple[SharedClient, KhaltiGateway, EsewaGateway]:
+    """Gateways wired to the stub app, sharing one client as in production"""
+    http = SharedClient(transport=httpx.ASGITransport(app=stub))
+    limits.setdefault("backoff_base", 0)
+    return (
+        http,
+        KhaltiGateway(http=http, url=KHALTI_URL, secret_key="test", **limits),
+        EsewaGateway(http=http, url=ESEWA_URL, merchant_code="EPAYTEST", **limits),
+    )
+
+
+def test_verification_against_stub():
+    """Provider answers map to payment statuses; concurrent calls overlap"""
+    print_section("Provider Verification Test")
+
+    async def run():
+        stub = create_stub(latency_ms=100)
+        http, khalti, esewa = live_gateways(stub, rate=0)
+        try:
+            completed = await khalti.verify("token-1", 1000)
+            assert (completed.status, completed.amount) == ("completed", 1000)
+            # validation_error is no verdict: the payment stays pending, and the provider is healthy
+            assert (await khalti.verify("invalid-token", 1000)).status == "pending"
+            assert khalti.breaker.failures == 0 and khalti.failures == 0
+            assert (await esewa.verify("txn-1", 250.0)).status == "completed"
+            assert (await esewa.verify("missing-txn", 250.0)).status == "failed"
+            print("  [OK] Khalti and eSewa answers mapped, Khalti validation_error left pending")
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*(khalti.verify(f"token-{i}", 100) for i in range(20)))
+            elapsed = time.perf_counter() - started
+            assert all(r.status == "completed" for r in results)
+            # 20 x 100 ms one after another would take 2 s
+            assert elapsed < 1.0, f"verifications queued behind each other ({elapsed:.2f}s)"
+            assert stub.state.peak_in_flight > 1
+            print(f"  [OK] 20 verifications in {elapsed:.2f}s, {stub.state.peak_in_flight} in flight at once")
+        finally:
+            await http.aclose()
+
+    asyncio.run(run())
+
+
+def test_rate_limit_and_circuit_breaker():
+    """Limited and short-circuited calls never reach the provider"""
+    print_section("Rate Limit & Circuit Breaker Test")
+
+    async def run():
+        stub = create_stub()
+        http, khalti, _ = live_gateways(stub, rate=1, burst=1, queue_timeout=0)
+        try:
+            await khalti.verify("token-1", 100)
+            try:
+                await khalti.verify("token-2", 100)
+                raise AssertionError("second call within the same second was not rate limited")
+            except GatewayError:
+                pass
+            assert stub.state.requests == 1
+            print("  [OK] Over-limit call rejected locally")
+        finally:
+            await http.aclose()
+
+        stub = create_stub()
+        http, khalti, _ = live_gateways(stub, rate=0, max_retries=1, failure_threshold=2, reset_timeout=0.2)
+        try:
+            stub.state.down = True
+            for _ in range(2):
+                try:
+                    await khalti.verify("token-1", 100)
+                    raise AssertionError("outage not reported")
+                except GatewayError:
+                    pass
+            assert khalti.breaker.state == "open"
+            calls = stub.state.requests
+            try:
+                await khalti.verify("token-1", 100)
+                raise AssertionError("open circuit let a call through")
+            except GatewayError as e:
+                assert "circuit open" in str(e)
+            assert stub.state.requests == calls
+            print(f"  [OK] Circuit opened after {calls} failed requests, then failed fast")
+
+            stub.state.down = False
+            await asyncio.sleep(0.25)
+            assert (await khalti.verify("token-1", 100)).status == "completed"
+            assert khalti.breaker.state == "closed"
+            print("  [OK] Trial call after the reset timeout closed the circuit")
+        finally:
+            await http.aclose()
+
+    asyncio.run(run())
+
+
+def test_verify_endpoints_use_provider():
+    """Endpoints complete only payments the provider confirms"""
+    print_section("Verify Endpoint Test")
+
+    async def run():
+        stub = create_stub()
+        http, khalti, esewa = live_gateways(stub, rate=0)
+        saved = dict(gateways)
+        gateways.update(khalti=khalti, esewa=esewa)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                async def initiate(method):
+                    return (await client.post(f"/payment/{method}/initiate", json={
+                        "amount": 500, "customer_name": "Gateway Tester", "customer_email": "gw@example.com",
+                        "description": "Gateway check", "return_url": "http://localhost:3000/payment/success",
+                    })).json()["transaction_id"]
+
+                token = await initiate("khalti")
+                verified = await client.post("/payment/khalti/verify", params={"token": token, "amount": 500})
+                assert verified.status_code == 200, verified.text
+                again = await client.post("/payment/khalti/verify", params={"token": token, "amount": 500})
+                assert again.status_code == 200, again.text
+                print("  [OK] Khalti payment verified, repeat verify is idempotent")
+
+                ref_id = await initiate("esewa")
+                assert (await client.post("/payment/esewa/verify", params={"ref_id": ref_id})).status_code == 200
+                print("  [OK] eSewa payment verified")
+
+                stub.state.down = True
+                token = await initiate("khalti")
+                outage = await client.post("/payment/khalti/verify", params={"token": token, "amount": 500})
+                assert outage.status_code == 503, outage.text
+                history = (await client.get("/payment/history", params={"method": "khalti"}, headers={
+                    "Authorization": f"Bearer {create_access_token({'sub': 'admin'})}",
+                })).json()["payments"]
+                assert next(p for p in history if p["transaction_id"] == token)["status"] == "pending"
+                print("  [OK] Provider outage answers 503 and leaves the payment pending")
+        finally:
+            gateways.update(saved)
+            await http.aclose()
+
+    asyncio.run(run())
+
+
+def test_rejected_credentials_leave_payment_pending():
+    """A 401 is about our request, not the payment: no verdict, breaker counts it"""
+    print_section("Rejected Credentials Test")
+
+    async def run():
+        stub = create_stub()
+        http, khalti, esewa = live_gateways(stub, rate=0)
+        stub.state.reject_credentials = True
+        saved = dict(gateways)
+        gateways.update(khalti=khalti, esewa=esewa)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            for gateway in (khalti, esewa):
+                try:
+                    await gateway.verify("txn-1", 100)
+                    raise AssertionError(f"{gateway.name}: 401 was taken as an answer")
+                except GatewayError as e:
+                    assert "HTTP 401" in str(e)
+                assert gateway.breaker.failures == 1 and gateway.retries == 0
+            print("  [OK] 401 raises GatewayError without retrying and counts as a breaker failure")
+
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                token = (await client.post("/payment/khalti/initiate", json={
+                    "amount": 300, "customer_name": "Gateway Tester", "customer_email": "cred@example.com",
+                    "description": "Credentials check", "return_url": "http://localhost:3000/payment/success",
+                })).json()["transaction_id"]
+                verified = await client.post("/payment/khalti/verify", params={"token": token, "amount": 300})
+                assert verified.status_code == 503, verified.text
+            async with AsyncSessionLocal() as db:
+                status = await db.scalar(select(Payment.status).where(Payment.transaction_id == token))
+            assert status == "pending", status
+            print("  [OK] Verify answers 503 and the payment stays pending")
+        finally:
+            gateways.update(saved)
+            await http.aclose()
+
+    asyncio.run(run())
+
+
+def test_reconciler_resumes_from_checkpoint():
+    """A restarted reconciler continues where the last one stopped and verifies each payment once"""
+    print_section("Pending Payment Reconciler Test")
+
+    async def pending_count():
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(select(func.count()).select_from(Payment).where(Payment.status == "pending"))
+
+    async def run():
+        stub = create_stub()
+        http, khalti, esewa = live_gateways(stub, rate=0)
+        saved = dict(gateways)
+        gateways.update(khalti=khalti, esewa=esewa)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                for method in ("khalti", "esewa", "khalti", "esewa", "khalti"):
+                    await client.post(f"/payment/{method}/initiate", json={
+                        "amount": 750, "customer_name": "Reconcile Tester", "customer_email": "rc@example.com",
+                        "description": "Reconcile check", "return_url": "http://localhost:3000/payment/success",
+                    })
+            pending = await pending_count()
+            assert pending >= 5
+
+            first = PaymentReconciler(batch_size=2, concurrency=2, min_age=timedelta(0))
+            assert await first.reconcile_page() == 2
+            async with AsyncSessionLocal() as db:
+                checkpoint = await db.get(JobCheckpoint, JOB_NAME)
+            assert checkpoint.position and checkpoint.leased_until is None
+            print(f"  [OK] First page settled, checkpoint saved ({pending} pending at start)")
+
+            # A new instance stands in for a restarted worker
+            restarted = PaymentReconciler(batch_size=2, concurrency=2, min_age=timedelta(0))
+            await restarted.sweep()
+            assert await pending_count() == 0
+            assert stub.state.requests == pending, f"{stub.state.requests} provider calls for {pending} payments"
+            async with AsyncSessionLocal() as db:
+                assert (await db.get(JobCheckpoint, JOB_NAME)).position is None
+            print(f"  [OK] Restart resumed the pass: {stub.state.requests} provider calls, none repeated")
+        finally:
+            gateways.update(saved)
+            await http.aclose()
+
+    asyncio.run(run())
+
+
+def test_reconciler_survives_malformed_answers():
+    """An unreadable provider answer leaves that payment pending; the page commits and the pass ends"""
+    print_section("Reconciler Malformed Answer Test")
+
+    class MalformedGateway(MockGateway):
+        async def verify(self, transaction_id, amount):
+            raise ValueError("Expecting value: line 1 column 1 (char 0)")
+
+    async def run():
+        saved = dict(gateways)
+        gateways.update(khalti=MalformedGateway("khalti"), esewa=MockGateway("esewa"))
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                ids = {}
+                for method in ("khalti", "esewa"):
+                    ids[method] = (await client.post(f"/payment/{method}/initiate", json={
+                        "amount": 120, "customer_name": "Malformed Tester", "customer_email": "mf@example.com",
+                        "description": "Malformed answer check", "return_url": "http://localhost:3000/payment/success",
+                    })).json()["transaction_id"]
+
+            reconciler = PaymentReconciler(batch_size=10, min_age=timedelta(0))
+            await reconciler.sweep()
+            assert reconciler.passes == 1 and reconciler.unverified >= 1
+            async with AsyncSessionLocal() as db:
+                statuses = dict((await db.execute(
+                    select(Payment.payment_method, Payment.status).where(Payment.transaction_id.in_(ids.values()))
+                )).all())
+                checkpoint = await db.get(JobCheckpoint, JOB_NAME)
+            assert statuses == {"khalti": "pending", "esewa": "completed"}, statuses
+            assert checkpoint.position is None and checkpoint.leased_until is None
+            print(f"  [OK] {reconciler.unverified} unreadable answer(s) skipped, rest of the page applied")
+        finally:
+            gateways.update(saved)
+
+    asyncio.run(run())
+
+
+def test_malformed_answers_raise_gateway_error():
+    """Bodies that are not JSON objects of the expected shape raise GatewayError, not parser errors"""
+    print_section("Malformed Provider Answer Test")
+
+    # body -> gateways that cannot read it (the other one finds no status and reports pending)
+    bodies = {
+        b"<html>Bad gateway</html>": {"khalti", "esewa"},
+        b"[]": {"khalti", "esewa"},
+        b'"ok"': {"khalti", "esewa"},
+        b'{"state": "Completed", "amount": 100}': {"khalti"},
+        b'{"status": "COMPLETE", "total_amount": "lots"}': {"esewa"},
+    }
+
+    async def run():
+        for body, unreadable in bodies.items():
+            transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+            http = SharedClient(transport=transport)
+            khalti = KhaltiGateway(http=http, url=KHALTI_URL, rate=0, backoff_base=0)
+            esewa = EsewaGateway(http=http, url=ESEWA_URL, rate=0, backoff_base=0)
+            try:
+                for gateway in (khalti, esewa):
+                    if gateway.name not in unreadable:
+                        assert (await gateway.verify("txn-1", 100)).status == "pending", (gateway.name, body)
+                        continue
+                    try:
+                        await gateway.verify("txn-1", 100)
+                        raise AssertionError(f"{gateway.name} accepted {body!r}")
+                    except GatewayError as e:
+                        assert "malformed answer" in str(e)
+                    assert gateway.failures == 1 and gateway.breaker.failures == 1
+            finally:
+                await http.aclose()
+        print(f"  [OK] {len(bodies)} malformed bodies raise GatewayError and count as provider failures")
+
+    asyncio.run(run())
+
+    try:
+        PaymentGateway()
+        raise AssertionError("PaymentGateway instantiated without verify()")
+    except TypeError:
+        pass
+    print("  [OK] PaymentGateway is abstract until verify() is implemented")
+
+
+def test_webhooks_apply_only_verified_statuses():
+    """A webhook triggers a verification: the provider's answer is applied, never the notification's claim"""
+    print_section("Webhook Verification Test")
+
+    class ScriptedGateway(MockGateway):
+        """Answers per transaction id: a Verification, or an exception to raise"""
+
+        def __init__(self, name):
+            super().__init__(name)
+            self.answers = {}
+            self.calls = 0
+
+        async def verify(self, transaction_id, amount):
+            self.calls += 1
+            answer = self.answers[transaction_id]
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+    async def run():
+        khalti = ScriptedGateway("khalti")
+        saved = dict(gateways)
+        gateways.update(khalti=khalti)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                async def initiate():
+                    return (await client.post("/payment/khalti/initiate", json={
+                        "amount": 400, "customer_name": "Webhook Tester", "customer_email": "wh@example.com",
+                        "description": "Webhook check", "return_url": "http://localhost:3000/payment/success",
+                    })).json()["transaction_id"]
+
+                paid, forged, refund_claim, mismatch, outage = [await initiate() for _ in range(5)]
+                khalti.answers.update({
+                    paid: Verification(status="completed", amount=400),
+                    forged: Verification(status="pending"),
+                    refund_claim: Verification(status="completed", amount=400),
+                    mismatch: Verification(status="completed", amount=1),
+                    outage: GatewayError("khalti: circuit open"),
+                })
+                deliveries = [(paid, "Completed"), (paid, "Completed"), (forged, "Completed"),
+                              (refund_claim, "Refunded"), (mismatch, "Completed"), (outage, "Completed")]
+                for n, (token, claim) in enumerate(deliveries):
+                    # Distinct idx per delivery, so the queue keeps them all
+                    await client.post("/payment/khalti/webhook", json={"token": token, "status": claim,
+                                                                        "idx": f"{token}-{n}"})
+                await webhook_worker.drain()
+
+                async def statuses():
+                    async with AsyncSessionLocal() as db:
+                        return dict((await db.execute(select(Payment.transaction_id, Payment.status).where(
+                            Payment.transaction_id.in_([paid, forged, refund_claim, mismatch, outage])
+                        ))).all())
+
+                assert await statuses() == {
+                    paid: "completed", forged: "pending", refund_claim: "completed",
+                    mismatch: "pending", outage: "pending",
+                }, await statuses()
+                # One verification per payment in the batch however many events it had,
+                # plus the outage payment asked again by drain's next batch
+                assert khalti.calls == 6, khalti.calls
+                print("  [OK] Only provider-confirmed statuses applied; forged and mismatched claims ignored")
+
+                async with AsyncSessionLocal() as db:
+                    outcomes = (await db.execute(
+                        select(PaymentWebhookEvent.transaction_id, PaymentWebhookEvent.outcome)
+                        .where(PaymentWebhookEvent.transaction_id.in_([paid, forged, mismatch, outage]))
+                    )).all()
+                assert sorted(o for t, o in outcomes if t == paid) == ["applied", "skipped"]
+                assert [o for t, o in outcomes if t == forged] == ["skipped"]
+                assert [o for t, o in outcomes if t == mismatch] == ["unverified"]
+                assert [o for t, o in outcomes if t == outage] == [None]
+                print("  [OK] Events recorded as applied/skipped/unverified; the outage event stays queued")
+
+                khalti.answers[outage] = Verification(status="completed", amount=400)
+                await webhook_worker.drain()
+                assert (await statuses())[outage] == "completed"
+                print("  [OK] The queued event is applied once the provider answers again")
+        finally:
+            gateways.update(saved)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    upgrade_database()
+    try:
+        test_verification_against_stub()
+        test_rate_limit_and_circuit_breaker()
+        test_verify_endpoints_use_provider()
+        test_rejected_credentials_leave_payment_pending()
+        test_reconciler_resumes_from_checkpoint()
+        test_reconciler_survives_malformed_answers()
+        test_malformed_answers_raise_gateway_error()
+        test_webhooks_apply_only_verified_statuses()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
 from app.main import app
 from app.database.connection import engine, Base
-from app.database.models import BlogPost, Contact, ChatSession, Payment
+from app.database.models import BlogPost, Contact, ChatConversation, ChatMessage, Payment, MetricsRollup
 from app.models import AdminLogin, ContactRequest, ChatRequest
 from app.routers.auth import create_access_token
 from sqlalchemy import inspect
@@ -47,7 +47,7 @@ def test_database_setup():
         # Check tables exist
         inspector = inspect(engine)
         tables = inspector.get_table_names()
-        expected_tables = ['blog_posts', 'contacts', 'chat_sessions', 'payments']
+        expected_tables = ['blog_posts', 'contacts', 'chat_conversations', 'chat_messages', 'payments', 'metrics_rollup']
         
         for table in expected_tables:
             if table in tables:
@@ -113,7 +113,7 @@ def test_models():
         
         # Test SQLAlchemy models
         print("  [OK] SQLAlchemy Models:")
-        models = [BlogPost, Contact, ChatSession, Payment]
+        models = [BlogPost, Contact, ChatConversation, ChatMessage, Payment, MetricsRollup]
         for model in models:
             print(f"      {model.__tablename__}: {len(model.__table__.columns)} columns")
         
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Schema & Query Plan Regression Suite
+Checks that the Alembic migrations build exactly the schema the models
+declare, then drives every endpoint against the migrated database, captures
+the SELECTs they issue and EXPLAINs each one. Fails when a query reads a
+table with a sequential scan, or (SQLite) sorts rows that an index should
+deliver in order.
+
+Runs against DATABASE_URL (a scratch SQLite file by default, see conftest.py);
+on PostgreSQL sequential scans are disabled while explaining so tiny test
+tables still show whether a usable index exists.
+"""
+
+import sys
+import os
+import re
+import asyncio
+import uuid
+from datetime import timedelta
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import event
+
+from conftest import upgrade_database
+from app.main import app
+from app.database.connection import Base, async_engine, engine
+from app.routers.auth import create_access_token
+from app.services.chat_context import chat_contexts
+from app.services.payment_reconciler import PaymentReconciler
+from app.services.webhook_worker import webhook_worker
+
+# Tables whose every row is read by design; a scan of any other table fails
+FULL_SCANS_ALLOWED = {
+    # One row per day x metric x status x method; summarize() aggregates all of it
+    "metrics_rollup",
+}
+TABLES = set(Base.metadata.tables)
+
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)$")
+# Also matches "... FOR RIGHT PART OF ORDER BY": an index that orders only the leading keys
+SQLITE_SORT = re.compile(r"^USE TEMP B-TREE FOR .*ORDER BY$")
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+async def exercise_endpoints() -> list:
+    """Run the app and return every SELECT it issues while driven"""
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")) and not executemany:
+            captured.append((statement, parameters))
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            await drive(client, headers)
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    return captured
+
+
+async def drive(client: httpx.AsyncClient, headers: dict) -> None:
+    """Seed a little data through the API, then hit every read path"""
+    # Two of each so cursor pages are requested too
+    for _ in range(2):
+        blog = (await client.post("/blog/", json={
+            "title": "Query plan regression post", "content": "Indexes keep every read path fast.",
+            "featured": True, "slug": f"query-plan-{uuid.uuid4().hex}",
+        })).json()
+        await client.post("/contact/", json={
+            "name": "Plan Tester", "email": "plans@example.com", "project": "Checking every query uses an index",
+        })
+        payment = (await client.post("/payment/khalti/initiate", json={
+            "amount": 1000, "customer_name": "Plan Tester", "customer_email": "plans@example.com",
+            "description": "Plan check", "return_url": "http://localhost:3000/payment/success",
+        })).json()
+    session_id = (await client.post("/ai/chat", json={"message": "What services do you offer?"})).json()["session_id"]
+    await client.post("/ai/chat", json={"message": "And the pricing?", "session_id": session_id})
+
+    # Conditional requests first: once a response is cached they never reach the database
+    await client.get("/blog/?limit=1", headers={"If-None-Match": '"stale"'})
+    page = (await client.get("/blog/?limit=1")).json()
+    await client.get("/blog/", params={"limit": 1, "cursor": page["next_cursor"]})
+    await client.get("/blog/?view=full")
+    await client.get("/blog/search?q=indexes")
+    await client.get(f"/blog/{blog['id']}", headers={"If-None-Match": '"stale"'})
+    await client.get(f"/blog/{blog['id']}")
+    await client.get("/blog/stats/all")
+
+    contacts = (await client.get("/contact/?limit=1")).json()
+    await client.get("/contact/", params={"limit": 1, "cursor": contacts["next_cursor"]})
+    await client.get("/contact/export?format=ndjson", headers=headers)
+
+    history = (await client.get("/payment/history", params={"limit": 1}, headers=headers)).json()
+    await client.get("/payment/history", params={"limit": 1, "cursor": history["next_cursor"]}, headers=headers)
+    for filters in ({"status": "pending"}, {"method": "khalti"}, {"email": "plans@example.com"},
+                    {"created_from": "2020-01-01T00:00:00", "fields": "transaction_id,amount"}):
+        await client.get("/payment/history", params=filters, headers=headers)
+    await client.get("/payment/stats")
+    for granularity in ("hour", "day", "month"):
+        await client.get("/payment/stats/timeseries", params={"granularity": granularity})
+    await client.post("/payment/khalti/verify", params={"token": payment["transaction_id"], "amount": 1000})
+    await client.post("/payment/khalti/webhook", json={"token": payment["transaction_id"]})
+    await client.post("/payment/khalti/webhook", json={"token": payment["transaction_id"], "status": "Refunded"})
+    await webhook_worker.drain()
+    await client.get("/payment/webhooks/stats", headers=headers)
+    # Two pages, the second resuming from the checkpoint
+    for _ in range(2):
+        await client.post("/payment/esewa/initiate", json={
+            "amount": 500, "customer_name": "Plan Tester", "customer_email": "plans@example.com",
+            "description": "Plan check", "return_url": "http://localhost:3000/payment/success",
+        })
+    await PaymentReconciler(batch_size=1, min_age=timedelta(0)).sweep()
+    await client.post("/payment/esewa/verify", params={"ref_id": payment["transaction_id"]})
+
+    # A context cache miss loads the conversation and its recent messages
+    chat_contexts.cache.clear()
+    await client.post("/ai/chat", json={"message": "Thanks, how long does it take?", "session_id": session_id})
+    history = (await client.get(f"/ai/chat/history/{session_id}")).json()
+    await client.get("/ai/stats")
+    await client.post("/ai/chat/feedback", params={
+        "session_id": session_id, "message_id": history["messages"][0]["id"], "rating": 5,
+    })
+
+    await client.get("/dashboard/stats", headers=headers)
+    await client.get("/dashboard/overview", headers=headers)
+    await client.get("/dashboard/recent", headers=headers)
+
+
+def explain(statement, parameters) -> list[str]:
+    """Plan violations for one statement"""
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET enable_seqscan = off")
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            conn.rollback()
+            violations = []
+            nodes = [plan[0]["Plan"]]
+            while nodes:
+                node = nodes.pop()
+                if node["Node Type"] == "Seq Scan" and node["Relation Name"] not in FULL_SCANS_ALLOWED:
+                    violations.append(f"Seq Scan on {node['Relation Name']}")
+                nodes.extend(node.get("Plans", []))
+            return violations
+
+        details = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        # Full-text results are ordered by relevance score, which no B-tree can deliver
+        ranked = any("VIRTUAL TABLE" in detail for detail in details)
+        violations = []
+        for detail in details:
+            scan = SQLITE_SCAN.match(detail)
+            # Scans of materialized one-row subqueries are not table reads
+            if scan and scan.group(1) in TABLES and scan.group(1) not in FULL_SCANS_ALLOWED:
+                violations.append(detail)
+            elif SQLITE_SORT.match(detail) and not ranked:
+                violations.append(detail)
+        return violations
+
+
+def test_migrations_match_models():
+    """The migrated schema has every table, column and index the models declare, and nothing else"""
+    print_section("Migrations vs Models Test")
+
+    with engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+    # The full-text index lives outside the models (search.py)
+    diff = [d for d in diff if not (d[0] == "remove_table" and d[1].name.startswith("blog_posts_fts"))]
+    for change in diff:
+        print(f"  [FAIL] {change}")
+    assert not diff, f"Migrations and models disagree, add a revision: {diff}"
+    print("  [OK] Migrated schema matches the models")
+
+
+def test_router_queries_use_indexes():
+    """Every SELECT issued by the routers is served by an index"""
+    print_section("Query Plan Regression Test")
+
+    captured = asyncio.run(exercise_endpoints())
+    assert captured, "no queries captured"
+
+    failures = []
+    for statement, parameters in captured:
+        violations = explain(statement, parameters)
+        label = " ".join(statement.split())[:100]
+        if violations:
+            failures.append(f"{label}\n      -> {', '.join(violations)}")
+            print(f"  [FAIL] {label}")
+        else:
+            print(f"  [OK] {label}")
+
+    print(f"\n  {len(captured)} queries explained, {len(failures)} with full scans or sorts")
+    assert not failures, "Queries without a usable index:\n  " + "\n  ".join(failures)
+
+
+if __name__ == "__main__":
+    upgrade_database()
+    try:
+        test_migrations_match_models()
+        test_router_queries_use_indexes()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Read Replica Suite
+Copies a migrated SQLite database into two "replicas", marks each copy,
+and runs the app against them in a separate process (the replica set is
+built when app.database.connection is imported, so DATABASE_REPLICA_URLS
+must be set first). Checks round-robin routing of reads, the db_primary
+cookie pinning a writer's reads to the primary, the health report, and
+fallback when replicas disappear, and that a blog edit's stale copy on a
+replica is served but never cached.
+"""
+
+import sys
+import os
+import json
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import uuid
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "backend")
+MARKERS = ("primary", "replica-1", "replica-2")
+# Published on the primary before the copies are taken, so every database has it
+BLOG_ID = uuid.UUID("018f3c2a-7b1e-7c00-8000-000000000001")
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def build_databases(root: str) -> dict:
+    """Migrated primary plus two copies, each holding one contact named after it"""
+    paths = {name: os.path.join(root, name, "app.db") for name in MARKERS}
+    for path in paths.values():
+        os.makedirs(os.path.dirname(path))
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{paths['primary']}"}
+    result = subprocess.run([sys.executable, "-m", "alembic", "-c", "alembic.ini", "upgrade", "head"],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    conn = sqlite3.connect(paths["primary"])
+    with conn:
+        conn.execute(
+            "INSERT INTO blog_posts (id, title, content, slug, featured, author, created_at, updated_at) "
+            "VALUES (?, 'Original', 'Replicated post', 'replicated-post', 1, 'admin', "
+            "'2026-01-01 00:00:00', '2026-01-01 00:00:00')",
+            (BLOG_ID.hex,),
+        )
+    conn.close()
+    for name in MARKERS[1:]:
+        shutil.copy(paths["primary"], paths[name])
+    for name, path in paths.items():
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.execute(
+                "INSERT INTO contacts (id, name, email, project) VALUES (?, ?, 'marker@example.com', 'Marker')",
+                (uuid.uuid4().hex, name),
+            )
+        conn.close()
+    return paths
+
+
+async def replica_scenario() -> dict:
+    """Runs in the child process, with DATABASE_URL and DATABASE_REPLICA_URLS already set"""
+    import httpx
+    from sqlalchemy.engine import make_url
+    from app.main import app
+    from app.database.connection import DATABASE_REPLICA_URLS, replicas
+    from app.database.replicas import PRIMARY_COOKIE
+    from app.routers.blog import blog_cache
+    from app.services.cache import TTLCache
+
+    replica_dirs = [os.path.dirname(make_url(url).database) for url in DATABASE_REPLICA_URLS]
+    seen = {}
+    # Unhandled errors become 500s, as behind a real server
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def served_by(cookies=None) -> str | None:
+            response = await client.get("/contact/", params={"limit": 200}, cookies=cookies)
+            if response.status_code != 200:
+                return None
+            names = {c["name"] for c in response.json()["messages"]}
+            return next(name for name in MARKERS if name in names)
+
+        async def read_many(count: int = 4) -> list:
+            return [await served_by() for _ in range(count)]
+
+        seen["round_robin"] = await read_many()
+        seen["health"] = (await client.get("/health")).json()["database_replicas"]
+
+        written = await client.post("/contact/", json={
+            "name": "Writer", "email": "writer@example.com", "project": "Read your writes check",
+        })
+        seen["write_cookie"] = written.cookies.get(PRIMARY_COOKIE)
+        # Send the cookie only where asked, as if it had expired in between
+        client.cookies.clear()
+        seen["pinned"] = await served_by(cookies={PRIMARY_COOKIE: "1"})
+        seen["unpinned"] = await served_by()
+
+        # The replicas never receive the edit: a lagging replica at its worst
+        blog_key = TTLCache.make_key("blog:get", id=BLOG_ID)
+
+        async def blog_title(cookies=None) -> str:
+            return (await client.get(f"/blog/{BLOG_ID}", cookies=cookies)).json()["title"]
+
+        await blog_title()
+        seen["cached_before_edit"] = blog_key in blog_cache
+        await client.put(f"/blog/{BLOG_ID}", json={"title": "Edited"})
+        client.cookies.clear()
+        seen["replica_after_edit"] = await blog_title()
+        seen["cached_from_replica"] = blog_key in blog_cache
+        seen["primary_after_edit"] = await blog_title(cookies={PRIMARY_COOKIE: "1"})
+        seen["cached_from_primary"] = blog_key in blog_cache
+        seen["served_after_edit"] = [await blog_title() for _ in range(2)]
+
+        # replica-2 goes away: its pooled connections drop and the file is gone
+        await replicas.engines[1].dispose()
+        shutil.rmtree(replica_dirs[1])
+        seen["after_loss"] = await read_many()
+        seen["healthy_after_eject"] = replicas.status()["healthy"]
+        await replicas.check()
+        seen["health_after_loss"] = (await client.get("/health")).json()["database_replicas"]
+
+        await replicas.engines[0].dispose()
+        shutil.rmtree(replica_dirs[0])
+        await replicas.check()
+        seen["all_lost"] = await read_many()
+        seen["health_all_lost"] = (await client.get("/health")).json()["database_replicas"]
+    await replicas.stop()
+    return seen
+
+
+def test_replica_routing():
+    """Reads rotate over healthy replicas, writers read the primary, lost replicas are skipped"""
+    print_section("Read Replica Routing Test")
+
+    paths = build_databases(tempfile.mkdtemp())
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{paths['primary']}",
+        "DATABASE_REPLICA_URLS": ",".join(f"sqlite:///{paths[name]}" for name in MARKERS[1:]),
+    }
+    env.pop("ASYNC_DATABASE_URL", None)
+    code = ("import asyncio, json, test_read_replicas as t; "
+            "print(json.dumps(asyncio.run(t.replica_scenario())))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    seen = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert seen["round_robin"] == ["replica-1", "replica-2", "replica-1", "replica-2"], seen["round_robin"]
+    assert seen["health"] == {"configured": 2, "healthy": 2}
+    print("  [OK] Reads alternate between the two replicas, /health reports 2 of 2 healthy")
+
+    assert seen["write_cookie"] == "1"
+    assert seen["pinned"] == "primary" and seen["unpinned"] in MARKERS[1:]
+    print("  [OK] A write sets db_primary and reads carrying it go to the primary")
+
+    assert seen["cached_before_edit"]
+    assert seen["replica_after_edit"] == "Original" and not seen["cached_from_replica"]
+    assert seen["primary_after_edit"] == "Edited" and seen["cached_from_primary"]
+    assert seen["served_after_edit"] == ["Edited", "Edited"], seen["served_after_edit"]
+    print("  [OK] A replica read right after an edit is not cached; the primary's copy is")
+
+    # The read that hit the lost replica fails and ejects it; later reads stay on replica-1
+    assert seen["after_loss"].count(None) == 1 and set(seen["after_loss"]) == {None, "replica-1"}, seen["after_loss"]
+    assert seen["healthy_after_eject"] == 1
+    assert seen["health_after_loss"] == {"configured": 2, "healthy": 1}
+    print(f"  [OK] Lost replica ejected after one failed read: {seen['after_loss']}")
+
+    assert seen["all_lost"] == ["primary"] * 4 and seen["health_all_lost"] == {"configured": 2, "healthy": 0}
+    print("  [OK] With no healthy replica every read falls back to the primary")
+
+
+if __name__ == "__main__":
+    try:
+        test_replica_routing()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Reply Cache Suite
+Checks the chat reply cache: exact hits across case and punctuation,
+similarity hits just above the threshold and misses just below it, that the
+trigram index finds the same best match as scoring every key, and that
+expired, evicted and cleared replies are no longer served.
+"""
+
+import sys
+import os
+import math
+import random
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app.services.reply_cache import ReplyCache, ngrams, normalize
+
+QUESTION = "How much does a custom inventory chatbot cost for a small shop?"
+REPLY = "A small inventory chatbot starts at NPR 50,000."
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def cosine(a: str, b: str) -> float:
+    first, second = ngrams(normalize(a)), ngrams(normalize(b))
+    return len(first & second) / math.sqrt(len(first) * len(second))
+
+
+def test_similarity_threshold():
+    """Near-duplicates above the threshold hit, anything below it misses"""
+    print_section("Reply Cache Similarity Test")
+
+    cache = ReplyCache(similarity=0.9)
+    cache.store(QUESTION, REPLY)
+
+    assert cache.lookup("how much does a CUSTOM inventory chatbot cost, for a small shop") == REPLY
+    assert cache.stats()["exact_hits"] == 1
+    print("  [OK] Case and punctuation variants are exact hits")
+
+    for near in ("How much does a custom inventory chat bot cost for a small shop?",
+                 "How much does a custom inventory chatbot cost for small shops?"):
+        assert cosine(QUESTION, near) >= 0.9
+        assert cache.lookup(near) == REPLY, near
+    assert cache.stats()["similar_hits"] == 2
+    print("  [OK] Near-duplicates at cosine >= 0.9 are similar hits")
+
+    below = "How much would a custom inventory chatbot cost for a small shop?"
+    assert 0.85 < cosine(QUESTION, below) < 0.9
+    for miss in (below, "How much does a custom booking chatbot cost for a large hotel?",
+                 "Can you build a mobile app for my restaurant?", "?!"):
+        assert cache.lookup(miss) is None, miss
+    print("  [OK] A close question just under the threshold and unrelated ones miss")
+
+    exact_only = ReplyCache(similarity=0)
+    exact_only.store(QUESTION, REPLY)
+    assert exact_only.lookup("How much does a custom inventory chat bot cost for a small shop?") is None
+    print("  [OK] similarity=0 serves exact matches only")
+
+
+def test_index_matches_brute_force():
+    """The prefix-filtered index finds a match as good as scoring every cached key"""
+    print_section("Reply Cache Index Test")
+
+    random.seed(3)
+    words = "how much does a custom app chatbot website cost take build for my small shop hotel school".split()
+    questions = {" ".join(random.choices(words, k=random.randint(3, 9))) for _ in range(400)}
+    cache = ReplyCache(max_entries=1000, similarity=0.8)
+    for question in questions:
+        cache.store(question, question)
+
+    checked = 0
+    for _ in range(400):
+        query = " ".join(random.choices(words, k=random.randint(3, 9)))
+        if normalize(query) in questions:
+            continue
+        best = max((cosine(query, q) for q in questions), default=0.0)
+        found = cache.lookup(query)
+        if best >= 0.8:
+            assert found is not None and math.isclose(cosine(query, found), best), query
+        else:
+            assert found is None, query
+        checked += 1
+    print(f"  [OK] {checked} lookups agree with brute-force cosine over {len(questions)} keys")
+
+
+def test_invalidation():
+    """Expired, evicted and cleared replies are dropped from the trigram index too"""
+    print_section("Reply Cache Invalidation Test")
+
+    cache = ReplyCache(ttl=0.05, similarity=0.9)
+    cache.store(QUESTION, REPLY)
+    time.sleep(0.1)
+    assert cache.lookup(QUESTION) is None
+    assert cache.lookup("How much does a custom inventory chat bot cost for a small shop?") is None
+    assert cache.stats()["expirations"] == 1 and not cache._grams
+    print("  [OK] Expired replies miss and leave the index")
+
+    cache = ReplyCache(max_entries=2, similarity=0.9)
+    cache.store(QUESTION, REPLY)
+    cache.store("What services do you offer for schools?", "Websites and apps.")
+    cache.store("How long does a mobile app take to build?", "About four weeks.")
+    assert cache.lookup("How much does a custom inventory chat bot cost for a small shop?") is None
+    assert normalize(QUESTION) not in cache._grams and cache.stats()["evictions"] == 1
+    assert cache.lookup("how long does a mobile app take to build") == "About four weeks."
+    print("  [OK] The least recently used reply is evicted and no longer similar-matched")
+
+    cache.store(QUESTION, "Updated price list.")
+    assert cache.lookup("How much does a custom inventory chat bot cost for a small shop?") == "Updated price list."
+    print("  [OK] Storing a question again replaces its reply")
+
+    cache.clear()
+    assert cache.lookup("How long does a mobile app take to build?") is None
+    assert cache.stats()["entries"] == 0 and not cache._grams and not cache._index
+    print("  [OK] clear() empties the cache and the trigram index")
+
+
+if __name__ == "__main__":
+    try:
+        test_similarity_threshold()
+        test_index_matches_brute_force()
+        test_invalidation()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Response Cache Suite
+Checks the TTLCache behind the blog reads: least recently used entries go
+first when the entry or byte cap is hit, entries expire after their TTL,
+and invalidating a tag drops exactly the entries carrying it. Then drives
+the blog endpoints and checks that each write drops the cached listing,
+post and stats it affects, and only those.
+"""
+
+import sys
+import os
+import asyncio
+import time
+import uuid
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+
+from app.main import app
+from app.routers.blog import blog_cache
+from app.services.cache import TTLCache
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def test_lru_eviction():
+    """The entry and byte caps evict least recently used entries first"""
+    print_section("Cache LRU Eviction Test")
+
+    removed = []
+    cache = TTLCache(max_entries=3, max_bytes=100, on_remove=removed.append)
+    for key in ("a", "b", "c"):
+        cache.set(key, b"12345")
+    assert cache.get("a") == b"12345"
+    cache.set("d", b"12345")
+    assert "b" not in cache and all(key in cache for key in ("a", "c", "d"))
+    assert removed == ["b"] and cache.stats()["evictions"] == 1
+    print("  [OK] A fourth entry evicts the least recently used one, not the oldest written")
+
+    cache = TTLCache(max_entries=10, max_bytes=10, on_remove=removed.append)
+    cache.set("x", b"123456")
+    cache.set("y", b"123456")
+    assert "x" not in cache and "y" in cache and cache.bytes == 6
+    cache.set("z", "rendered page", size=4)
+    assert "y" in cache and cache.bytes == 10
+    cache.set("huge", b"x" * 11)
+    assert "huge" not in cache and cache.bytes == 10 and "y" in cache
+    print("  [OK] The byte cap evicts by size; values larger than the cap are never stored")
+
+    cache.set("y", b"12")
+    assert cache.bytes == 6 and cache.stats()["entries"] == 2
+    print("  [OK] Replacing an entry releases its old size")
+
+
+def test_ttl_expiry():
+    """Entries stop being served once their TTL passes"""
+    print_section("Cache TTL Expiry Test")
+
+    removed = []
+    cache = TTLCache(ttl=0.05, on_remove=removed.append)
+    cache.set("short", b"value")
+    cache.set("long", b"value", ttl=60)
+    assert cache.get("short") == b"value"
+    time.sleep(0.1)
+    assert cache.get("short") is None and "short" not in cache
+    assert cache.get("long") == b"value"
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["hits"] == 2 and stats["misses"] == 1
+    assert removed == ["short"] and cache.bytes == 5
+    print("  [OK] An expired entry misses and is removed; a per-entry TTL outlives the default")
+
+
+def test_tag_invalidation():
+    """Invalidating a tag removes every entry carrying it and nothing else"""
+    print_section("Cache Tag Invalidation Test")
+
+    cache = TTLCache()
+    cache.set("list:1", b"page one", tags=("list",))
+    cache.set("list:2", b"page two", tags=("list",))
+    cache.set("post:1", b"post", tags=("post:1", "list"))
+    cache.set("post:2", b"post", tags=("post:2",))
+    cache.set("stats", b"{}", tags=("stats",))
+
+    assert cache.invalidate("list") == 3
+    assert [key in cache for key in ("list:1", "list:2", "post:1", "post:2", "stats")] == [
+        False, False, False, True, True
+    ]
+    assert cache.invalidate("post:1", "unknown") == 0
+    assert cache.invalidate("post:2", "stats") == 2 and cache.bytes == 0
+    assert cache.stats()["invalidations"] == 5
+    print("  [OK] Each tag drops exactly its entries; unknown or emptied tags drop nothing")
+
+
+def test_blog_writes_invalidate_cached_reads():
+    """Creating, editing and deleting posts drops the cached list, post and stats they change"""
+    print_section("Blog Cache Invalidation Test")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/blog/", json={
+                "title": "Cached Post", "slug": f"cached-post-{uuid.uuid4().hex[:8]}",
+                "content": "Cached Post body for the response cache suite", "featured": True,
+            })
+            assert response.status_code == 200, response.text
+            post_id = response.json()["id"]
+            keys = {
+                "list": TTLCache.make_key("blog:list", cursor=None, limit=100, view="summary"),
+                "post": TTLCache.make_key("blog:get", id=uuid.UUID(post_id)),
+                "stats": TTLCache.make_key("blog:stats"),
+            }
+
+            async def warm() -> dict:
+                """Read all three through the cache and return what they show"""
+                listing = (await client.get("/blog/", params={"limit": 100})).json()
+                post = await client.get(f"/blog/{post_id}")
+                stats = (await client.get("/blog/stats/all")).json()
+                assert all(key in blog_cache for key in keys.values())
+                return {
+                    "listed": any(b["id"] == post_id for b in listing["blogs"]),
+                    "title": post.json()["title"] if post.status_code == 200 else None,
+                    "featured": stats["featured"],
+                    "total": stats["total_blogs"],
+                }
+
+            def cached() -> set:
+                return {name for name, key in keys.items() if key in blog_cache}
+
+            before = await warm()
+            assert before["listed"] and before["title"] == "Cached Post"
+
+            await client.put(f"/blog/{post_id}", json={"title": "Cached Post v2"})
+            assert cached() == {"stats"}
+            shown = await warm()
+            assert shown["title"] == "Cached Post v2" and shown["listed"]
+            print("  [OK] Editing a published post drops its page and the listing, keeps the stats")
+
+            await client.put(f"/blog/{post_id}", json={"featured": False})
+            assert cached() == set()
+            shown = await warm()
+            assert not shown["listed"] and shown["featured"] == before["featured"] - 1
+            print("  [OK] Unpublishing drops the post, the listing and the stats")
+
+            draft = await client.post("/blog/", json={
+                "title": "Cached Draft", "slug": f"cached-draft-{uuid.uuid4().hex[:8]}",
+                "content": "Cached Draft body for the response cache suite", "featured": False,
+            })
+            assert draft.status_code == 200
+            assert cached() == {"list", "post"}
+            shown = await warm()
+            assert shown["total"] == before["total"] + 1
+            print("  [OK] A new draft only drops the stats")
+
+            assert (await client.delete(f"/blog/{post_id}")).status_code == 200
+            assert cached() == {"list"}
+            assert (await client.get(f"/blog/{post_id}")).status_code == 404
+            stats = (await client.get("/blog/stats/all")).json()
+            assert stats["total_blogs"] == before["total"]
+            print("  [OK] Deleting a draft drops its page and the stats, the listing stays cached")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    try:
+        test_lru_eviction()
+        test_ttl_expiry()
+        test_tag_invalidation()
+        test_blog_writes_invalidate_cached_reads()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Revenue Series Suite
+Creates payments on either side of hour, day and month boundaries, the way
+the initiate endpoints and the status transitions record them, and checks
+the buckets of /payment/stats/timeseries: each payment lands in the bucket
+of its creation time, ranges starting mid-bucket include that bucket, an
+end on a boundary excludes the next one, and empty buckets come back as
+zeros.
+"""
+
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+
+from app.main import app
+from app.database.aggregates import revenue_series
+from app.database.connection import AsyncSessionLocal
+from app.database.models import Payment
+from app.database.payment_store import apply_transitions
+from app.database.rollup import bump
+
+# (created_at, amount, completed): around midnight and the end of a month
+PAYMENTS = [
+    (datetime(2001, 3, 1, 23, 59, 59, 999000), Decimal("100.10"), True),
+    (datetime(2001, 3, 2, 0, 0, 0), Decimal("250.00"), True),
+    (datetime(2001, 3, 2, 12, 30), Decimal("40.00"), False),
+    (datetime(2001, 3, 31, 23, 0), Decimal("9.99"), True),
+    (datetime(2001, 4, 1, 0, 0), Decimal("500.00"), True),
+]
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+async def seed() -> None:
+    """Pending payments with their rollup rows, then the completions applied now"""
+    tag = uuid.uuid4().hex[:8]
+    completed = set()
+    async with AsyncSessionLocal() as db:
+        for n, (created_at, amount, done) in enumerate(PAYMENTS):
+            transaction_id = f"series-{tag}-{n}"
+            db.add(Payment(transaction_id=transaction_id, customer_name="Series", customer_email="s@example.com",
+                           amount=amount, status="pending", payment_method="khalti", created_at=created_at))
+            await bump(db, "payments", day=created_at.date(), status="pending", method="khalti", amount=amount)
+            if done:
+                completed.add(transaction_id)
+        await db.commit()
+        await apply_transitions(db, {"completed": completed})
+        await db.commit()
+
+
+def figures(series: list[dict]) -> list[tuple]:
+    """(start, transactions, completed, revenue) per bucket"""
+    return [(b["start"], b["transactions"], b["completed"], Decimal(str(b["revenue"]))) for b in series]
+
+
+def added(after: list[dict], before: list[dict]) -> list[tuple]:
+    """What the seeded payments added to each bucket"""
+    return [
+        (start, count - old_count, done - old_done, revenue - old_revenue)
+        for (start, count, done, revenue), (_, old_count, old_done, old_revenue)
+        in zip(figures(after), figures(before))
+    ]
+
+
+def test_bucket_boundaries():
+    """Payments fall into the bucket of their creation time; empty buckets are zeros"""
+    print_section("Revenue Series Bucket Test")
+
+    ranges = {
+        # Starts mid-day: the whole first day is included; ends on a boundary
+        "day": (datetime(2001, 3, 1, 12), datetime(2001, 3, 4)),
+        "hour": (datetime(2001, 3, 1, 23), datetime(2001, 3, 2, 2)),
+        "month": (datetime(2001, 3, 1), datetime(2001, 5, 1)),
+    }
+
+    async def run():
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        async with AsyncSessionLocal() as db:
+            before = {g: await revenue_series(db, g, *span) for g, span in ranges.items()}
+            before_today = await revenue_series(db, "day", today, today + timedelta(days=1))
+        await seed()
+        async with AsyncSessionLocal() as db:
+            after = {g: await revenue_series(db, g, *span) for g, span in ranges.items()}
+            after_today = await revenue_series(db, "day", today, today + timedelta(days=1))
+
+        assert added(after["day"], before["day"]) == [
+            ("2001-03-01T00:00:00", 1, 1, Decimal("100.10")),
+            ("2001-03-02T00:00:00", 2, 1, Decimal("250.00")),
+            ("2001-03-03T00:00:00", 0, 0, Decimal("0")),
+        ], after["day"]
+        assert figures(after["day"])[2] == ("2001-03-03T00:00:00", 0, 0, Decimal("0"))
+        print("  [OK] Day buckets split at midnight; the empty day is zeros; the end day is excluded")
+
+        assert added(after["hour"], before["hour"]) == [
+            ("2001-03-01T23:00:00", 1, 1, Decimal("100.10")),
+            ("2001-03-02T00:00:00", 1, 1, Decimal("250.00")),
+            ("2001-03-02T01:00:00", 0, 0, Decimal("0")),
+        ], after["hour"]
+        print("  [OK] Hour buckets split at 23:59:59.999 / 00:00:00 with an empty hour after")
+
+        assert added(after["month"], before["month"]) == [
+            ("2001-03-01T00:00:00", 4, 3, Decimal("360.09")),
+            ("2001-04-01T00:00:00", 1, 1, Decimal("500.00")),
+        ], after["month"]
+        print("  [OK] Month buckets split at the last hour of March")
+
+        # The completions above were applied today, yet today's bucket is unchanged
+        assert figures(after_today) == figures(before_today)
+        print("  [OK] Revenue is keyed on the creation day, not the completion day")
+
+    asyncio.run(run())
+
+
+def test_timeseries_endpoint():
+    """The endpoint serves the same buckets and rejects bad ranges"""
+    print_section("Revenue Series Endpoint Test")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/payment/stats/timeseries", params={
+                "granularity": "day", "start": "2001-03-01T12:00:00", "end": "2001-03-04T00:00:00",
+            })
+            assert response.status_code == 200, response.text
+            body = response.json()
+            async with AsyncSessionLocal() as db:
+                series = await revenue_series(db, "day", datetime(2001, 3, 1, 12), datetime(2001, 3, 4))
+            assert figures(body["buckets"]) == figures(series) and len(series) == 3
+            print("  [OK] /payment/stats/timeseries returns the three day buckets")
+
+            # +05:45 (Nepal) converts to UTC before bucketing
+            local = await client.get("/payment/stats/timeseries", params={
+                "granularity": "hour", "start": "2001-03-02T05:45:00+05:45", "end": "2001-03-02T06:45:00+05:45",
+            })
+            assert [b["start"] for b in local.json()["buckets"]] == ["2001-03-02T00:00:00"]
+            print("  [OK] Offsets are converted to UTC before bucketing")
+
+            rejected = [
+                (await client.get("/payment/stats/timeseries", params={
+                    "start": "2001-03-02T00:00:00", "end": "2001-03-01T00:00:00"})).status_code,
+                (await client.get("/payment/stats/timeseries", params={
+                    "granularity": "hour", "start": "1990-01-01T00:00:00", "end": "2001-01-01T00:00:00"})).status_code,
+            ]
+            assert rejected == [400, 400], rejected
+            print("  [OK] Reversed ranges and ranges over the bucket limit answer 400")
+
+            empty = await client.get("/payment/stats/timeseries", params={
+                "granularity": "month", "start": "1950-01-01T00:00:00", "end": "1950-03-01T00:00:00"})
+            assert [(b["transactions"], b["revenue"]) for b in empty.json()["buckets"]] == [(0, 0), (0, 0)]
+            print("  [OK] A range with no payments returns zero buckets")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    try:
+        test_bucket_boundaries()
+        test_timeseries_endpoint()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Himalayan AI Tech Pro - Metrics Rollup Suite
+Writes contacts, payments and blog posts through the API, moves payments
+between statuses and deletes posts, then checks that the rollup totals
+equal a direct COUNT/SUM over the raw tables. Corrupts the rollup on
+purpose and checks that `check` reports exactly the drifted rows and
+`rebuild` repairs them.
+"""
+
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+from sqlalchemy import select, func, update, delete
+
+from app.main import app
+from app.database.connection import AsyncSessionLocal
+from app.database.models import BlogPost, Contact, MetricsRollup, Payment
+from app.database.payment_store import apply_transitions
+from app.database.rollup import check, rebuild, summarize, total
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+async def direct_totals(db) -> dict:
+    """The dashboard figures counted straight from the raw tables"""
+    payments = {
+        (row.status, row.payment_method): (row.count, row.amount)
+        for row in await db.execute(
+            select(Payment.status, Payment.payment_method, func.count().label("count"),
+                   func.sum(Payment.amount).label("amount"))
+            .group_by(Payment.status, Payment.payment_method)
+        )
+    }
+    return {
+        "contacts": await db.scalar(select(func.count()).select_from(Contact)),
+        "featured": await db.scalar(select(func.count()).select_from(BlogPost).where(BlogPost.featured == True)),
+        "draft": await db.scalar(select(func.count()).select_from(BlogPost).where(BlogPost.featured == False)),
+        "payments": payments,
+    }
+
+
+async def rollup_totals(db) -> dict:
+    """The same figures read from metrics_rollup"""
+    summary = await summarize(db, ["contacts", "blogs", "payments"])
+    payments = {
+        (status, method): (values["count"], values["amount"])
+        for (metric, status, method), values in summary.items()
+        if metric == "payments" and values["count"]
+    }
+    return {
+        "contacts": total(summary, "contacts"),
+        "featured": total(summary, "blogs", status="featured"),
+        "draft": total(summary, "blogs", status="draft"),
+        "payments": payments,
+    }
+
+
+async def write_mix(client: httpx.AsyncClient) -> dict:
+    """Contacts, payments and posts through the API; returns the payment transaction ids"""
+    for n in range(3):
+        response = await client.post("/contact/", json={
+            "name": f"Rollup Contact {n}", "email": f"rollup{n}@example.com", "project": "Rollup check",
+        })
+        assert response.status_code == 200, response.text
+
+    payments = {}
+    for name, method, amount in (("k1", "khalti", 1000), ("k2", "khalti", 250),
+                                 ("e1", "esewa", 500), ("e2", "esewa", 750)):
+        response = await client.post(f"/payment/{method}/initiate", json={
+            "amount": amount, "customer_name": "Rollup Customer", "customer_email": "payer@example.com",
+            "description": "Rollup check", "return_url": "http://localhost:3000/payment/success",
+        })
+        assert response.status_code == 200, response.text
+        payments[name] = response.json()["transaction_id"]
+
+    posts = []
+    for title, featured in (("Rollup Featured", True), ("Rollup Draft", False), ("Rollup Doomed", True)):
+        response = await client.post("/blog/", json={
+            "title": title, "slug": f"{title.lower().replace(' ', '-')}-{uuid.uuid4().hex[:8]}",
+            "content": f"{title} body for the rollup suite", "featured": featured,
+        })
+        assert response.status_code == 200, response.text
+        posts.append(response.json()["id"])
+    assert (await client.put(f"/blog/{posts[1]}", json={"featured": True})).status_code == 200
+    assert (await client.put(f"/blog/{posts[0]}", json={"featured": False})).status_code == 200
+    assert (await client.delete(f"/blog/{posts[2]}")).status_code == 200
+    return payments
+
+
+def test_rollup_matches_raw_tables():
+    """Rollup totals equal direct aggregates after writes, transitions and deletes"""
+    print_section("Metrics Rollup Consistency Test")
+
+    async def run():
+        # Other suites insert raw rows directly; start from a consistent rollup
+        async with AsyncSessionLocal() as db:
+            await rebuild(db)
+            before = await direct_totals(db)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            payments = await write_mix(client)
+
+        async with AsyncSessionLocal() as db:
+            # A batch completing and refunding, a repeat that must not count twice
+            await apply_transitions(db, {"completed": {payments["k1"], payments["e1"]},
+                                         "failed": {payments["k2"]}})
+            await db.commit()
+            applied = await apply_transitions(db, {"completed": {payments["k1"]},
+                                                   "refunded": {payments["e1"]}})
+            await db.commit()
+            assert applied == {(payments["e1"], "refunded")}, applied
+
+            after = await direct_totals(db)
+            assert after["contacts"] == before["contacts"] + 3
+            assert (after["featured"], after["draft"]) == (before["featured"] + 1, before["draft"] + 1)
+            assert await rollup_totals(db) == after
+            print(f"  [OK] Rollup equals COUNT/SUM: {after['contacts']} contacts, "
+                  f"{after['featured']} featured / {after['draft']} draft posts, "
+                  f"{len(after['payments'])} payment buckets")
+
+            completed = after["payments"][("completed", "khalti")]
+            refunded = after["payments"][("refunded", "esewa")]
+            assert completed[1] >= 1000 and refunded[1] >= 500
+            assert await check(db) == []
+            print("  [OK] check() finds no mismatches")
+
+    asyncio.run(run())
+
+
+def test_check_and_rebuild_repair_drift():
+    """check() reports drifted rollup rows and rebuild() puts them back"""
+    print_section("Metrics Rollup Drift Test")
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await rebuild(db)
+            expected = await rollup_totals(db)
+            assert expected == await direct_totals(db)
+            today = datetime.utcnow().date()
+
+            # One inflated payment bucket and a day of contacts lost
+            bucket = (await db.execute(
+                select(MetricsRollup).where(MetricsRollup.metric == "payments", MetricsRollup.count > 0).limit(1)
+            )).scalar_one()
+            drifted = (bucket.day, bucket.status, bucket.method)
+            await db.execute(
+                update(MetricsRollup)
+                .where(MetricsRollup.metric == "payments", MetricsRollup.day == bucket.day,
+                       MetricsRollup.status == bucket.status, MetricsRollup.method == bucket.method)
+                .values(count=MetricsRollup.count + 5, amount=MetricsRollup.amount + 99)
+            )
+            await db.execute(delete(MetricsRollup).where(MetricsRollup.metric == "contacts",
+                                                         MetricsRollup.day == today))
+            await db.commit()
+
+            mismatches = await check(db)
+            found = {(m["metric"], m["day"], m["status"], m["method"]) for m in mismatches}
+            assert found == {("payments", *drifted), ("contacts", today, "", "")}, mismatches
+            payment = next(m for m in mismatches if m["metric"] == "payments")
+            assert payment["rollup_count"] == payment["expected_count"] + 5
+            assert round(payment["rollup_amount"] - payment["expected_amount"], 2) == 99
+            assert await rollup_totals(db) != expected
+            print(f"  [OK] check() reports exactly the {len(mismatches)} drifted rows")
+
+            rows = await rebuild(db)
+            assert await check(db) == []
+            assert await rollup_totals(db) == expected
+            print(f"  [OK] rebuild() rewrote {rows} rows and the totals match again")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    try:
+        test_rollup_matches_raw_tables()
+        test_check_and_rebuild_repair_drift()
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)